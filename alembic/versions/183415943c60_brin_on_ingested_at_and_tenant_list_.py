@@ -0,0 +1,72 @@
+"""brin on ingested_at and tenant list index
+
+Index plan for the append-only audit_events table:
+  - keeps the composite B-tree idx_audit_events_ingested_at_event_id: it is the only index that
+    returns rows in the (ingested_at, event_id) order of every unfiltered GET /events page, the full
+    export and the cross-shard merge, so those read a keyset range instead of sorting the table. It
+    also covers retention victim selection (SELECT event_id WHERE ingested_at < cutoff) as an
+    index-only scan;
+  - drops the single-column idx_audit_events_ingested_at, a prefix of the composite;
+  - adds a BRIN index on ingested_at (ingested_at follows physical order): a few KB of block-range
+    summaries for wide range scans (since/until counts, bulk retention) where the planner prefers
+    a bitmap over walking the B-tree;
+  - adds a tenant list index on (account->>'accountId', ingested_at, event_id): equality + keyset
+    range + ORDER BY of the per-account query without a sort.
+
+List queries return every column, so no index can make them index-only; INCLUDE columns would copy
+most of the row into the index for no gain. The indexes above are ordered access paths, with the
+composite covering the one query that needs only keys (retention).
+
+Indexes are built/dropped CONCURRENTLY so the migration does not block ingestion.
+
+Revision ID: 183415943c60
+Revises: 9023bc42ede1
+Create Date: 2026-10-18 23:40:12.517730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '183415943c60'
+down_revision: Union[str, Sequence[str], None] = '9023bc42ede1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BRIN_INDEX = "brin_audit_events_ingested_at"
+TENANT_INDEX = "idx_audit_events_account_ingested_at_event_id"
+COMPOSITE_INDEX = "idx_audit_events_ingested_at_event_id"
+
+# 32 heap pages (256 KB) per range: small enough for selective retention/range scans,
+# still only a handful of index pages for a 200M-row table.
+BRIN_PAGES_PER_RANGE = 32
+
+
+def upgrade() -> None:
+    """Create BRIN + tenant list index, drop the single-column B-tree (the composite stays)."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {BRIN_INDEX} ON audit_events "
+            f"USING brin (ingested_at) WITH (pages_per_range = {BRIN_PAGES_PER_RANGE}, autosummarize = on)"
+        )
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {TENANT_INDEX} ON audit_events "
+            "((account->>'accountId'), ingested_at, event_id)"
+        )
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {COMPOSITE_INDEX} ON audit_events (ingested_at, event_id)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_audit_events_ingested_at")
+
+
+def downgrade() -> None:
+    """Back to the state after 68b6975b4233: the composite B-tree only."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {COMPOSITE_INDEX} ON audit_events (ingested_at, event_id)"
+        )
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {TENANT_INDEX}")
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {BRIN_INDEX}")
@@ -0,0 +1,45 @@
+"""create stream_outbox table
+
+Revision ID: 9023bc42ede1
+Revises: 68b6975b4233
+Create Date: 2026-10-18 22:21:29.142231
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9023bc42ede1'
+down_revision: Union[str, Sequence[str], None] = '68b6975b4233'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the transactional outbox used to relay new events to the stream bus."""
+    op.create_table('stream_outbox',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+    sa.Column('event_id', sa.UUID(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text("(NOW() AT TIME ZONE 'UTC')"), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Writing transaction (xid8, Postgres 13+). Ids are drawn before commit, so id order alone is not
+    # commit order; the relay only reads rows of finished transactions, in (txid, id) order.
+    op.execute("ALTER TABLE stream_outbox ADD COLUMN txid xid8 NOT NULL DEFAULT pg_current_xact_id()")
+    # Relay scans pending rows in that order; a partial index keeps that scan tiny.
+    op.create_index('ix_stream_outbox_pending', 'stream_outbox', ['txid', 'id'], unique=False,
+                    postgresql_where=sa.text('sent_at IS NULL'))
+    # Purge of relayed rows by age.
+    op.create_index('ix_stream_outbox_sent_at', 'stream_outbox', ['sent_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop the stream outbox."""
+    op.drop_index('ix_stream_outbox_sent_at', table_name='stream_outbox')
+    op.drop_index('ix_stream_outbox_pending', table_name='stream_outbox')
+    op.drop_table('stream_outbox')
@@ -0,0 +1,117 @@
+"""account and reporting service dimension tables
+
+Adds integer-keyed dimension tables and references from audit_events:
+  - accounts(id, account_id, account_name)        <- audit_events.account_key
+  - reporting_services(id, service_uuid)          <- audit_events.reporting_service_key
+
+The inline account/reporting_service columns become nullable: new rows store only the keys, existing
+rows keep their inline values until `python -m app.services.dimension_backfill` moves them over.
+Reads fall back to the inline values while a row has no key, so the API output does not change.
+
+Tenant list indexes: (account_key, ingested_at, event_id) for keyed rows. The full accountId
+expression index from 183415943c60 is replaced by the same index restricted to rows without a key:
+it only has to serve tenant lists over not-yet-backfilled rows, and empties as the backfill runs.
+
+Revision ID: be23ddcd8d77
+Revises: 183415943c60
+Create Date: 2026-10-18 22:32:21.900514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'be23ddcd8d77'
+down_revision: Union[str, Sequence[str], None] = '183415943c60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACCOUNT_KEY_INDEX = "idx_audit_events_account_key_ingested_at_event_id"
+LEGACY_ACCOUNT_INDEX = "idx_audit_events_legacy_account_ingested_at_event_id"
+EXPRESSION_ACCOUNT_INDEX = "idx_audit_events_account_ingested_at_event_id"  # from 183415943c60
+
+
+def upgrade() -> None:
+    """Create the dimension tables and key columns (no table rewrite on audit_events)."""
+    op.create_table('accounts',
+    sa.Column('id', sa.Integer(), sa.Identity(always=False), nullable=False),
+    sa.Column('account_id', sa.String(), nullable=False),
+    sa.Column('account_name', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id', 'account_name', name='uq_accounts_id_name')
+    )
+    op.create_index(op.f('ix_accounts_account_id'), 'accounts', ['account_id'], unique=False)
+    op.create_table('reporting_services',
+    sa.Column('id', sa.Integer(), sa.Identity(always=False), nullable=False),
+    sa.Column('service_uuid', sa.UUID(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('service_uuid')
+    )
+
+    # Nullable columns without defaults: metadata-only change, instant on a large table.
+    op.add_column('audit_events', sa.Column('account_key', sa.Integer(), nullable=True))
+    op.add_column('audit_events', sa.Column('reporting_service_key', sa.Integer(), nullable=True))
+    # NOT VALID: skip the full-table validation scan (every existing value is NULL anyway).
+    op.execute(
+        "ALTER TABLE audit_events ADD CONSTRAINT fk_audit_events_account_key "
+        "FOREIGN KEY (account_key) REFERENCES accounts (id) NOT VALID"
+    )
+    op.execute(
+        "ALTER TABLE audit_events ADD CONSTRAINT fk_audit_events_reporting_service_key "
+        "FOREIGN KEY (reporting_service_key) REFERENCES reporting_services (id) NOT VALID"
+    )
+    op.alter_column('audit_events', 'account', nullable=True)
+    op.alter_column('audit_events', 'reporting_service', nullable=True)
+
+    # Tenant list queries: keyed rows, and legacy rows until the backfill has given them keys
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {ACCOUNT_KEY_INDEX} "
+            "ON audit_events (account_key, ingested_at, event_id)"
+        )
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {LEGACY_ACCOUNT_INDEX} "
+            "ON audit_events ((account->>'accountId'), ingested_at, event_id) WHERE account_key IS NULL"
+        )
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {EXPRESSION_ACCOUNT_INDEX}")
+
+
+def downgrade() -> None:
+    """Copy dimension values back inline, then drop keys and dimension tables."""
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {ACCOUNT_KEY_INDEX}")
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {LEGACY_ACCOUNT_INDEX}")
+    op.execute(
+        """
+        UPDATE audit_events AS ae
+        SET account = json_build_object('accountId', a.account_id, 'accountName', a.account_name)
+        FROM accounts AS a
+        WHERE ae.account_key = a.id AND ae.account IS NULL
+        """
+    )
+    op.execute(
+        """
+        UPDATE audit_events AS ae
+        SET reporting_service = rs.service_uuid
+        FROM reporting_services AS rs
+        WHERE ae.reporting_service_key = rs.id AND ae.reporting_service IS NULL
+        """
+    )
+    op.alter_column('audit_events', 'reporting_service', nullable=False)
+    op.alter_column('audit_events', 'account', nullable=False)
+    op.drop_constraint('fk_audit_events_reporting_service_key', 'audit_events', type_='foreignkey')
+    op.drop_constraint('fk_audit_events_account_key', 'audit_events', type_='foreignkey')
+    op.drop_column('audit_events', 'reporting_service_key')
+    op.drop_column('audit_events', 'account_key')
+    op.drop_table('reporting_services')
+    op.drop_index(op.f('ix_accounts_account_id'), table_name='accounts')
+    op.drop_table('accounts')
+    # Legacy tenant lists by accountId again (state after 183415943c60)
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {EXPRESSION_ACCOUNT_INDEX} "
+            "ON audit_events ((account->>'accountId'), ingested_at, event_id)"
+        )
@@ -1,17 +1,47 @@
 # app/database.py
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.config import DATABASE_URL
+from app.config import DATABASE_URL, READ_REPLICA_URL, READINESS_DB_TIMEOUT_SECONDS
+from app.services.metrics import instrument_engine, instrumented_pool
+import math
 import os
 
 SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
 
 # createing the SQLAlchemy engine
-engine = create_engine(DATABASE_URL, echo=SQL_ECHO, future=True, pool_pre_ping=True)
+# (instrumented: query timings and pool checkout waits are exported on /metrics)
+engine = instrument_engine(
+    "primary",
+    create_engine(DATABASE_URL, echo=SQL_ECHO, future=True, pool_pre_ping=True, poolclass=instrumented_pool("primary")),
+)
 
 # creating a configured "Session" class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)    
 
+# Readiness probe engine (/ready): its own single connection, so the check never queues behind request
+# checkouts on an exhausted pool; checkout, connect and the query all give up after READINESS_DB_TIMEOUT_SECONDS.
+# Not an instrumented pool: probe waits must not feed the load shedder's pool_wait signal.
+probe_engine = create_engine(
+    DATABASE_URL,
+    echo=SQL_ECHO,
+    future=True,
+    pool_size=1,
+    max_overflow=0,
+    pool_timeout=READINESS_DB_TIMEOUT_SECONDS,
+    pool_pre_ping=True,
+    connect_args={
+        "connect_timeout": max(2, math.ceil(READINESS_DB_TIMEOUT_SECONDS)),  # libpq's minimum is 2s
+        "options": f"-c statement_timeout={int(READINESS_DB_TIMEOUT_SECONDS * 1000)}",
+    },
+)
+
+# Optional read replica (GET endpoints; see app/services/read_routing.py). None -> reads use the primary.
+read_engine = instrument_engine(
+    "replica",
+    create_engine(READ_REPLICA_URL, echo=SQL_ECHO, future=True, pool_pre_ping=True, poolclass=instrumented_pool("replica")),
+) if READ_REPLICA_URL else None
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine, future=True) if read_engine else None
+
 # Base class for ORM models
 Base = declarative_base()
 
@@ -21,4 +51,15 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get a read-replica session (None when no replica is configured)
+def get_read_db():
+    if ReadSessionLocal is None:
+        yield None
+        return
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
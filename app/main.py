@@ -1,39 +1,135 @@
 # app/main.py
 
+import asyncio
 from contextlib import asynccontextmanager
+import hmac
 import logging
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
-from app.database import engine
+from app.database import probe_engine
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.load_shedding import LoadSheddingMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
 from app.retention import RetentionService
 from app.routers import events, stream
-from app.config import RETENTION_INTERVAL_SECONDS
+from app.services.json_codec import CodecJSONResponse
+from app.services.load_shedding import get_admission_controller
+from app.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY as METRICS_REGISTRY
+from app.services.outbox_relay import OutboxRelay
+from app.services.profiling import get_sampler
+from app.services.queries import get_query_registry
+from app.services.read_routing import get_read_router
+from app.config import (
+    COMPRESSION_ENABLED,
+    METRICS_ENABLED,
+    PROFILING_SAMPLE_RATE,
+    PROFILING_SAMPLER_ENABLED,
+    PROFILING_TOKEN,
+    RETENTION_INTERVAL_SECONDS,
+    STREAM_OUTBOX_ENABLED,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 retention_service = RetentionService(RETENTION_INTERVAL_SECONDS)
+outbox_relay = OutboxRelay() if STREAM_OUTBOX_ENABLED else None
+admission_controller = get_admission_controller()  # None unless LOAD_SHED_ENABLED
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: start retention worker
+    # Startup: start retention worker (and the outbox relay, if enabled)
     await retention_service.start()
+    if outbox_relay is not None:
+        await outbox_relay.start()
+    if admission_controller is not None:
+        await admission_controller.start()
+    if PROFILING_SAMPLER_ENABLED:
+        get_sampler().start()
     try:
         yield
     finally:
-        # Shutdown: stop retention worker
+        # Shutdown: stop background workers (a running sampler writes its profile)
+        get_sampler().stop()
+        if admission_controller is not None:
+            await admission_controller.stop()
+        if outbox_relay is not None:
+            await outbox_relay.stop()
         await retention_service.stop()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=CodecJSONResponse)
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+if admission_controller is not None:
+    app.add_middleware(LoadSheddingMiddleware)  # outside compression, inside metrics: 503s are measured
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)  # added last = outermost: latency includes compression
+if PROFILING_TOKEN or PROFILING_SAMPLE_RATE > 0:
+    app.add_middleware(ProfilingMiddleware)  # opt-in: nothing is installed when profiling is off
 app.include_router(events.router)
 app.include_router(stream.router)
 
 @app.get("/health")
-def health_check():
+async def health_check():
+    # Liveness: answered on the event loop without a DB checkout or a threadpool slot, so an overloaded
+    # pool (which the load shedder is reacting to) cannot fail it and get the process restarted
+    return {"status": "ok"}
+
+def _probe_db() -> None:
+    with probe_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+@app.get("/ready")
+async def readiness_check():
+    # Readiness: DB reachability through the dedicated probe engine (short timeouts, see app/database.py).
+    # Run on the loop's default executor rather than the request threadpool, which may be saturated too.
     try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        return {"status": "ok", "db": "connected"}
+        await asyncio.to_thread(_probe_db)
     except SQLAlchemyError as e:
-        return {"status": "error", "db": str(e)}
+        return CodecJSONResponse({"status": "error", "db": str(e)}, status_code=503)
+    return {"status": "ok", "db": "connected"}
+
+@app.get("/__read_routing__")
+def read_routing_probe():
+    # Replica lag and counts of read routing decisions by reason (debug endpoint)
+    return get_read_router().stats()
+
+@app.get("/__queries__")
+def queries_probe():
+    # Per-statement call counts and timings of the prepared hot-path SQL (debug endpoint)
+    return get_query_registry().stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition of the in-process collectors (app/services/metrics.py)
+    return PlainTextResponse(METRICS_REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+def _require_profiling_token(request: Request) -> None:
+    # Profiler controls answer 404 unless PROFILING_TOKEN is configured and sent as X-Profile
+    if not PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get("X-Profile", ""), PROFILING_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+@app.post("/__profiler__/start")
+def profiler_start(request: Request, interval: Optional[float] = Query(None, gt=0, le=1.0)):
+    # Start the process-wide sampling profiler (app/services/profiling.py)
+    _require_profiling_token(request)
+    sampler = get_sampler()
+    if not sampler.start(interval):
+        raise HTTPException(status_code=409, detail="Profiler already running")
+    return sampler.stats()
+
+@app.post("/__profiler__/stop")
+def profiler_stop(request: Request):
+    # Stop the sampler and write its folded stacks under PROFILING_DIR
+    _require_profiling_token(request)
+    sampler = get_sampler()
+    path = sampler.stop()
+    if path is None:
+        raise HTTPException(status_code=409, detail="Profiler is not running")
+    return {**sampler.stats(), "file": path.name}
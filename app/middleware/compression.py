@@ -0,0 +1,198 @@
+# app/middleware/compression.py
+"""
+Accept-Encoding negotiated response compression (gzip, and zstd when `zstandard` is installed).
+
+Why:
+- Tenant-wide GET /events pulls and long-lived /stream connections are mostly repetitive JSON; they
+  compress 5-10x, which is the dominant cost on the wire.
+
+Design notes:
+- Pure ASGI middleware, so streaming responses are compressed incrementally:
+    * one compressor per response (i.e. per /stream connection), so later batches reuse the
+      dictionary built by earlier ones;
+    * every body chunk sent with more_body=True is flushed (gzip Z_SYNC_FLUSH / zstd block flush), so
+      each /stream batch is decodable by the client as soon as it arrives: no added latency.
+- Small complete responses (below COMPRESSION_MIN_BYTES, e.g. single events) are sent as-is: the
+  headers and CPU cost more than the bytes saved.
+- Large complete bodies are compressed in a worker thread so they do not stall the event loop.
+- Compressed responses keep a strong ETag per representation: the encoding is appended inside the
+  quotes ("...-gzip"); app/services/http_cache.etag_matches strips it again when revalidating.
+- Responses that already carry Content-Encoding, non-compressible content types, 204/304 and HEAD
+  requests are passed through untouched.
+"""
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import COMPRESSION_GZIP_LEVEL, COMPRESSION_MIN_BYTES, COMPRESSION_ZSTD_LEVEL
+
+try:  # optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+# Complete bodies at least this large are compressed off the event loop
+THREAD_MIN_BYTES = 1 << 20
+
+
+class _Compressor:
+    """Streaming compressor for one response."""
+
+    def __init__(self, encoding: str, level: int) -> None:
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+            self._sync = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 -> gzip container
+            self._sync = zlib.Z_SYNC_FLUSH
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress and flush so everything sent so far can be decoded."""
+        return self._obj.compress(data) + self._obj.flush(self._sync)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush()
+
+
+def available_encodings() -> List[str]:
+    """Supported codecs in server preference order (used to break q-value ties)."""
+    return (["zstd"] if zstandard is not None else []) + ["gzip"]
+
+
+def negotiate(accept_encoding: Optional[str], supported: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Pick a content coding from Accept-Encoding (RFC 9110 q-values, "*" wildcard, q=0 excludes).
+    None -> send identity.
+    """
+    if not accept_encoding:
+        return None
+    supported = available_encodings() if supported is None else supported
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best: Tuple[float, int, Optional[str]] = (0.0, 0, None)
+    for rank, coding in enumerate(supported):
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > 0 and (q, -rank) > best[:2]:
+            best = (q, -rank, coding)
+    return best[2]
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        min_size: int = COMPRESSION_MIN_BYTES,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        zstd_level: int = COMPRESSION_ZSTD_LEVEL,
+    ) -> None:
+        self.app = app
+        self.min_size = min_size
+        self.levels = {"gzip": gzip_level, "zstd": zstd_level}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        encoding = negotiate(headers.get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        response = _CompressedResponse(send, encoding, self.levels[encoding], self.min_size, headers.get("if-none-match", ""))
+        await response.run(self.app, scope, receive)
+
+
+class _CompressedResponse:
+    """Per-request send wrapper: holds the start message until the first body chunk decides the path."""
+
+    def __init__(self, send: Send, encoding: str, level: int, min_size: int, if_none_match: str) -> None:
+        self.send = send
+        self.encoding = encoding
+        self.level = level
+        self.min_size = min_size
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+        self.if_none_match = if_none_match
+
+    async def run(self, app: ASGIApp, scope: Scope, receive: Receive) -> None:
+        await app(scope, receive, self.wrapped_send)
+
+    async def wrapped_send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            if message["status"] == 304:
+                message = self._not_modified(message)
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self.compressor is None:
+            # First body chunk: a small complete body goes out uncompressed
+            if not more_body and len(body) < self.min_size:
+                self.passthrough = True
+                headers = MutableHeaders(raw=list(self.start["headers"]))
+                headers.add_vary_header("Accept-Encoding")
+                await self.send({**self.start, "headers": headers.raw})
+                await self.send(message)
+                return
+            self.compressor = _Compressor(self.encoding, self.level)
+            await self.send(self._compressed_start())
+
+        if more_body:
+            await self.send({"type": "http.response.body", "body": self.compressor.chunk(body), "more_body": True})
+            return
+        compress: Callable[[bytes], bytes] = self.compressor.finish
+        data = await anyio.to_thread.run_sync(compress, body) if len(body) >= THREAD_MIN_BYTES else compress(body)
+        await self.send({"type": "http.response.body", "body": data, "more_body": False})
+
+    def _compressed_start(self) -> Message:
+        headers = MutableHeaders(raw=list(self.start["headers"]))
+        headers["Content-Encoding"] = self.encoding
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and etag.endswith('"'):
+            headers["ETag"] = self._encoded_etag(etag)
+        return {**self.start, "headers": headers.raw}
+
+    def _not_modified(self, message: Message) -> Message:
+        # The client revalidated the compressed representation: confirm with that ETag (not the base one)
+        headers = MutableHeaders(raw=list(message["headers"]))
+        etag = headers.get("etag")
+        if etag and etag.endswith('"') and self._encoded_etag(etag) in self.if_none_match:
+            headers["ETag"] = self._encoded_etag(etag)
+            headers.add_vary_header("Accept-Encoding")
+        return {**message, "headers": headers.raw}
+
+    def _encoded_etag(self, etag: str) -> str:
+        return f'{etag[:-1]}-{self.encoding}"'
@@ -0,0 +1,50 @@
+# app/middleware/load_shedding.py
+"""
+Admission control in front of the routers (see app/services/load_shedding.py).
+
+Notes:
+- Runs before routing, body parsing and DB sessions: a shed request costs one classification and a
+  small 503 (Retry-After) written directly.
+- Counts admitted requests as in flight until the app returns; /stream connections are long-lived
+  and tracked by the stream manager instead, so they are admitted (or shed) but not counted.
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.services import json_codec
+from app.services.load_shedding import AdmissionController, classify, get_admission_controller
+
+SHED_RETRY_AFTER_SECONDS = "5"
+_SHED_BODY = json_codec.dumps({"detail": "Service overloaded, retry later"})
+
+
+class LoadSheddingMiddleware:
+    def __init__(self, app: ASGIApp, controller: AdmissionController = None) -> None:
+        self.app = app
+        self.controller = controller or get_admission_controller()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        priority = classify(scope["method"], path, scope.get("query_string", b""))
+        if not self.controller.admit(priority):
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_SHED_BODY)).encode()),
+                    (b"retry-after", SHED_RETRY_AFTER_SECONDS.encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _SHED_BODY})
+            return
+        if path == "/stream":
+            await self.app(scope, receive, send)
+            return
+        self.controller.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.in_flight -= 1
@@ -0,0 +1,47 @@
+# app/middleware/metrics.py
+"""
+Per-route request latency for /metrics (audit_http_request_duration_seconds).
+
+Notes:
+- Labelled by the matched route template (e.g. /events/{event_id}), never the raw path, so label
+  cardinality stays bounded; unmatched paths share route="unmatched".
+- Measures time to the response start: handler, serialization and compression for regular responses
+  (installed outermost), and the admission/setup time for /stream (whose lifetime is not a latency).
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.metrics import HTTP_REQUEST_SECONDS
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        responded = False
+
+        async def timed_send(message: Message) -> None:
+            nonlocal responded
+            if message["type"] == "http.response.start" and not responded:
+                responded = True
+                _observe(scope, message["status"], time.perf_counter() - started)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        except Exception:
+            if not responded:
+                _observe(scope, 500, time.perf_counter() - started)
+            raise
+
+
+def _observe(scope: Scope, status: int, elapsed: float) -> None:
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    HTTP_REQUEST_SECONDS.labels(scope["method"], path, str(status)).observe(elapsed)
@@ -0,0 +1,82 @@
+# app/middleware/profiling.py
+"""
+Per-request profiles (app/services/profiling.RequestProfile), requested with a header or sampled.
+
+Notes:
+- Only installed when PROFILING_TOKEN or PROFILING_SAMPLE_RATE is set (app/main.py), so an
+  unconfigured service pays nothing.
+- `X-Profile: <PROFILING_TOKEN>` profiles that request; the response carries X-Profile-File with the
+  name of the .folded file written under PROFILING_DIR. Sampled requests are written silently.
+- Long-lived and scrape endpoints are never profiled: a /stream connection would hold the single
+  profile slot for its whole lifetime.
+"""
+import hmac
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import PROFILING_DIR, PROFILING_SAMPLE_RATE, PROFILING_TOKEN
+from app.services.profiling import RequestProfile
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_FILE_HEADER = "X-Profile-File"
+SKIP_PATHS = ("/stream", "/metrics")
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: str = PROFILING_TOKEN,
+        sample_rate: float = PROFILING_SAMPLE_RATE,
+        directory: str = PROFILING_DIR,
+    ) -> None:
+        self.app = app
+        self.token = token.encode("latin-1")
+        self.sample_rate = sample_rate
+        self.directory = Path(directory)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
+        requested = self._requested(scope)
+        if not requested and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile.start()
+        if profile is None:  # another request is being profiled
+            await self.app(scope, receive, send)
+            return
+
+        name = _file_name(scope)
+
+        async def send_with_file(message: Message) -> None:
+            if requested and message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_FILE_HEADER, name)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_file)
+        finally:
+            profile.stop()
+            profile.write(self.directory / name)
+
+    def _requested(self, scope: Scope) -> bool:
+        if not self.token:
+            return False
+        for key, value in scope["headers"]:
+            if key == PROFILE_HEADER:
+                return hmac.compare_digest(value, self.token)
+        return False
+
+
+def _file_name(scope: Scope) -> str:
+    path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_")[:60] or "root"
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    return f"request-{stamp}-{scope['method']}-{path}-{uuid.uuid4().hex[:8]}.folded"
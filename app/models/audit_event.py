@@ -1,18 +1,20 @@
 # app/models/audit_event.py
 
 import uuid
-from sqlalchemy import Column, String, DateTime, Enum, JSON
+from sqlalchemy import Column, String, DateTime, Enum, JSON, Integer, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 from app.database import Base
+from app.services.ids import new_event_id
+from app.models.dimensions import Account, ReportingService  # noqa: F401 (FK targets)
 
 
 class AuditEvent(Base):
     __tablename__ = "audit_events"
 
     # Primary key for the event, generated on ingestion (Primary Key count as nullable=True)
-    event_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_id = Column(UUID(as_uuid=True), primary_key=True, default=new_event_id)  # EVENT_ID_MODE
 
     # Timestamp when the event was ingested into the system
     ingested_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -23,8 +25,13 @@ class AuditEvent(Base):
     # Type of the log (Login, System, Management)
     log_type = Column(Enum("Login", "System", "Management", name="logtype_enum"), nullable=False)
 
-    # UUID of the service that reported this event
-    reporting_service = Column(UUID(as_uuid=True), nullable=False)
+    # UUID of the service that reported this event.
+    # Legacy inline value: rows written since the dimension tables existed leave it NULL and use
+    # reporting_service_key instead (see app/services/dimensions.py).
+    reporting_service = Column(UUID(as_uuid=True), nullable=True)
+
+    # Integer key into reporting_services (4 bytes instead of a 16-byte UUID per row)
+    reporting_service_key = Column(Integer, ForeignKey("reporting_services.id"), nullable=True)
 
     # Log level (informational, warning, error)
     log_level = Column(Enum("informational", "warning", "error", name="loglevel_enum"), nullable=False)
@@ -56,5 +63,9 @@ class AuditEvent(Base):
     # Optional flexible metadata (stored as JSONB)
     metadata_ = Column(JSONB, nullable=True)
 
-    # Account details as a JSON object (must include accountId, accountName)
-    account = Column(JSON, nullable=False)
+    # Account details as a JSON object (must include accountId, accountName).
+    # Legacy inline value: NULL on rows that reference the accounts dimension via account_key.
+    account = Column(JSON, nullable=True)
+
+    # Integer key into accounts (replaces the repeated account JSON)
+    account_key = Column(Integer, ForeignKey("accounts.id"), nullable=True)
@@ -0,0 +1,31 @@
+# app/models/dimensions.py
+
+from sqlalchemy import Column, Integer, Identity, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+
+class Account(Base):
+    __tablename__ = "accounts"
+    # One row per distinct (accountId, accountName) pair seen at ingest, so an event always reads back
+    # the name it was ingested with, even if a tenant is later renamed.
+    __table_args__ = (UniqueConstraint("account_id", "account_name", name="uq_accounts_id_name"),)
+
+    # Compact surrogate key referenced by audit_events.account_key
+    id = Column(Integer, Identity(always=False), primary_key=True)
+
+    # Tenant identifier (API: account.accountId)
+    account_id = Column(String, nullable=False, index=True)
+
+    # Tenant display name (API: account.accountName)
+    account_name = Column(String, nullable=False)
+
+
+class ReportingService(Base):
+    __tablename__ = "reporting_services"
+
+    # Compact surrogate key referenced by audit_events.reporting_service_key
+    id = Column(Integer, Identity(always=False), primary_key=True)
+
+    # UUID of the service (API: reportingService)
+    service_uuid = Column(UUID(as_uuid=True), nullable=False, unique=True)
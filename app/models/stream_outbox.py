@@ -0,0 +1,27 @@
+# app/models/stream_outbox.py
+
+from sqlalchemy import Column, BigInteger, Identity, Text, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from app.database import Base
+
+
+class StreamOutbox(Base):
+    __tablename__ = "stream_outbox"
+
+    # Sequence drawn at insert (not at commit); the relay publishes pending rows in (txid, id) order.
+    # txid (xid8, DEFAULT pg_current_xact_id()) is filled by the database and only read by the relay,
+    # so it is not mapped here.
+    id = Column(BigInteger, Identity(always=False), primary_key=True)
+
+    # Event this row announces (for diagnostics; the payload is self-contained)
+    event_id = Column(UUID(as_uuid=True), nullable=False)
+
+    # Compact JSON of the enriched event, exactly as published to the stream
+    payload = Column(Text, nullable=False)
+
+    # When the row was written (same transaction as the event insert)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # When the relay published it (NULL = pending)
+    sent_at = Column(DateTime, nullable=True)
@@ -2,28 +2,115 @@
 
 import asyncio
 import logging
+import time
 from contextlib import suppress
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, Sequence
+from datetime import datetime
 from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
 from app.database import engine
-from app.config import (RETENTION_INTERVAL_SECONDS, RETENTION_YEARS, RETENTION_DELETE_LIMIT)
-from app.services.events_service import cache_delete_event  # evict cache entries for deleted IDs
+from app.config import (
+    RETENTION_INTERVAL_SECONDS, RETENTION_YEARS, RETENTION_DELETE_LIMIT,
+    RETENTION_TARGET_BATCH_SECONDS, RETENTION_MIN_BATCH, RETENTION_MAX_BATCH,
+    RETENTION_PAUSE_FACTOR, RETENTION_MAX_PAUSE_SECONDS, RETENTION_CYCLE_BUDGET_SECONDS,
+    RETENTION_LEADER_ELECTION, RETENTION_LEADER_POLL_SECONDS,
+    RETENTION_ARCHIVE_ENABLED,
+)
+from app.services.archive import SegmentArchive
+from app.services.event_store import get_event_store
+from app.services.events_service import cache_delete_events  # evict cache entries for deleted IDs
+from app.services.leader_election import AdvisoryLockLeader
+from app.services.metrics import RETENTION_BATCH_SECONDS, RETENTION_BATCH_SIZE, RETENTION_DELETED
+from app.services.sharding import get_shard_router
 
 logger = logging.getLogger(__name__)
 
+# Emit an INFO progress line at most this often during a long cycle.
+PROGRESS_LOG_INTERVAL_SECONDS = 30.0
+
+# Advisory lock name shared by every worker/replica competing to run retention.
+RETENTION_LOCK_NAME = "audit-events:retention"
+
+
+def retention_cutoff(now: datetime | None = None) -> datetime:
+    """
+    Events ingested before this (naive UTC) are past retention: now minus RETENTION_YEARS calendar
+    years; Feb 29 maps to Feb 28, as with Postgres interval arithmetic.
+    """
+    now = now or datetime.utcnow()
+    try:
+        return now.replace(year=now.year - RETENTION_YEARS)
+    except ValueError:
+        return now.replace(year=now.year - RETENTION_YEARS, day=28)
+
+
+def database_retention_cutoff(db: Session) -> datetime:
+    """
+    retention_cutoff on the database's clock: NOW() minus RETENTION_YEARS, as the retention SQL has
+    always computed it, so app hosts with a drifting clock agree on which rows are expired.
+    """
+    return db.execute(
+        text("SELECT (NOW() AT TIME ZONE 'UTC') - make_interval(years => :years)"), {"years": RETENTION_YEARS}
+    ).scalar_one()
+
+
+@dataclass
+class RetentionProgress:
+    """Progress of the current (or last) retention cycle."""
+    started_at: float = field(default_factory=time.time)
+    batches: int = 0
+    deleted: int = 0
+    batch_size: int = 0
+    last_batch_seconds: float = 0.0
+    last_pause_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+    budget_exhausted: bool = False
+    finished: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
 class RetentionService:
-    """Periodic background worker that deletes old events based on the retention policy."""
+    """
+    Periodic background worker that deletes old events based on the retention policy.
+
+    With leader election enabled (default), every worker process runs this loop, but only the
+    holder of the retention advisory lock does any retention DB work. Followers just re-check
+    leadership every RETENTION_LEADER_POLL_SECONDS, so a dead leader is replaced within that time.
+    """
 
-    def __init__(self, interval_seconds: int | None = None) -> None:
+    def __init__(
+        self,
+        interval_seconds: int | None = None,
+        leader: AdvisoryLockLeader | None = None,
+        leader_election: bool = RETENTION_LEADER_ELECTION,
+        leader_poll_seconds: float = RETENTION_LEADER_POLL_SECONDS,
+        archive: SegmentArchive | None = None,
+        engines: Sequence[Engine] | None = None,
+    ) -> None:
         # interval_seconds: how often to run the retention cycle (e.g., every hour)
         self.interval_seconds = interval_seconds or RETENTION_INTERVAL_SECONDS
+        # leader: None + leader_election=False -> every instance runs retention (single-node setups)
+        self.leader = leader or (AdvisoryLockLeader(RETENTION_LOCK_NAME) if leader_election else None)
+        self.leader_poll_seconds = leader_poll_seconds
+        # archive: when set, every batch is copied to cold storage (and fsynced) before it is deleted
+        self.archive = archive or (SegmentArchive() if RETENTION_ARCHIVE_ENABLED else None)
+        # engines: databases holding audit_events (every shard when sharding is enabled)
+        shards = get_shard_router()
+        self.engines = list(engines) if engines else (shards.engines if shards is not None else [engine])
         self._task: asyncio.Task | None = None
         self._stop = asyncio.Event()
+        # Adapted batch size carries over between cycles.
+        self.batch_size = min(max(RETENTION_DELETE_LIMIT, RETENTION_MIN_BATCH), RETENTION_MAX_BATCH)
+        self.progress = RetentionProgress(batch_size=self.batch_size, finished=True)
 
     async def start(self) -> None:
         """Start the background worker task."""
         if self._task is not None:
             return  # Already started
-        self._stop.clear()
+        self._stop = asyncio.Event()  # fresh event: bound to the loop that runs this start()
         logger.info(
             "Starting RetentionService worker (interval=%s sec, years=%s)...",
             self.interval_seconds,
@@ -45,17 +132,41 @@ class RetentionService:
                     await self._task
             finally:
                 self._task = None
+        if self.leader is not None:
+            await asyncio.to_thread(self.leader.release)
         logger.info("RetentionService worker stopped.")
 
+    async def _ensure_leader(self) -> bool:
+        """True if this instance should run retention now (always True without leader election)."""
+        if self.leader is None:
+            return True
+        try:
+            return await asyncio.to_thread(self.leader.ensure)
+        except Exception:
+            logger.exception("Retention leader election failed; will retry.")
+            return False
+
     async def _run(self) -> None:
         """Main loop: run retention cycle periodically until stop is requested."""
         logger.info("RetentionService loop started.")
         try:
             while not self._stop.is_set():
+                if not await self._ensure_leader():
+                    # Follower: no retention DB work, just wait and re-check leadership.
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), timeout=self.leader_poll_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
                 try:
                     deleted_total = await self._retention_cycle()
                     if deleted_total > 0:
-                        logger.info("Retention cycle finished. Deleted rows: %s", deleted_total)
+                        p = self.progress
+                        logger.info(
+                            "Retention cycle finished. Deleted rows: %s (batches=%s, batch_size=%s, %.1fs%s)",
+                            deleted_total, p.batches, p.batch_size, p.elapsed_seconds,
+                            ", budget exhausted" if p.budget_exhausted else "",
+                        )
                     else:
                         logger.debug("Retention cycle finished. Deleted rows: 0")
                 except Exception:
@@ -68,57 +179,125 @@ class RetentionService:
             logger.info("RetentionService loop exiting.")
 
     async def _retention_cycle(self) -> int:
-        """Delete old events in batches until fewer than limit were deleted."""
-        return await asyncio.to_thread(self._delete_until_empty)
-
-    def _delete_until_empty(self) -> int:
-        """Synchronous part that talks to the DB; runs inside a worker thread."""
-        deleted_total = 0
-        while True:
-            rows = self._delete_one_batch(limit=RETENTION_DELETE_LIMIT)
-            deleted_total += rows
-            if rows < RETENTION_DELETE_LIMIT:
+        """
+        Delete old events in adaptively sized, throttled batches.
+
+        - Batch size is steered toward RETENTION_TARGET_BATCH_SECONDS per batch.
+        - Between batches the worker pauses in proportion to the last batch duration, so a slow
+          (loaded) database gets proportionally more breathing room.
+        - The cycle stops after RETENTION_CYCLE_BUDGET_SECONDS; the rest waits for the next cycle.
+        """
+        progress = RetentionProgress(batch_size=self.batch_size)
+        self.progress = progress
+        started = time.monotonic()
+        last_report = started
+
+        while not self._stop.is_set():
+            limit = self.batch_size
+            t0 = time.monotonic()
+            rows = await asyncio.to_thread(self._delete_one_batch, limit)
+            duration = time.monotonic() - t0
+
+            RETENTION_BATCH_SECONDS.observe(duration)
+            RETENTION_DELETED.inc(rows)
+            progress.batches += 1
+            progress.deleted += rows
+            progress.last_batch_seconds = round(duration, 4)
+            progress.elapsed_seconds = round(time.monotonic() - started, 3)
+
+            if rows < limit:
+                break  # backlog drained
+            if RETENTION_CYCLE_BUDGET_SECONDS and progress.elapsed_seconds >= RETENTION_CYCLE_BUDGET_SECONDS:
+                progress.budget_exhausted = True
+                logger.info(
+                    "Retention cycle budget (%ss) exhausted after %s rows; continuing next cycle.",
+                    RETENTION_CYCLE_BUDGET_SECONDS, progress.deleted,
+                )
                 break
-        return deleted_total
+
+            self.batch_size = progress.batch_size = self._next_batch_size(limit, duration)
+            RETENTION_BATCH_SIZE.set(self.batch_size)
+            pause = self._pause_after(duration)
+            progress.last_pause_seconds = round(pause, 4)
+
+            if time.monotonic() - last_report >= PROGRESS_LOG_INTERVAL_SECONDS:
+                last_report = time.monotonic()
+                logger.info(
+                    "Retention progress: deleted=%s batches=%s batch_size=%s last_batch=%.3fs pause=%.3fs elapsed=%.1fs",
+                    progress.deleted, progress.batches, progress.batch_size,
+                    duration, pause, progress.elapsed_seconds,
+                )
+            if pause > 0:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=pause)
+                except asyncio.TimeoutError:
+                    pass
+
+        progress.elapsed_seconds = round(time.monotonic() - started, 3)
+        progress.finished = True
+        return progress.deleted
+
+    @staticmethod
+    def _next_batch_size(limit: int, duration: float) -> int:
+        """Scale the batch toward the target duration (at most x2 growth per step), within bounds."""
+        if duration <= 0:
+            factor = 2.0
+        else:
+            factor = min(2.0, RETENTION_TARGET_BATCH_SECONDS / duration)
+        return int(min(max(limit * factor, RETENTION_MIN_BATCH), RETENTION_MAX_BATCH))
+
+    @staticmethod
+    def _pause_after(duration: float) -> float:
+        """
+        Pause proportional to the last batch; batches slower than the target (a loaded DB)
+        are penalized quadratically so the worker backs off quickly.
+        """
+        pause = RETENTION_PAUSE_FACTOR * duration
+        if RETENTION_TARGET_BATCH_SECONDS > 0 and duration > RETENTION_TARGET_BATCH_SECONDS:
+            pause *= duration / RETENTION_TARGET_BATCH_SECONDS
+        return min(pause, RETENTION_MAX_PAUSE_SECONDS)
 
     def _delete_one_batch(self, limit: int) -> int:
         """
-        Delete up to `limit` old rows and return the number of rows deleted.
+        Delete up to `limit` old rows from each database (shard) and return the number of rows deleted.
         Also evict those event IDs from the in-process cache.
         Safe for concurrent runs thanks to SKIP LOCKED and batching.
+
+        The cycle treats a total below `limit` as "backlog drained": that only happens when no shard
+        returned a full batch.
         """
-        sql = text(
-            """
-            WITH victims AS (
-                SELECT event_id
-                FROM audit_events
-                WHERE ingested_at < (NOW() AT TIME ZONE 'UTC') - (:years || ' years')::interval
-                ORDER BY ingested_at
-                FOR UPDATE SKIP LOCKED
-                LIMIT :limit
-            )
-            DELETE FROM audit_events AS ae
-            USING victims
-            WHERE ae.event_id = victims.event_id
-            RETURNING ae.event_id;
-            """
-        )
-        deleted_ids: list[str] = []
-        with engine.begin() as conn:
-            result = conn.execute(sql, {"years": str(RETENTION_YEARS), "limit": limit})
-            rows = result.fetchall()  # rows contain (event_id,)
-            deleted_ids = [r[0] for r in rows]
-
-        # Evict deleted IDs from cache so GET /events/{id} will return 404 immediately.
-        for eid in deleted_ids:
+        return sum(self._delete_batch_on(db_engine, limit) for db_engine in self.engines)
+
+    def _delete_batch_on(self, db_engine: Engine, limit: int) -> int:
+        """
+        One batch on one database, through the event store (app/services/event_store.py).
+
+        With an archive, the victims are written to a durable (fsynced) segment before the delete
+        commits. A crash in between leaves the rows in place; the next batch archives them again
+        (lookup returns the first copy), so nothing is ever lost.
+        """
+        archive = self.archive.write_segment if self.archive is not None else None
+        with Session(db_engine) as db:
+            store = get_event_store(db)
+            # Database-backed stores use the database clock; only the memory engine uses this host's
+            cutoff = database_retention_cutoff(db) if store.in_database else retention_cutoff()
+            deleted_ids = store.delete_older_than(cutoff, limit, before_delete=archive)
+            db.commit()
+
+        return self._after_delete(deleted_ids)
+
+    def _after_delete(self, deleted_ids: list) -> int:
+        """Post-commit bookkeeping shared by both batch variants; returns the number of rows deleted."""
+        # Evict deleted IDs from cache (in bulk) so GET /events/{id} will return 404 immediately.
+        if deleted_ids:
             try:
-                cache_delete_event(eid)
+                cache_delete_events(deleted_ids)
             except Exception:
-                logger.exception("Failed to evict event_id %s from cache", eid)
+                logger.exception("Failed to evict %s deleted event_ids from cache", len(deleted_ids))
 
-        # Quieter logs: INFO only when something was actually deleted.
+        # Quieter logs: per-batch counts at DEBUG; cycle progress/summary is logged by the loop.
         if len(deleted_ids) > 0:
-            logger.info("Retention batch deleted rows: %s", len(deleted_ids))
+            logger.debug("Retention batch deleted rows: %s", len(deleted_ids))
             logger.debug("Retention batch deleted event_ids: %s", deleted_ids)
         else:
             logger.debug("Retention batch deleted rows: 0")
@@ -2,22 +2,39 @@
 
 import logging
 from pathlib import Path
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
-from pydantic import UUID4
 from sqlalchemy.orm import Session
-from uuid import uuid4
+from uuid import UUID
 from datetime import datetime, timezone
 import json
+import math
+import time
+from fastapi.concurrency import run_in_threadpool
 from jsonschema import Draft7Validator, FormatChecker
 
-from app.models.audit_event import AuditEvent
-from app.schemas.audit_event import AuditEventCreate, AuditEventRead
-from app.services.events_service import list_events as svc_list_events
-from app.database import get_db 
+from app.config import LIST_MAX_PAGE_SIZE, STREAM_OUTBOX_ENABLED
+from app.models.stream_outbox import StreamOutbox
+from app.schemas.audit_event import AuditEventCreate, AuditEventRead, EventLookupRequest
+from app.services.events_service import InvalidCursorError, encode_cursor, list_events as svc_list_events
+from app.database import get_db, get_read_db
 from app.services.events_service import cache_put_event, get_event_by_id as svc_get_event_by_id
-from app.services.stream_bus import get_stream_bus
+from app.services.events_service import get_events_by_ids as svc_get_events_by_ids, get_events_by_ids_sharded as svc_get_events_by_ids_sharded
+from app.services.events_service import get_event_by_id_sharded as svc_get_event_by_id_sharded, list_events_sharded as svc_list_events_sharded
+from app.services.event_store import get_event_store
+from app.services.http_cache import (
+    IMMUTABLE_CACHE_CONTROL, PAGE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL,
+    cache_headers, etag_matches, event_etag, page_etag,
+)
+from app.services.ids import new_event_id
+from app.services.rate_limit import RateLimitExceeded, get_ingest_scheduler, get_rate_limiter, rate_limit_keys
+from app.services.metrics import timed_publish
+from app.services import json_codec
+from app.services.json_codec import CodecJSONResponse
+from app.services.sharding import get_shard_router, with_shard_hint
+from app.services.read_routing import CONSISTENCY_HEADER, READ_AFTER_HEADER, REASON_MISS_FALLBACK, get_read_router
+from app.services.stream_bus import TransactionalBus, get_stream_bus
 
 
 # Use a fixed prefix so routes live under /events
@@ -32,29 +49,40 @@ with schema_path.open("r", encoding="utf-8") as f:
 json_validator = Draft7Validator(audit_event_schema, format_checker=FormatChecker())
 
 @router.post("")
-async def create_event(request: Request, db: Session = Depends(get_db)):
+async def create_event(request: Request, http_response: Response, db: Session = Depends(get_db)):
     """
     POST /events
     Validates the incoming audit event against the JSON schema, enriches it
-    with eventId (UUID v4) and ingestedAt (UTC, ISO8601 'Z'), persists to the DB,
+    with eventId (UUID v4, or time-ordered v7 per EVENT_ID_MODE) and ingestedAt (UTC, ISO8601 'Z'), persists to the DB,
     and returns the immutable enriched JSON object.
 
     Status codes:
       - 200: Valid, persisted, returns the enriched event
       - 400: JSON schema validation failed (validationErrors list)
       - 422: Invalid request body (e.g., not JSON) handled by FastAPI
+      - 429: account / reportingService over its rate limit, or the tenant's ingest queue is full (Retry-After)
 
     Design notes:
-      - Validation runs BEFORE DB I/O to avoid unnecessary round-trips.
+      - Validation runs BEFORE DB I/O to avoid unnecessary round-trips; rate limits run before validation.
       - We return the exact immutable shape used across the API contract.
-      - eventId is always UUID v4; ingestedAt uses ISO8601 with 'Z' for UTC.
+      - eventId is a UUID (v4 by default, v7 with EVENT_ID_MODE=uuid7); ingestedAt uses ISO8601 with 'Z' for UTC.
     """
 
     # Step 1: Parse raw JSON body
     try:
-        payload = await request.json()
+        payload = json_codec.loads(await request.body())
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid JSON format")
+
+    # Step 1b: Rate limits per account.accountId / reportingService (app/services/rate_limit.py),
+    # before the comparatively expensive schema validation
+    account_id, reporting_service = rate_limit_keys(payload)
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        try:
+            await limiter.check(account_id, reporting_service)
+        except RateLimitExceeded as ex:
+            raise _too_many_requests(ex)
     
     # Step 2: Validate using JSON Schema
     # "If invalid, responds with 400 Bad Request and a JSON list of validation errors."
@@ -69,92 +97,250 @@ async def create_event(request: Request, db: Session = Depends(get_db)):
     event_data = AuditEventCreate(**payload)
 
     # Step 4: Enrich with internal fields
-    event_id = uuid4() # Generate new UUIDv4 for the event
+    event_id = new_event_id() # UUIDv4, or time-ordered UUIDv7 (EVENT_ID_MODE)
+    shards = get_shard_router()
+    shard = None
+    if shards is not None:
+        # Sharded: place the event on its tenant's shard and record the shard in the ID (routes GET by id)
+        shard = shards.shard_for_account(event_data.account.accountId)
+        event_id = with_shard_hint(event_id, shard)
     ingested_at = datetime.now(timezone.utc) # Current UTC time for when the event is ingested
 
-    event = AuditEvent(
-        event_id=event_id,
-        ingested_at=ingested_at,
-        time=event_data.time,
-        log_type=event_data.logType,
-        reporting_service=event_data.reportingService,
-        log_level=event_data.logLevel,
-        activity_type=event_data.activityType,
-        identity_type=event_data.identityType,
-        user=event_data.user.model_dump(),
-        action=event_data.action,
-        message=event_data.message,
-        ip_address=str(event_data.ipAddress) if event_data.ipAddress else None,
-        error_code=event_data.errorCode,
-        metadata_=event_data.metadata,
-        account=event_data.account.model_dump(),
-    )
-
-    # Step 5: Save to database
-    db.add(event)
-    db.commit()
-    db.refresh(event)  # Load auto-generated fields (not neccesary now but good for extanding more fields)
-
-    # Ensure ingestedAt is emitted in UTC ISO8601 with 'Z'
-    ing = event.ingested_at
-    if ing.tzinfo is None:
-        ing = ing.replace(tzinfo=timezone.utc)
-    else:
-        ing = ing.astimezone(timezone.utc)
-    ingested_at_iso = ing.isoformat(timespec="microseconds").replace("+00:00", "Z")
+    # Ensure ingestedAt is emitted in UTC ISO8601 with 'Z' (built before commit so that a
+    # transactional bus can publish it inside the insert transaction)
+    ingested_at_iso = ingested_at.isoformat(timespec="microseconds").replace("+00:00", "Z")
 
-    # Step 6: Prepare the response
+    # Step 5: Prepare the response
     response = {
-        "eventId": str(event.event_id),
+        "eventId": str(event_id),
         "ingestedAt": ingested_at_iso,
         **payload
     }
-    cache_put_event(event.event_id, response)
+
+    # Step 6: Save through the event store (app/services/event_store.py). With Postgres the stream
+    # hand-off happens in the same transaction when possible:
+    #   - outbox enabled: write an outbox row; the background relay publishes it
+    #   - transactional bus (e.g. pgnotify): publish inside the transaction
+    # The store gets the validated model (parsed timestamps, normalized e-mail), not the raw payload:
+    # e.g. a lowercase RFC 3339 "t"/"z" passes validation but is not ISO text fromisoformat accepts.
+    stored = {**event_data.model_dump(), "eventId": event_id, "ingestedAt": ingested_at}
+    bus = get_stream_bus()
+
+    def save() -> bool:
+        if shard is not None:
+            with shards.session(shard) as shard_db:
+                return _save_event(shard_db, event_id, stored, response, bus)
+        return _save_event(db, event_id, stored, response, bus)
+
+    # The save is blocking DB work (dimension key resolution on a cache miss, insert, commit), so it
+    # runs in the threadpool. With INGEST_WRITE_CONCURRENCY the writes are also bounded, and when the
+    # write slots are saturated tenants take turns for them (a flooding tenant queues behind itself).
+    scheduler = get_ingest_scheduler()
+    if scheduler is None:
+        handed_off = await run_in_threadpool(save)
+    else:
+        try:
+            async with scheduler.slot(event_data.account.accountId):
+                handed_off = await run_in_threadpool(save)
+        except RateLimitExceeded as ex:
+            raise _too_many_requests(ex)
+    cache_put_event(event_id, response)
+    # Read-your-writes token: clients echo it as X-Read-After so their next GETs avoid a lagging replica
+    http_response.headers[READ_AFTER_HEADER] = str(int(time.time() * 1000))
 
     # Step 7: Publish to stream bus (if configured)
-    try:
-        bus = get_stream_bus()
-        await bus.publish(response)  # publish only after successful commit
-        logging.getLogger(__name__).debug("published to stream_bus: %s", response.get("eventId"))
-    except Exception as ex:
-        logging.getLogger(__name__).exception("Failed to publish event to stream: %s", ex)
+    if not handed_off:
+        try:
+            with timed_publish(bus, "publish"):
+                await bus.publish(response)  # publish only after successful commit
+            logging.getLogger(__name__).debug("published to stream_bus: %s", response.get("eventId"))
+        except Exception as ex:
+            logging.getLogger(__name__).exception("Failed to publish event to stream: %s", ex)
     
     return response
 
 
+def _too_many_requests(ex: RateLimitExceeded) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=f"Too many requests: {ex.dimension} limit exceeded",
+        headers={"Retry-After": str(max(1, math.ceil(ex.retry_after)))},
+    )
+
+
+def _save_event(db: Session, event_id: UUID, stored: dict, response: dict, bus) -> bool:
+    """
+    Insert the event (plus its outbox row / transactional NOTIFY) in one transaction.
+    Returns True if the stream hand-off was part of it (otherwise the caller publishes).
+    """
+    store = get_event_store(db)
+    store.insert(stored)
+    transactional = isinstance(bus, TransactionalBus)
+    handed_off = store.in_database and (STREAM_OUTBOX_ENABLED or transactional)
+    if store.in_database and STREAM_OUTBOX_ENABLED:
+        db.add(StreamOutbox(
+            event_id=event_id,
+            payload=json_codec.dumps_str(response),
+        ))
+    elif store.in_database and transactional:
+        with timed_publish(bus, "stage"):
+            bus.stage(db, response)
+    db.commit()
+    return handed_off
+
+
+@router.post("/lookup")
+def lookup_events(
+    body: EventLookupRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    replica_db: Optional[Session] = Depends(get_read_db),
+):
+    """
+    POST /events/lookup
+    Returns many events by ID in one call: body {"eventIds": [...]} -> list in the requested order.
+
+    Status codes:
+      - 200: One entry per requested ID: the event JSON (same as GET /events/{eventId}), or
+             {"eventId": ..., "notFound": true} for IDs that do not exist
+      - 422: Empty list, more than LOOKUP_MAX_IDS IDs, or an ID that is not a UUID
+
+    Design notes:
+      - Replaces N GET /events/{eventId} calls: one multi-key cache read, one `event_id = ANY(:ids)`
+        query for the misses (PK index), and one bulk cache write of what the query found.
+      - Same routing as GET by id: replica when allowed (misses retried on the primary), or the
+        hinted shards when sharded.
+    """
+    shards = get_shard_router()
+    if shards is not None:
+        found = svc_get_events_by_ids_sharded(shards, body.eventIds)
+    elif _use_replica(request) and replica_db is not None:
+        found = svc_get_events_by_ids(replica_db, body.eventIds)
+        misses = [eid for eid in body.eventIds if eid not in found]
+        if misses:
+            get_read_router().record(REASON_MISS_FALLBACK)
+            found.update(svc_get_events_by_ids(db, misses))
+    else:
+        found = svc_get_events_by_ids(db, body.eventIds)
+    return CodecJSONResponse([found.get(eid) or {"eventId": str(eid), "notFound": True} for eid in body.eventIds])
+
+
 @router.get("/{event_id}")
-def get_event_by_id(event_id: UUID4, db: Session = Depends(get_db)):
+def get_event_by_id(
+    event_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    replica_db: Optional[Session] = Depends(get_read_db),
+):
     """
     GET /events/{eventId}
     Returns the exact immutable event JSON previously stored via POST /events.
 
     Path params:
-      - eventId: UUID v4 (validated by Pydantic's UUID4)
+      - eventId: any UUID version (v4 and v7 IDs are both issued, see EVENT_ID_MODE)
 
     Status codes:
-      - 200: Found
+      - 200: Found (ETag + Cache-Control: immutable)
+      - 304: If-None-Match matches the event's ETag (answered without cache or DB access)
       - 404: Not found
-      - 422: eventId is not a UUID v4
+      - 422: eventId is not a UUID
 
     Design notes:
       - Read-through cache: O(1) average for repeated reads.
       - DB assembles the JSON to keep the API contract stable and minimize Python marshalling.
+      - Served by the read replica when routing allows (see app/services/read_routing.py); a miss on
+        the replica may just be replication lag, so it is retried on the primary before returning 404.
+      - With SHARD_DATABASE_URLS set, reads go to the shard named by the ID's shard hint
+        (see app/services/sharding.py).
     """
-    event = svc_get_event_by_id(db, event_id)
+    # The ETag depends on the eventId only (events are immutable): revalidation needs no lookup
+    etag = event_etag(event_id)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=cache_headers(etag, IMMUTABLE_CACHE_CONTROL))
+
+    read_router = get_read_router()
+    shards = get_shard_router()
+    if shards is not None:
+        event = svc_get_event_by_id_sharded(shards, event_id)
+    elif _use_replica(request) and replica_db is not None:
+        event = svc_get_event_by_id(replica_db, event_id)
+        if event is None:
+            read_router.record(REASON_MISS_FALLBACK)
+            event = svc_get_event_by_id(db, event_id)
+    else:
+        event = svc_get_event_by_id(db, event_id)
     if event is None:
         # Not found -> return 404 with a clear message
         raise HTTPException(status_code=404, detail="Event not found")
 
-    return event
+    # Already plain JSON (from the DB/cache): render it directly, skipping FastAPI's jsonable_encoder pass
+    return CodecJSONResponse(event, headers=cache_headers(etag, IMMUTABLE_CACHE_CONTROL))
 
 @router.get("", response_model=List[AuditEventRead])
-def list_all_events(db: Session = Depends(get_db)):
+def list_all_events(
+    request: Request,
+    response: Response,
+    account_id: Optional[str] = Query(None, alias="accountId", description="Only events of this account/tenant"),
+    since: Optional[datetime] = Query(None, description="ingestedAt >= since"),
+    until: Optional[datetime] = Query(None, description="ingestedAt < until"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=LIST_MAX_PAGE_SIZE, description="Page size (omit for the full list)"),
+    db: Session = Depends(get_db),
+    replica_db: Optional[Session] = Depends(get_read_db),
+):
     """
     GET /events
-    Returns all stored audit events in the order they were ingested.
+    Returns stored audit events in the order they were ingested.
     Notes:
     - Business-logic free: delegates to service layer.
     - Events are immutable and returned as stored/enriched.
     - Timestamps are serialized to UTC with 'Z' by DTO.
+    - Without query params the full list is returned (unchanged contract). With ?limit=N the
+      response is one page; if more may follow, the X-Next-Cursor header holds the ?cursor= for the next.
+    - The filters are the hot list queries the index plan serves (tenant page, ingestedAt range, next
+      page; migration 183415943c60 and benchmarks/bench_indexes.py); each is an ordered index range.
+    - Served by the read replica when routing allows (see app/services/read_routing.py).
+    - Sharded: tenant-filtered lists hit the tenant's shard only; unfiltered lists merge every shard.
+    - ETag from the filters/cursor plus the page's last event and size (If-None-Match -> 304). Full pages
+      are cacheable for LIST_PAGE_CACHE_MAX_AGE_SECONDS; the last page may still grow -> no-cache.
     """
-    return svc_list_events(db)
\ No newline at end of file
+    filters = dict(
+        account_id=account_id,
+        since=_as_naive_utc(since),
+        until=_as_naive_utc(until),
+        after=cursor,
+        limit=limit,
+    )
+    shards = get_shard_router()
+    try:
+        if shards is not None:
+            events = svc_list_events_sharded(shards, **filters)
+        else:
+            session = replica_db if _use_replica(request) and replica_db is not None else db
+            events = svc_list_events(session, **filters)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    last_cursor = encode_cursor(events[-1]) if events else None
+    full_page = limit is not None and len(events) == limit
+    etag = page_etag(filters.values(), last_cursor, len(events))
+    headers = cache_headers(etag, PAGE_CACHE_CONTROL if full_page else REVALIDATE_CACHE_CONTROL)
+    if full_page:
+        headers["X-Next-Cursor"] = last_cursor
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return events
+
+
+def _use_replica(request: Request) -> bool:
+    return get_read_router().use_replica(
+        consistency=request.headers.get(CONSISTENCY_HEADER),
+        read_after=request.headers.get(READ_AFTER_HEADER),
+    )
+
+
+def _as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # ingested_at is stored as naive UTC; aware query values are converted, naive ones taken as UTC.
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
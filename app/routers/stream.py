@@ -2,59 +2,130 @@
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 import asyncio
-import json
 import logging
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable, Optional, Union
 
+from app.config import STREAM_DISCONNECT_CHECK_SECONDS, STREAM_TENANT_HEADER, STREAM_WRITE_BUDGET_BYTES
+from app.services import json_codec
 from app.services.stream_bus import get_stream_bus
+from app.services.stream_manager import StreamAdmissionError, get_stream_manager
 
 logger = logging.getLogger(__name__)
 router = APIRouter()  # expose /stream at root
 
+
+def _ndjson_line(data: Union[str, bytes]) -> Optional[bytes]:
+    """NDJSON line for one bus payload, or None (logged) if it is not a JSON object."""
+    if not data:
+        return None
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    try:
+        event = json_codec.loads(data)
+    except ValueError as ex:
+        logger.warning("stream: skipping undecodable bus payload: %s", ex)
+        return None
+    if not isinstance(event, dict):
+        logger.warning("stream: skipping bus payload that is not a JSON object: %.200r", data)
+        return None
+    if b"\n" in data or b"\r" in data:
+        data = json_codec.dumps(event)  # valid but pretty-printed: one line per event
+    return data + b"\n"
+
+
+class ManagedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that runs `on_close` however the response ends.
+
+    Why:
+    - The stream's cleanup cannot live only in the body generator's finally: a generator that never
+      started (client gone before the response started, a middleware failing on http.response.start)
+      never runs it, and its stream slot and pubsub subscription would leak.
+    """
+
+    def __init__(self, content, on_close: Callable[[], Awaitable[None]], **kwargs) -> None:
+        super().__init__(content, **kwargs)
+        self._on_close = on_close
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self._on_close()
+
 @router.get("/stream")
 async def stream_ndjson(request: Request):
     """
     NDJSON stream of real-time events.
-    A background task reads from the bus's pubsub and enqueues JSON objects to an asyncio.Queue.
-    The response generator blocks on queue.get() and yields each object as one NDJSON line.
+    A background task reads from the bus's pubsub and enqueues encoded NDJSON lines into a per-client queue.
+    The response generator wakes when something is queued and writes everything pending as ONE chunk
+    (bounded by STREAM_WRITE_BUDGET_BYTES). Slow consumers are handled by STREAM_SLOW_CONSUMER_POLICY.
+
+    Lifecycle:
+      - Admission: the connection manager sheds new streams with 503 when the worker or tenant
+        (STREAM_TENANT_HEADER) budget is exhausted, before any pubsub connection is opened.
+        The tenant header is not authenticated, so the per-tenant budget only keeps well-behaved
+        tenants apart; the worker budget is what bounds resources.
+      - Release: the slot and the subscription are freed exactly once, when the body generator ends
+        or when the response ends without ever iterating it (ManagedStreamingResponse).
+      - Idle streams wake every STREAM_DISCONNECT_CHECK_SECONDS to notice disconnected clients,
+        so quiet periods do not keep dead pubsub connections, reader tasks and queues alive.
     """
     bus = get_stream_bus()
+    manager = get_stream_manager()
+
+    try:
+        client = manager.admit(request.headers.get(STREAM_TENANT_HEADER))
+    except StreamAdmissionError as ex:
+        logger.warning("stream: shedding new stream: %s", ex.reason)
+        raise HTTPException(status_code=503, detail=f"Stream capacity exceeded: {ex.reason}", headers={"Retry-After": "5"})
 
     # Open a dedicated subscriber up front so tests can probe "subscriber is ready".
     try:
         pubsub = await bus.open_subscriber()
         logger.debug("stream: subscriber opened")
     except Exception as ex:
+        manager.release(client, reason="error")
         logger.exception("stream: failed to open subscriber: %s", ex)
         raise HTTPException(status_code=503, detail="Stream service unavailable")
 
+    stop_event = asyncio.Event()
+    reader_task: Optional[asyncio.Task] = None
+    released = False
+
+    async def close(reason: str) -> None:
+        """Release the slot, stop the reader and close the subscription (idempotent)."""
+        nonlocal released
+        if released:
+            return
+        released = True
+        manager.release(client, reason=reason)
+        stop_event.set()
+        if reader_task is not None:
+            reader_task.cancel()
+        try:
+            await bus.close_subscriber(pubsub)
+        except Exception:
+            pass
+
     async def gen() -> AsyncGenerator[bytes, None]:
-        queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
-        stop_event = asyncio.Event()
+        nonlocal reader_task
+        release_reason = "closed"
 
         async def reader():
             """
-            Background reader: pull JSON payloads from the pubsub and push into the queue.
-            Backpressure: if the queue is full, drop the oldest to make room.
+            Background reader: push each bus payload into the client queue as an encoded NDJSON line.
+            Payloads that do not decode to a JSON object are logged and skipped before they are queued;
+            valid ones are already compact JSON (see StreamBus.publish) and are forwarded without
+            re-encoding. Backpressure is handled by the client's slow-consumer policy.
             """
             try:
-                async for msg in pubsub.listen():
+                async for data in bus.listen(pubsub):
                     if stop_event.is_set():
                         break
-                    data = msg.get("data")
-                    if not data:
-                        continue
-                    try:
-                        obj = json.loads(data)
-                    except Exception as ex:
-                        logger.exception("stream: failed to decode pubsub message: %s", ex)
-                        continue
-                    if queue.full():
-                        try:
-                            _ = queue.get_nowait()
-                        except asyncio.QueueEmpty:
-                            pass
-                    await queue.put(obj)
+                    line = _ndjson_line(data)
+                    if line is not None:
+                        client.put(line)
             except asyncio.CancelledError:
                 # Normal shutdown path.
                 pass
@@ -65,44 +136,62 @@ async def stream_ndjson(request: Request):
 
         try:
             while True:
-                # Stop if client disconnects.
+                # Block until something is queued (or the check interval elapses), then coalesce
+                # everything queued into one write.
+                got_data = await client.wait(timeout=STREAM_DISCONNECT_CHECK_SECONDS)
+
+                # Stop if client disconnects (checked on every wakeup, including idle ones).
                 if await request.is_disconnected():
                     logger.info("stream: client disconnected")
+                    if not got_data:
+                        release_reason = "reaped"
                     break
+                if not got_data:
+                    if reader_task.done():
+                        # Pubsub connection is gone; nothing will ever arrive on this stream.
+                        logger.warning("stream: reader for %s exited; closing stream", client.client_id)
+                        release_reason = "reaped"
+                        break
+                    continue
 
-                # Block for next event and emit as NDJSON line.
-                item = await queue.get()
-                line = (json.dumps(item, separators=(",", ":")) + "\n").encode("utf-8")
-                yield line
+                if client.overflowed:
+                    logger.warning(
+                        "stream: closing slow consumer %s (policy=%s, dropped=%s, depth=%s)",
+                        client.client_id, client.policy, client.dropped, client.depth,
+                    )
+                    release_reason = "overflow"
+                    break
+                chunk = client.drain(STREAM_WRITE_BUDGET_BYTES)
+                if chunk:
+                    yield chunk
         except asyncio.CancelledError:
             # Stream was cancelled by server shutdown.
             return
         finally:
-            # Ensure pubsub is closed and reader is cancelled.
-            try:
-                stop_event.set()
-                reader_task.cancel()
-            except Exception:
-                pass
-            try:
-                await bus.close_subscriber(pubsub)
-            except Exception:
-                pass
+            await close(release_reason)
 
     headers = {
         "Cache-Control": "no-store",
         "Connection": "keep-alive",
         "X-Accel-Buffering": "no",
     }
-    return StreamingResponse(gen(), media_type="application/x-ndjson", headers=headers)
+    try:
+        return ManagedStreamingResponse(
+            gen(), on_close=lambda: close("closed"), media_type="application/x-ndjson", headers=headers
+        )
+    except Exception:
+        await close("error")
+        raise
 
 
 @router.get("/__stream_probe__")
 async def stream_probe():
     """
     Test/diagnostic endpoint: returns the current number of stream subscribers if the bus exposes it.
-    Production RedisBus doesn't implement it; in that case we return subscribers=None.
+    RedisBus doesn't implement it (subscribers=None); InMemoryBus does.
     Tests can monkeypatch a FakeBus that implements subscriber_count().
+    Also returns live connection counts from the stream manager and per-client counters
+    (queue depth, dropped events, ...) for this worker.
     """
     bus = get_stream_bus()
     count = None
@@ -116,4 +205,9 @@ async def stream_probe():
                 count = maybe_coro
         except Exception:
             count = None
-    return {"subscribers": count}
+    manager = get_stream_manager()
+    return {
+        "subscribers": count,
+        "streams": manager.snapshot(),
+        "clients": [c.stats() for c in manager.clients()],
+    }
@@ -1,10 +1,12 @@
 # app/schemas/audit_event.py
 
 from pydantic import BaseModel, Field, EmailStr, constr, IPvAnyAddress, field_serializer
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, List, Literal
 from uuid import UUID
 from datetime import datetime, timezone
 
+from app.config import LOOKUP_MAX_IDS
+
 
 # Nested schema for the 'user' field
 class UserInfo(BaseModel):
@@ -97,4 +99,8 @@ class AuditEventRead(BaseModel):
             v = v.replace(tzinfo=timezone.utc)
         v = v.astimezone(timezone.utc)
         iso = v.isoformat(timespec="milliseconds")
-        return iso.replace("+00:00", "Z")
\ No newline at end of file
+        return iso.replace("+00:00", "Z")
+
+class EventLookupRequest(BaseModel):
+    """Body of POST /events/lookup: event IDs to fetch in one call (duplicates allowed, order kept)."""
+    eventIds: List[UUID] = Field(..., min_length=1, max_length=LOOKUP_MAX_IDS, description="Event IDs to return, in this order")
@@ -0,0 +1,309 @@
+# app/services/archive.py
+"""
+Append-only, compressed cold-storage segments for events removed by retention.
+
+Layout of RETENTION_ARCHIVE_DIR:
+    manifest.jsonl                      one line per segment: name, count, minIngestedAt, maxIngestedAt,
+                                        bloom (eventId Bloom filter, base64)
+                                        (+ minIdMs, maxIdMs when every eventId is a UUIDv7)
+    seg-<minIngestedAt>-<id>.seg        zlib-compressed blocks of NDJSON events (written once, never modified)
+    seg-<minIngestedAt>-<id>.idx.json   block offsets + eventId -> block number
+
+Lookup by eventId checks the in-memory manifest first (UUIDv7 timestamp range, Bloom filter), opens
+only the indexes of segments that may hold the ID (~1% false positives) and decompresses ONE block,
+never the whole segment.
+
+The directory must be shared by every instance (RETENTION_ARCHIVE_DIR has no default): whichever
+node holds the retention leader lock writes the segments, and the lock can move to another host.
+
+CLI:
+    python -m app.services.archive lookup <eventId> [--dir DIR]
+    python -m app.services.archive segments [--since ISO] [--until ISO] [--dir DIR]
+"""
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from app.config import RETENTION_ARCHIVE_BLOCK_EVENTS, RETENTION_ARCHIVE_DIR, RETENTION_ARCHIVE_INDEX_CACHE_SEGMENTS
+from app.services import json_codec
+from app.services.ids import uuid7_timestamp_ms
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.jsonl"
+
+# Bloom filter per segment: 10 bits per event and 7 probes give ~1% false positives
+BLOOM_BITS_PER_EVENT = 10
+BLOOM_HASHES = 7
+
+
+def _fsync_dir(path: Path) -> None:
+    # Persist directory entries (new files / renames). Not supported on every platform.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _id_ms_range(event_ids: List[str]) -> Optional[Tuple[int, int]]:
+    """(min, max) embedded milliseconds when every ID is a UUIDv7, else None."""
+    stamps = []
+    for event_id in event_ids:
+        try:
+            value = UUID(event_id)
+        except ValueError:
+            return None
+        if value.version != 7:
+            return None
+        stamps.append(uuid7_timestamp_ms(value))
+    return min(stamps), max(stamps)
+
+
+def _bloom_positions(event_id: str, size_bits: int) -> Iterator[int]:
+    # Double hashing over one 128-bit digest (Kirsch-Mitzenmacher)
+    digest = hashlib.blake2b(event_id.encode("utf-8"), digest_size=16).digest()
+    h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+    for i in range(BLOOM_HASHES):
+        yield (h1 + i * h2) % size_bits
+
+
+def _bloom(event_ids: List[str]) -> bytes:
+    bits = bytearray(max(8, (len(event_ids) * BLOOM_BITS_PER_EVENT + 7) // 8))
+    for event_id in event_ids:
+        for pos in _bloom_positions(event_id, len(bits) * 8):
+            bits[pos >> 3] |= 1 << (pos & 7)
+    return bytes(bits)
+
+
+def _bloom_contains(bits: bytes, event_id: str) -> bool:
+    return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in _bloom_positions(event_id, len(bits) * 8))
+
+
+def _write_durably(path: Path, data: bytes) -> None:
+    """Write to a temp file, fsync it, then atomically rename into place."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SegmentArchive:
+    """
+    Writes retention batches into compressed segments and looks archived events up by ID.
+
+    Why:
+    - Compliance needs expired events kept, and exporting them through GET /events is far too slow.
+    - Rows must only be deleted once their copy is durable: write_segment() returns after the
+      segment, its index and the manifest entry are fsynced.
+
+    Notes:
+    - Events are compressed in blocks of RETENTION_ARCHIVE_BLOCK_EVENTS so a lookup decompresses
+      only one small block.
+    - The manifest is read incrementally (only lines appended since the last call) and kept in
+      memory, Bloom filters included (~1.25 bytes per archived event). Segments are pruned by UUIDv7
+      ID range and Bloom filter before any index is opened; parsed indexes are kept in an LRU of
+      RETENTION_ARCHIVE_INDEX_CACHE_SEGMENTS entries.
+    - Thread-safe for concurrent writers in one process (retention runs in a worker thread).
+    """
+
+    def __init__(
+        self,
+        directory: str = RETENTION_ARCHIVE_DIR,
+        block_events: int = RETENTION_ARCHIVE_BLOCK_EVENTS,
+        index_cache_segments: int = RETENTION_ARCHIVE_INDEX_CACHE_SEGMENTS,
+    ) -> None:
+        if not directory:
+            raise ValueError("RETENTION_ARCHIVE_DIR must be set to a directory shared by every instance")
+        self.directory = Path(directory)
+        self.block_events = max(1, block_events)
+        self.index_cache_segments = max(1, index_cache_segments)
+        self._lock = threading.Lock()
+        self._index_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._manifest_entries: List[Dict[str, Any]] = []
+        self._blooms: Dict[str, bytes] = {}  # segment -> eventId Bloom filter
+        self._manifest_offset = 0  # bytes of manifest.jsonl already parsed
+
+    # ----- write path -----
+
+    def write_segment(self, events: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Durably archive a batch of API-shaped events; returns the manifest entry (None if empty)."""
+        if not events:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        ingested = [e["ingestedAt"] for e in events]
+        min_ing, max_ing = min(ingested), max(ingested)
+        stamp = min_ing.replace("-", "").replace(":", "").replace(".", "")
+        name = f"seg-{stamp}-{uuid4().hex[:8]}"
+
+        blocks: List[Tuple[int, int]] = []
+        event_block: Dict[str, int] = {}
+        chunks: List[bytes] = []
+        offset = 0
+        for start in range(0, len(events), self.block_events):
+            block = events[start:start + self.block_events]
+            raw = b"".join(
+                json_codec.dumps(e) + b"\n" for e in block
+            )
+            compressed = zlib.compress(raw, 6)
+            blocks.append((offset, len(compressed)))
+            for e in block:
+                event_block[e["eventId"]] = len(blocks) - 1
+            chunks.append(compressed)
+            offset += len(compressed)
+
+        entry = {"segment": name, "count": len(events), "minIngestedAt": min_ing, "maxIngestedAt": max_ing}
+        id_range = _id_ms_range(list(event_block))
+        if id_range is not None:
+            entry["minIdMs"], entry["maxIdMs"] = id_range
+        index = {**entry, "blocks": blocks, "events": event_block}
+        manifest_line = {**entry, "bloom": base64.b64encode(_bloom(list(event_block))).decode("ascii")}
+
+        with self._lock:
+            _write_durably(self.directory / f"{name}.seg", b"".join(chunks))
+            _write_durably(self.directory / f"{name}.idx.json", json.dumps(index, separators=(",", ":")).encode("utf-8"))
+            with open(self.directory / MANIFEST_NAME, "ab") as f:
+                f.write(json.dumps(manifest_line, separators=(",", ":")).encode("utf-8") + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+            _fsync_dir(self.directory)
+        self._cache_index(name, index)
+        return entry
+
+    # ----- read path -----
+
+    def segments(self, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Manifest entries whose ingestedAt range overlaps [since, until] (ISO strings, inclusive)."""
+        for entry in self._manifest():
+            if since and entry["maxIngestedAt"] < since:
+                continue
+            if until and entry["minIngestedAt"] > until:
+                continue
+            yield entry
+
+    def _manifest(self) -> List[Dict[str, Any]]:
+        """All manifest entries; parses only the lines appended since the previous call."""
+        with self._lock:
+            try:
+                f = open(self.directory / MANIFEST_NAME, "rb")
+            except FileNotFoundError:
+                return []
+            with f:
+                f.seek(self._manifest_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # incomplete last line (being written, or torn by a crash): read again next call
+                    self._manifest_offset += len(line)
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                        bloom = entry.pop("bloom", None)
+                        if bloom is not None:
+                            self._blooms[entry["segment"]] = base64.b64decode(bloom)
+                    except ValueError:
+                        continue  # torn line followed by a later append
+                    self._manifest_entries.append(entry)
+            return list(self._manifest_entries)
+
+    def _candidates(self, event_id: str) -> Iterator[Dict[str, Any]]:
+        """Segments that may hold this ID, decided from the in-memory manifest (no file is opened):
+        all-UUIDv7 segments only if their ID range covers a v7 ID's timestamp, and only segments whose
+        Bloom filter may contain the ID."""
+        try:
+            value = UUID(event_id)
+        except ValueError:
+            return  # not an event ID
+        stamp = uuid7_timestamp_ms(value) if value.version == 7 else None
+        for entry in self._manifest():
+            if "minIdMs" in entry and not (stamp is not None and entry["minIdMs"] <= stamp <= entry["maxIdMs"]):
+                continue
+            bloom = self._blooms.get(entry["segment"])  # None: written before Bloom filters were recorded
+            if bloom is not None and not _bloom_contains(bloom, event_id):
+                continue
+            yield entry
+
+    def _cache_index(self, name: str, index: Dict[str, Any]) -> None:
+        with self._lock:
+            self._index_cache[name] = index
+            self._index_cache.move_to_end(name)
+            while len(self._index_cache) > self.index_cache_segments:
+                self._index_cache.popitem(last=False)
+
+    def _index(self, name: str) -> Dict[str, Any]:
+        with self._lock:
+            index = self._index_cache.get(name)
+            if index is not None:
+                self._index_cache.move_to_end(name)
+                return index
+        with open(self.directory / f"{name}.idx.json", "rb") as f:
+            index = json.load(f)
+        self._cache_index(name, index)
+        return index
+
+    def lookup(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """Return the archived event with this ID, decompressing only the block that holds it."""
+        event_id = str(event_id)
+        for entry in self._candidates(event_id):
+            index = self._index(entry["segment"])
+            block_no = index["events"].get(event_id)
+            if block_no is None:
+                continue
+            offset, length = index["blocks"][block_no]
+            with open(self.directory / f"{entry['segment']}.seg", "rb") as f:
+                f.seek(offset)
+                raw = zlib.decompress(f.read(length))
+            for line in raw.splitlines():
+                event = json_codec.loads(line)
+                if event.get("eventId") == event_id:
+                    return event
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.services.archive", description="Inspect archived audit events.")
+    parser.add_argument(
+        "--dir", default=RETENTION_ARCHIVE_DIR or None, required=not RETENTION_ARCHIVE_DIR,
+        help="archive directory (default: RETENTION_ARCHIVE_DIR)",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_lookup = sub.add_parser("lookup", help="print one archived event by eventId")
+    p_lookup.add_argument("event_id")
+    p_segments = sub.add_parser("segments", help="list segments overlapping a time range")
+    p_segments.add_argument("--since")
+    p_segments.add_argument("--until")
+    args = parser.parse_args(argv)
+
+    archive = SegmentArchive(args.dir)
+    if args.command == "lookup":
+        event = archive.lookup(args.event_id)
+        if event is None:
+            print(f"event {args.event_id} not found in archive", file=sys.stderr)
+            return 1
+        print(json.dumps(event, ensure_ascii=False))
+        return 0
+    for entry in archive.segments(args.since, args.until):
+        print(json.dumps(entry))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
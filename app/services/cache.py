@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterable, Mapping
 
 class Cache(ABC):
     """Minimal cache interface to enable swapping backends (memory, Redis, none) without changing callers."""
@@ -15,3 +15,26 @@ class Cache(ABC):
     @abstractmethod
     def delete(self, key: str) -> None:
         ...
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Bulk invalidation; backends override this to do it in one lock/round-trip."""
+        for key in keys:
+            self.delete(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Bulk read: {key: value} for the keys that hit; backends override this to do it in one lock/round-trip."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set_many(self, items: Mapping[str, Dict[str, Any]], ttl_seconds: Optional[int] = None) -> None:
+        """Bulk write; backends override this to do it in one lock/round-trip."""
+        for key, value in items.items():
+            self.set(key, value, ttl_seconds)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for /metrics (hits, misses, evictions, expirations, entries); empty if not tracked."""
+        return {}
@@ -1,4 +1,4 @@
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterable, Mapping
 from .cache import Cache
 from .lru_cache import LRUCacheImpl
 
@@ -13,5 +13,17 @@ class InProcessLRUCache(Cache):
     def set(self, key: str, value: Dict[str, Any], ttl_seconds: Optional[int] = None) -> None:
         self._lru.set(key, value, ttl_seconds)
 
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        return self._lru.get_many(keys)
+
+    def set_many(self, items: Mapping[str, Dict[str, Any]], ttl_seconds: Optional[int] = None) -> None:
+        self._lru.set_many(items, ttl_seconds)
+
     def delete(self, key: str) -> None:
         self._lru.delete(key)
+
+    def stats(self) -> Dict[str, int]:
+        return self._lru.stats()
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        self._lru.delete_many(keys)
@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Mapping, Optional
 from .cache import Cache
 from .cache_backends import InProcessLRUCache
 from app.config import CACHE_BACKEND, CACHE_CAPACITY
@@ -38,4 +38,7 @@ class _NoCache(Cache):
     def get(self, key: str): return None
     def set(self, key: str, value: Dict[str, Any], ttl_seconds: int | None = None): pass
     def delete(self, key: str): pass
+    def delete_many(self, keys: Iterable[str]): pass
+    def get_many(self, keys: Iterable[str]): return {}
+    def set_many(self, items: Mapping[str, Dict[str, Any]], ttl_seconds: int | None = None): pass
 
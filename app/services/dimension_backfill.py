@@ -0,0 +1,125 @@
+# app/services/dimension_backfill.py
+"""
+Batched backfill of the account / reporting-service dimension keys on legacy audit_events rows.
+
+Rows written before migration be23ddcd8d77 carry the inline `account` JSON and `reporting_service`
+UUID and no keys. Each batch (one short transaction):
+  1. reads the next --batch-size legacy rows in event_id order (keyset, so every batch is an index range),
+  2. upserts their distinct accounts / reporting services into the dimension tables,
+  3. sets account_key / reporting_service_key and clears the inline values (unless --keep-legacy).
+
+Reads return the same JSON before, during and after the backfill. It is idempotent and resumable:
+re-running skips rows that already have keys. Space from cleared values is reclaimed by (auto)vacuum.
+
+CLI:
+    python -m app.services.dimension_backfill [--batch-size 5000] [--sleep 0.1] [--keep-legacy]
+"""
+import argparse
+import logging
+import sys
+import time
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.database import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+SELECT_BATCH = text(
+    """
+    SELECT event_id, account->>'accountId', account->>'accountName', reporting_service
+    FROM audit_events
+    WHERE event_id > :after
+      AND (account_key IS NULL OR reporting_service_key IS NULL)
+    ORDER BY event_id
+    LIMIT :limit
+    """
+)
+
+UPSERT_ACCOUNTS = text(
+    """
+    INSERT INTO accounts (account_id, account_name)
+    SELECT DISTINCT a.account_id, a.account_name
+    FROM unnest(CAST(:account_ids AS text[]), CAST(:account_names AS text[])) AS a(account_id, account_name)
+    WHERE a.account_id IS NOT NULL AND a.account_name IS NOT NULL
+    ON CONFLICT (account_id, account_name) DO NOTHING
+    """
+)
+
+UPSERT_SERVICES = text(
+    """
+    INSERT INTO reporting_services (service_uuid)
+    SELECT DISTINCT s FROM unnest(CAST(:services AS uuid[])) AS s
+    WHERE s IS NOT NULL
+    ON CONFLICT (service_uuid) DO NOTHING
+    """
+)
+
+SET_KEYS = """
+    UPDATE audit_events AS ae
+    SET account_key = COALESCE(ae.account_key, acc.id),
+        reporting_service_key = COALESCE(ae.reporting_service_key, rs.id){clear}
+    FROM audit_events AS src
+    LEFT JOIN accounts AS acc
+           ON acc.account_id = src.account->>'accountId' AND acc.account_name = src.account->>'accountName'
+    LEFT JOIN reporting_services AS rs ON rs.service_uuid = src.reporting_service
+    WHERE ae.event_id = src.event_id
+      AND src.event_id = ANY(:ids)
+"""
+
+CLEAR_LEGACY = """,
+        account = CASE WHEN COALESCE(ae.account_key, acc.id) IS NOT NULL THEN NULL ELSE ae.account END,
+        reporting_service = CASE WHEN COALESCE(ae.reporting_service_key, rs.id) IS NOT NULL
+                                 THEN NULL ELSE ae.reporting_service END"""
+
+ZERO_UUID = UUID(int=0)
+
+
+def backfill_batch(after: UUID, batch_size: int, keep_legacy: bool = False, engine: Engine = default_engine) -> List[UUID]:
+    """Backfill one batch of legacy rows after `after`; returns the event_ids processed (empty = done)."""
+    with engine.begin() as conn:
+        rows = conn.execute(SELECT_BATCH, {"after": after, "limit": batch_size}).all()
+        if not rows:
+            return []
+        conn.execute(UPSERT_ACCOUNTS, {"account_ids": [r[1] for r in rows], "account_names": [r[2] for r in rows]})
+        conn.execute(UPSERT_SERVICES, {"services": [r[3] for r in rows]})
+        ids = [r[0] for r in rows]
+        conn.execute(text(SET_KEYS.format(clear="" if keep_legacy else CLEAR_LEGACY)), {"ids": ids})
+    return ids
+
+
+def run(batch_size: int = 5000, sleep_seconds: float = 0.0, keep_legacy: bool = False, engine: Engine = default_engine) -> int:
+    """Backfill all legacy rows; returns how many rows were processed."""
+    after, total, started = ZERO_UUID, 0, time.monotonic()
+    while True:
+        ids = backfill_batch(after, batch_size, keep_legacy=keep_legacy, engine=engine)
+        if not ids:
+            break
+        after = ids[-1]
+        total += len(ids)
+        logger.info("Dimension backfill: %s rows (%.0f rows/s), last event_id %s",
+                    total, total / max(time.monotonic() - started, 1e-9), after)
+        if sleep_seconds > 0:
+            time.sleep(sleep_seconds)  # leave room for live traffic between batches
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.services.dimension_backfill",
+                                     description="Move legacy account/reporting_service values into dimension keys.")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--sleep", type=float, default=0.0, help="pause between batches (seconds)")
+    parser.add_argument("--keep-legacy", action="store_true", help="set keys but keep the inline values")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    total = run(args.batch_size, args.sleep, args.keep_legacy)
+    print(f"backfilled {total} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# app/services/dimensions.py
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.config import DIMENSION_CACHE_CAPACITY
+from app.database import engine as default_engine
+
+
+class DimensionCache:
+    """
+    Resolves account / reporting-service values to their integer dimension keys at ingest.
+
+    Why:
+    - audit_events stores 4-byte keys instead of repeating the account JSON and a 16-byte UUID per row.
+    - Dimension cardinality is tiny compared to event volume, so after warm-up every lookup is a
+      dict hit and ingest does no extra DB round-trips.
+
+    Notes:
+    - A miss upserts the dimension row on its own short autocommit transaction (not the request's
+      session). A key is only cached once its row is committed, so a rolled-back event insert can
+      never leave the cache pointing at a non-existent row.
+    - Dimension rows are never updated or deleted, so cached keys never go stale.
+    - Bounded: beyond DIMENSION_CACHE_CAPACITY entries the least recently used is evicted (a later miss re-reads it).
+    """
+
+    def __init__(self, engine: Engine = default_engine, capacity: int = DIMENSION_CACHE_CAPACITY) -> None:
+        self._engine = engine
+        self._capacity = max(1, capacity)
+        self._keys: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def account_key(self, account_id: str, account_name: str) -> int:
+        """Key of the (accountId, accountName) pair, creating the dimension row if needed."""
+        return self._resolve(
+            ("account", account_id, account_name),
+            """
+            INSERT INTO accounts (account_id, account_name) VALUES (:account_id, :account_name)
+            ON CONFLICT (account_id, account_name) DO NOTHING
+            RETURNING id
+            """,
+            "SELECT id FROM accounts WHERE account_id = :account_id AND account_name = :account_name",
+            {"account_id": account_id, "account_name": account_name},
+        )
+
+    def reporting_service_key(self, service_uuid: UUID) -> int:
+        """Key of a reporting service UUID, creating the dimension row if needed."""
+        return self._resolve(
+            ("reporting_service", str(service_uuid)),
+            """
+            INSERT INTO reporting_services (service_uuid) VALUES (:service_uuid)
+            ON CONFLICT (service_uuid) DO NOTHING
+            RETURNING id
+            """,
+            "SELECT id FROM reporting_services WHERE service_uuid = :service_uuid",
+            {"service_uuid": str(service_uuid)},
+        )
+
+    def resolve_event(self, account_id: str, account_name: str, service_uuid: UUID) -> Tuple[int, int]:
+        """(account_key, reporting_service_key) for one incoming event."""
+        return self.account_key(account_id, account_name), self.reporting_service_key(service_uuid)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _resolve(self, cache_key: Hashable, upsert_sql: str, select_sql: str, params: Dict[str, str]) -> int:
+        with self._lock:
+            key = self._keys.get(cache_key)
+            if key is not None:
+                self._keys.move_to_end(cache_key)
+                self.hits += 1
+                return key
+            self.misses += 1
+
+        with self._engine.begin() as conn:
+            key = conn.execute(text(upsert_sql), params).scalar()
+            if key is None:
+                # Already there (possibly inserted concurrently by another worker)
+                key = conn.execute(text(select_sql), params).scalar_one()
+
+        with self._lock:
+            if cache_key in self._keys:
+                self._keys.move_to_end(cache_key)  # resolved concurrently by another thread
+            elif len(self._keys) >= self._capacity:
+                self._keys.popitem(last=False)
+            self._keys[cache_key] = key
+        return key
+
+
+_dimension_caches: Dict[Engine, DimensionCache] = {}
+
+
+def get_dimension_cache(engine: Engine = default_engine) -> DimensionCache:
+    """Singleton accessor (per process and database: every shard has its own dimension tables)."""
+    cache = _dimension_caches.get(engine)
+    if cache is None:
+        cache = _dimension_caches.setdefault(engine, DimensionCache(engine))
+    return cache
+
+
+def all_dimension_caches() -> List[DimensionCache]:
+    """Every dimension cache of this process (one per database; used by /metrics)."""
+    return list(_dimension_caches.values())
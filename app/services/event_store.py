@@ -0,0 +1,519 @@
+# app/services/event_store.py
+"""
+Storage engines for audit events behind one interface, selected by EVENT_STORE_BACKEND.
+
+Why:
+- The read/write paths (events_service, the events router, RetentionService) only need a handful of
+  operations: insert, bulk insert, get by id, keyset scan and delete-older-than. Behind one
+  interface the same code runs on Postgres in production and on an indexed in-memory engine where
+  no database is wanted: fast tests, and benchmarks of the Python hot path without DB time.
+
+Design notes:
+- Events go in and come out in API shape (the JSON of POST / GET /events). Both engines return what
+  the Postgres read path assembles (EVENT_JSON_COLUMN): API fields only, null fields dropped, `time`
+  as naive UTC timestamp text, canonical IP text. tests/test_event_store.py runs one conformance
+  suite against both.
+- Keyset positions are (ingested_at naive UTC, event_id), the order of every scan.
+- PostgresEventStore works inside the caller's Session and never commits: the router commits the
+  event together with its outbox row, retention commits a delete only after archiving it.
+- InMemoryEventStore is process-local: no shards, replicas, outbox or persistence. Indexes: a hash
+  index by eventId, and (ingested_at, event_id)-ordered lists for the whole table and per tenant
+  (the in-memory twins of the PK and of the tenant B-tree), so lookups are O(1) and scans / retention
+  batches are a bisect plus a slice.
+"""
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from ipaddress import ip_address
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.config import EVENT_STORE_BACKEND
+from app.models.audit_event import AuditEvent
+from app.services.dimensions import get_dimension_cache
+from app.services.queries import get_query_registry
+
+Event = Dict[str, Any]
+Position = Tuple[datetime, UUID]  # (ingested_at naive UTC, event_id)
+
+# SQL expression that assembles the exact API JSON of an audit_events row (shared by every read path).
+# Use with EVENT_FROM. Account / reporting service come from the dimension tables when the row has
+# keys, else from the legacy inline columns (rows not yet backfilled), so the output is identical.
+EVENT_JSON_COLUMN = """jsonb_strip_nulls(
+            jsonb_build_object(
+                'eventId', ae.event_id::text,
+                'ingestedAt', to_char(ae.ingested_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"Z"'),
+                'time', ae.time,
+                'logType', ae.log_type,
+                'reportingService', COALESCE(rs.service_uuid, ae.reporting_service)::text,
+                'logLevel', ae.log_level,
+                'activityType', ae.activity_type,
+                'identityType', ae.identity_type,
+                'user', ae."user",
+                'action', ae.action,
+                'message', ae.message,
+                'ipAddress', ae.ip_address,
+                'errorCode', ae.error_code,
+                'metadata', ae.metadata_,
+                'account', CASE
+                    WHEN ae.account_key IS NOT NULL
+                        THEN jsonb_build_object('accountId', acc.account_id, 'accountName', acc.account_name)
+                    ELSE ae.account::jsonb
+                END
+            )
+        ) AS event_json"""
+
+# FROM clause matching EVENT_JSON_COLUMN (audit_events is aliased "ae").
+EVENT_FROM = """audit_events AS ae
+        LEFT JOIN accounts AS acc ON acc.id = ae.account_key
+        LEFT JOIN reporting_services AS rs ON rs.id = ae.reporting_service_key"""
+
+# Hot statements: compiled once, prepared per connection (see app/services/queries.py).
+EVENT_BY_ID = get_query_registry().register(
+    "event_by_id",
+    f"""
+    SELECT {EVENT_JSON_COLUMN}
+    FROM {EVENT_FROM}
+    WHERE ae.event_id = :id
+    LIMIT 1
+    """,
+)
+
+EVENTS_BY_IDS = get_query_registry().register(
+    "events_by_ids",
+    f"""
+    SELECT ae.event_id, {EVENT_JSON_COLUMN}
+    FROM {EVENT_FROM}
+    WHERE ae.event_id = ANY(:ids)
+    """,
+)
+
+# Tenant list plan: the tenant's account keys (one per accountName it was seen with, usually one) and
+# whether it still has rows without a key (written before migration be23ddcd8d77, not yet backfilled).
+# Both probes are index lookups; the second hits the partial legacy index, empty once backfilled.
+ACCOUNT_LIST_PLAN = get_query_registry().register(
+    "account_list_plan",
+    """
+    SELECT ARRAY(SELECT id FROM accounts WHERE account_id = :account_id ORDER BY id),
+           EXISTS (SELECT 1 FROM audit_events
+                   WHERE account_key IS NULL AND (account->>'accountId') = :account_id)
+    """,
+)
+
+# WHERE fragments of the list_events statement variants, in a fixed order (one prepared statement
+# per combination of filters actually used).
+LIST_FILTERS: Tuple[Tuple[str, str], ...] = (
+    ("since", "ae.ingested_at >= :since"),
+    ("until", "ae.ingested_at < :until"),
+    # ingested_at >= ... is redundant with the row comparison but bounds the index range (and BRIN)
+    ("after", "ae.ingested_at >= :after_ts AND (ae.ingested_at, ae.event_id) > (:after_ts, :after_id)"),
+)
+
+# Tenant filters: one equality per account key, each an ordered range of the (account_key, ingested_at,
+# event_id) index; legacy rows through the partial (accountId, ingested_at, event_id) index.
+ACCOUNT_KEY_FILTER = "ae.account_key = :account_key_{}"
+LEGACY_ACCOUNT_FILTER = "ae.account_key IS NULL AND (ae.account->>'accountId') = :account_id"
+
+USER_FIELDS = ("identityUuid", "userEmail", "userFullName")
+
+
+def parse_timestamp(value: Union[str, datetime]) -> datetime:
+    """
+    A datetime or ISO 8601 text (with 'Z', an offset, or naive = UTC) -> naive UTC, the storage
+    convention. Writers pass the datetimes validated by the request model; text is for events read
+    back from the store (and tests).
+    """
+    ts = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo is not None else ts
+
+
+def _ip_text(value: Any) -> str:
+    # Canonical text of an address given as text or as an ipaddress object (like Postgres' inet)
+    return str(ip_address(str(value)))
+
+
+def _timestamp_text(value: datetime) -> str:
+    # Postgres' JSON text of a timestamp: no zone, fractional seconds without trailing zeros
+    out = value.isoformat()
+    return out.rstrip("0") if value.microsecond else out
+
+
+def _strip_nulls(value: Any) -> Any:
+    # jsonb_strip_nulls: drops null object fields at any depth (null array elements stay)
+    if isinstance(value, dict):
+        return {k: _strip_nulls(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_strip_nulls(v) for v in value]
+    return value
+
+
+def stored_event(event: Event) -> Event:
+    """The API JSON the read path returns for `event` once stored (see the module docstring)."""
+    user = event["user"]
+    account = event["account"]
+    return _strip_nulls({
+        "eventId": str(UUID(str(event["eventId"]))),
+        "ingestedAt": parse_timestamp(event["ingestedAt"]).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "time": _timestamp_text(parse_timestamp(event["time"])) if event.get("time") else None,
+        "logType": event["logType"],
+        "reportingService": str(UUID(str(event["reportingService"]))),
+        "logLevel": event["logLevel"],
+        "activityType": event["activityType"],
+        "identityType": event["identityType"],
+        "user": {k: user.get(k) for k in USER_FIELDS},
+        "action": event["action"],
+        "message": event["message"],
+        "ipAddress": _ip_text(event["ipAddress"]) if event.get("ipAddress") else None,
+        "errorCode": event.get("errorCode"),
+        "metadata": event.get("metadata"),
+        "account": {"accountId": account["accountId"], "accountName": account["accountName"]},
+    })
+
+
+class EventStore(ABC):
+    """Storage engine for audit events; see the module docstring."""
+
+    # True when writes join the caller's database transaction (outbox rows, transactional NOTIFY)
+    in_database: bool = False
+
+    @abstractmethod
+    def insert(self, event: Event) -> None:
+        """
+        Store one API-shaped event (as returned by POST /events). eventId / reportingService may be
+        UUIDs, ingestedAt / time datetimes and ipAddress an address object (the validated model's types).
+        """
+
+    @abstractmethod
+    def insert_many(self, events: Sequence[Event]) -> None:
+        """Store a batch of events in one operation."""
+
+    @abstractmethod
+    def get(self, event_id: UUID) -> Optional[Event]:
+        """The event's API JSON, or None."""
+
+    @abstractmethod
+    def get_many(self, event_ids: Sequence[UUID]) -> Dict[UUID, Event]:
+        """{eventId: API JSON} for the IDs that exist."""
+
+    @abstractmethod
+    def scan(
+        self,
+        account_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after: Optional[Position] = None,
+        limit: Optional[int] = None,
+    ) -> List[Event]:
+        """
+        Events in (ingested_at, event_id) order: optionally one tenant's, ingested in [since, until),
+        strictly after the keyset position `after`, at most `limit` of them.
+        """
+
+    @abstractmethod
+    def delete_older_than(
+        self,
+        cutoff: datetime,
+        limit: int,
+        before_delete: Optional[Callable[[List[Event]], Any]] = None,
+    ) -> List[UUID]:
+        """
+        Delete up to `limit` events ingested before `cutoff` (naive UTC); returns their IDs.
+        `before_delete` receives the victims in API shape before they are removed; if it raises,
+        nothing is deleted.
+        """
+
+
+class PostgresEventStore(EventStore):
+    """audit_events in Postgres, on the caller's Session (never commits; see the module docstring)."""
+
+    in_database = True
+
+    def __init__(self, db: Session) -> None:
+        self._db = db
+
+    def insert(self, event: Event) -> None:
+        self._db.add(AuditEvent(**self._row(event)))
+        self._db.flush()
+
+    def insert_many(self, events: Sequence[Event]) -> None:
+        if events:
+            self._db.execute(insert(AuditEvent), [self._row(e) for e in events])
+
+    def get(self, event_id: UUID) -> Optional[Event]:
+        row = get_query_registry().fetch_one(self._db, EVENT_BY_ID, {"id": event_id})
+        return dict(row[0]) if row is not None else None
+
+    def get_many(self, event_ids: Sequence[UUID]) -> Dict[UUID, Event]:
+        if not event_ids:
+            return {}
+        rows = get_query_registry().fetch_all(self._db, EVENTS_BY_IDS, {"ids": list(event_ids)})
+        return {row[0]: dict(row[1]) for row in rows}
+
+    def scan(
+        self,
+        account_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after: Optional[Position] = None,
+        limit: Optional[int] = None,
+    ) -> List[Event]:
+        used: List[str] = []  # filters present, in LIST_FILTERS order (+ "limit") -> statement variant
+        params: Dict[str, Any] = {}
+        if account_id is not None:
+            # Resolve the tenant first so each branch is an ordered index range (no OR, no sort)
+            keys, legacy = get_query_registry().fetch_one(self._db, ACCOUNT_LIST_PLAN, {"account_id": account_id})
+            if not keys and not legacy:
+                return []
+            used.append(f"account{len(keys)}" + ("+legacy" if legacy else ""))
+            params.update({f"account_key_{i}": key for i, key in enumerate(keys)})
+            if legacy:
+                params["account_id"] = account_id
+        if since is not None:
+            used.append("since")
+            params["since"] = since
+        if until is not None:
+            used.append("until")
+            params["until"] = until
+        if after is not None:
+            used.append("after")
+            params["after_ts"], params["after_id"] = after
+        if limit is not None:
+            used.append("limit")
+            params["limit"] = limit
+
+        variant = tuple(used)
+        query = get_query_registry().get_or_register(
+            "list_events" + "".join(f":{name}" for name in variant), lambda: _list_events_sql(variant)
+        )
+        rows = get_query_registry().fetch_all(self._db, query, params)
+        return [dict(row[0]) for row in rows]
+
+    def delete_older_than(
+        self,
+        cutoff: datetime,
+        limit: int,
+        before_delete: Optional[Callable[[List[Event]], Any]] = None,
+    ) -> List[UUID]:
+        # Oldest first via the (ingested_at, event_id) B-tree: no sort, and the victim selection is an
+        # index-only range. SKIP LOCKED keeps concurrent deleters (a second leader, a shard) apart.
+        if before_delete is None:
+            rows = self._db.execute(
+                text(
+                    """
+                    WITH victims AS (
+                        SELECT event_id
+                        FROM audit_events
+                        WHERE ingested_at < :cutoff
+                        ORDER BY ingested_at
+                        FOR UPDATE SKIP LOCKED
+                        LIMIT :limit
+                    )
+                    DELETE FROM audit_events AS ae
+                    USING victims
+                    WHERE ae.event_id = victims.event_id
+                    RETURNING ae.event_id
+                    """
+                ),
+                {"cutoff": cutoff, "limit": limit},
+            ).all()
+            return [r[0] for r in rows]
+
+        # Lock and read the victims in API shape, hand them over, then delete in the same transaction
+        rows = self._db.execute(
+            text(
+                f"""
+                SELECT ae.event_id, {EVENT_JSON_COLUMN}
+                FROM {EVENT_FROM}
+                WHERE ae.ingested_at < :cutoff
+                ORDER BY ae.ingested_at
+                FOR UPDATE OF ae SKIP LOCKED
+                LIMIT :limit
+                """
+            ),
+            {"cutoff": cutoff, "limit": limit},
+        ).all()
+        if not rows:
+            return []
+        before_delete([dict(r[1]) for r in rows])
+        ids = [r[0] for r in rows]
+        self._db.execute(text("DELETE FROM audit_events WHERE event_id = ANY(:ids)"), {"ids": ids})
+        return ids
+
+    def _row(self, event: Event) -> Dict[str, Any]:
+        account = event["account"]
+        # Integer keys of the account / reporting service dimension rows (cached per process and database)
+        account_key, reporting_service_key = get_dimension_cache(self._db.get_bind()).resolve_event(
+            account["accountId"], account["accountName"], UUID(str(event["reportingService"]))
+        )
+        user = event["user"]
+        return {
+            "event_id": UUID(str(event["eventId"])),
+            "ingested_at": parse_timestamp(event["ingestedAt"]),
+            "time": parse_timestamp(event["time"]) if event.get("time") else None,
+            "log_type": event["logType"],
+            "reporting_service_key": reporting_service_key,
+            "log_level": event["logLevel"],
+            "activity_type": event["activityType"],
+            "identity_type": event["identityType"],
+            "user": {k: user.get(k) for k in USER_FIELDS},
+            "action": event["action"],
+            "message": event["message"],
+            "ip_address": _ip_text(event["ipAddress"]) if event.get("ipAddress") else None,
+            "error_code": event.get("errorCode"),
+            "metadata_": event.get("metadata"),
+            "account_key": account_key,
+        }
+
+
+def _list_events_sql(used: Tuple[str, ...]) -> str:
+    where = [fragment for name, fragment in LIST_FILTERS if name in used]
+    order = "ORDER BY ae.ingested_at ASC, ae.event_id ASC"
+    limit = "LIMIT :limit" if "limit" in used else ""
+
+    def select(conditions: List[str], columns: str = "") -> str:
+        return f"""
+        SELECT {columns}{EVENT_JSON_COLUMN}
+        FROM {EVENT_FROM}
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        {order}
+        {limit}"""
+
+    account = next((name for name in used if name.startswith("account")), None)
+    if account is None:
+        return select(where)
+    # "account<number of keys>[+legacy]": one ordered branch per key (+ the legacy rows)
+    key_count = int(account[len("account"):].split("+")[0])
+    branches = [[ACCOUNT_KEY_FILTER.format(i)] for i in range(key_count)]
+    if account.endswith("+legacy"):
+        branches.append([LEGACY_ACCOUNT_FILTER])
+    if len(branches) == 1:
+        return select(branches[0] + where)
+    # Several ordered branches: UNION ALL under ORDER BY / LIMIT is planned as a Merge Append
+    union = "\n        UNION ALL\n        ".join(
+        f"({select(branch + where, 'ae.ingested_at, ae.event_id, ')})" for branch in branches
+    )
+    return f"""
+        SELECT event_json FROM (
+        {union}
+        ) AS page
+        ORDER BY ingested_at ASC, event_id ASC
+        {limit}
+    """
+
+
+class InMemoryEventStore(EventStore):
+    """
+    Indexed in-memory engine (see the module docstring). Thread-safe; returned dicts are shared with
+    the store, so treat them as immutable (like event cache entries).
+    """
+
+    def __init__(self) -> None:
+        self._by_id: Dict[UUID, Event] = {}
+        self._order: List[Position] = []
+        self._by_account: Dict[str, List[Position]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def insert(self, event: Event) -> None:
+        self.insert_many([event])
+
+    def insert_many(self, events: Sequence[Event]) -> None:
+        stored = [stored_event(e) for e in events]
+        keys = [(parse_timestamp(e["ingestedAt"]), UUID(e["eventId"])) for e in stored]
+        with self._lock:
+            # All or nothing, like a failed INSERT (duplicate primary key)
+            seen = set()
+            for _, event_id in keys:
+                if event_id in self._by_id or event_id in seen:
+                    raise ValueError(f"Duplicate eventId: {event_id}")
+                seen.add(event_id)
+            for event, key in zip(stored, keys):
+                self._by_id[key[1]] = event
+                insort(self._order, key)  # ingestion is nearly append-only: the insert lands at the end
+                insort(self._by_account.setdefault(event["account"]["accountId"], []), key)
+
+    def get(self, event_id: UUID) -> Optional[Event]:
+        return self._by_id.get(event_id)
+
+    def get_many(self, event_ids: Sequence[UUID]) -> Dict[UUID, Event]:
+        by_id = self._by_id
+        return {eid: by_id[eid] for eid in event_ids if eid in by_id}
+
+    def scan(
+        self,
+        account_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after: Optional[Position] = None,
+        limit: Optional[int] = None,
+    ) -> List[Event]:
+        with self._lock:
+            index = self._order if account_id is None else self._by_account.get(account_id, [])
+            # (ts,) sorts before every (ts, event_id): bisecting on it gives the first position at ts
+            lo = bisect_left(index, (since,)) if since is not None else 0
+            if after is not None:
+                lo = max(lo, bisect_right(index, after))
+            hi = bisect_left(index, (until,)) if until is not None else len(index)
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            return [self._by_id[event_id] for _, event_id in index[lo:hi]]
+
+    def delete_older_than(
+        self,
+        cutoff: datetime,
+        limit: int,
+        before_delete: Optional[Callable[[List[Event]], Any]] = None,
+    ) -> List[UUID]:
+        with self._lock:
+            n = min(bisect_left(self._order, (cutoff,)), limit)
+            if n == 0:
+                return []
+            victims = self._order[:n]
+            events = [self._by_id[event_id] for _, event_id in victims]
+            if before_delete is not None:
+                before_delete(events)
+            del self._order[:n]
+            # The victims are the n oldest events overall, so per tenant they are a prefix as well
+            per_account: Dict[str, int] = {}
+            for event in events:
+                account_id = event["account"]["accountId"]
+                per_account[account_id] = per_account.get(account_id, 0) + 1
+            for account_id, count in per_account.items():
+                index = self._by_account[account_id]
+                del index[:count]
+                if not index:
+                    del self._by_account[account_id]
+            ids = [event_id for _, event_id in victims]
+            for event_id in ids:
+                del self._by_id[event_id]
+            return ids
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_id.clear()
+            self._order.clear()
+            self._by_account.clear()
+
+
+# Singleton accessor (memory engine; Postgres stores are per session)
+_memory_store: Optional[InMemoryEventStore] = None
+
+
+def get_event_store(db: Session) -> EventStore:
+    """
+    Store for work on `db`, based on EVENT_STORE_BACKEND:
+      - "postgres" -> PostgresEventStore over `db` (default)
+      - "memory"   -> the process-wide InMemoryEventStore (`db` is never used)
+    """
+    global _memory_store
+    if EVENT_STORE_BACKEND == "memory":
+        if _memory_store is None:
+            _memory_store = InMemoryEventStore()
+        return _memory_store
+    return PostgresEventStore(db)
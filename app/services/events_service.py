@@ -1,12 +1,20 @@
 # app/services/events_service.py
 
-from typing import List, Optional, Dict, Any
+import base64
+import binascii
+import heapq
+import json
+from itertools import islice
+from datetime import datetime
+from typing import Iterable, List, Optional, Dict, Any, Sequence, Tuple
 from uuid import UUID
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from app.models.audit_event import AuditEvent
 from app.services.cache_factory import get_cache
 from app.config import CACHE_TTL_SECONDS
+from app.services.event_store import get_event_store
+# SQL of the Postgres engine (moved to event_store), still importable from here
+from app.services.event_store import EVENT_BY_ID, EVENT_FROM, EVENT_JSON_COLUMN  # noqa: F401 (re-exports)
+from app.services.sharding import ShardRouter
 
 CACHE_PREFIX = "event:"
 
@@ -19,12 +27,24 @@ def cache_put_event(event_id: UUID, event_json: Dict[str, Any]) -> None:
     """
     get_cache().set(_cache_key(event_id), event_json, ttl_seconds=CACHE_TTL_SECONDS or None)
 
+def cache_put_events(events: Dict[UUID, Dict[str, Any]]) -> None:
+    """
+    Bulk write-through (one cache call for a whole lookup batch).
+    """
+    get_cache().set_many({_cache_key(eid): e for eid, e in events.items()}, ttl_seconds=CACHE_TTL_SECONDS or None)
+
 def cache_delete_event(event_id: UUID) -> None:
     """
     Invalidate a specific event from cache (used by retention).
     """
     get_cache().delete(_cache_key(event_id))
 
+def cache_delete_events(event_ids: Iterable[UUID]) -> None:
+    """
+    Bulk invalidation for a batch of deleted events (used by retention).
+    """
+    get_cache().delete_many([_cache_key(eid) for eid in event_ids])
+
 
 def get_event_by_id(db: Session, event_id: UUID) -> Optional[Dict[str, Any]]:
     """
@@ -49,75 +69,165 @@ def get_event_by_id(db: Session, event_id: UUID) -> Optional[Dict[str, Any]]:
     if cached is not None:
         return cached
 
-    table_name = getattr(AuditEvent, "__tablename__", "audit_events")
-    
     # We build the API JSON in the database for:
     # 1) Stable API contract (camelCase keys) decoupled from internal column names
     # 2) Less Python-side marshalling and reduced I/O
     # 3) Consistent 'ingestedAt' format with ISO8601 'Z' and microseconds
-    sql = f"""
-        SELECT jsonb_strip_nulls(
-            jsonb_build_object(
-                'eventId', event_id::text,
-                'ingestedAt', to_char(ingested_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"Z"'),
-                'time', time,
-                'logType', log_type,
-                'reportingService', reporting_service::text,
-                'logLevel', log_level,
-                'activityType', activity_type,
-                'identityType', identity_type,
-                'user', "user",
-                'action', action,
-                'message', message,
-                'ipAddress', ip_address,
-                'errorCode', error_code,
-                'metadata', metadata_,
-                'account', account
-            )
-        ) AS event_json
-        FROM {table_name}
-        WHERE event_id = :id
-        LIMIT 1
-    """
-    row = db.execute(text(sql), {"id": str(event_id)}).mappings().first()
-    if row is None:
+    # The statement is prepared once per connection (see app/services/queries.py); with
+    # EVENT_STORE_BACKEND=memory the lookup is a dict hit instead (app/services/event_store.py).
+    event_json = get_event_store(db).get(event_id)
+    if event_json is None:
         return None
 
-    event_json = dict(row["event_json"])
     cache_put_event(event_id, event_json)
     return event_json
     
 
-def list_events(db: Session) -> List[Dict[str, Any]]:
+def get_cached_events(event_ids: Iterable[UUID]) -> Dict[UUID, Dict[str, Any]]:
+    """
+    Multi-key cache read: {eventId: event JSON} for the IDs that hit.
+    """
+    by_key = {_cache_key(eid): eid for eid in event_ids}
+    return {by_key[key]: event for key, event in get_cache().get_many(by_key).items()}
+
+
+def fetch_events_by_ids(db: Session, event_ids: Sequence[UUID]) -> Dict[UUID, Dict[str, Any]]:
+    """
+    One `event_id = ANY(:ids)` query (PK index) for a batch of IDs, bypassing the cache read;
+    found events are written back to the cache in bulk. Missing IDs are simply absent from the result.
+    """
+    if not event_ids:
+        return {}
+    found = get_event_store(db).get_many(event_ids)
+    cache_put_events(found)
+    return found
+
+
+def get_events_by_ids(db: Session, event_ids: Sequence[UUID]) -> Dict[UUID, Dict[str, Any]]:
+    """
+    Bulk read-through (POST /events/lookup): one multi-key cache read, then one DB query for the misses.
+
+    Returns {eventId: event JSON} for the IDs that exist; callers restore the requested order.
+    """
+    found = get_cached_events(event_ids)
+    misses = [eid for eid in dict.fromkeys(event_ids) if eid not in found]
+    found.update(fetch_events_by_ids(db, misses))
+    return found
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(event: Dict[str, Any]) -> str:
+    """Opaque keyset cursor pointing just after `event` (its ingestedAt + eventId)."""
+    raw = json.dumps([event["ingestedAt"], event["eventId"]], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Inverse of encode_cursor; raises InvalidCursorError for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ingested_at, event_id = json.loads(raw)
+        ts = datetime.fromisoformat(ingested_at.replace("Z", "+00:00")).replace(tzinfo=None)
+        return ts, UUID(event_id)
+    except (binascii.Error, ValueError, TypeError, AttributeError) as ex:
+        raise InvalidCursorError("Invalid cursor") from ex
+
+
+def list_events(
+    db: Session,
+    account_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
     """
-    Return all events ordered by ingestion time (then by event_id for stable ordering).
+    Return events ordered by ingestion time (then by event_id for stable ordering).
     The JSON is assembled in the database to keep the API contract stable and efficient.
-    Complexity: O(n log n) due to ORDER BY with index on ingested_at (recommended).
-    """
-    table_name = getattr(AuditEvent, "__tablename__", "audit_events")
-    sql = f"""
-        SELECT jsonb_strip_nulls(
-            jsonb_build_object(
-                'eventId', event_id::text,
-                'ingestedAt', to_char(ingested_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"Z"'),
-                'time', time,
-                'logType', log_type,
-                'reportingService', reporting_service::text,
-                'logLevel', log_level,
-                'activityType', activity_type,
-                'identityType', identity_type,
-                'user', "user",
-                'action', action,
-                'message', message,
-                'ipAddress', ip_address,
-                'errorCode', error_code,
-                'metadata', metadata_,
-                'account', account
-            )
-        ) AS event_json
-        FROM {table_name}
-        ORDER BY ingested_at ASC, event_id ASC
-    """
-    rows = db.execute(text(sql)).mappings().all()
-    # Build plain Python dicts
-    return [dict(row["event_json"]) for row in rows]
\ No newline at end of file
+
+    Filters/pagination (all optional; none given -> the full list, as before):
+      - account_id: resolved to its account key(s) first, then an ordered range of the (account_key,
+        ingested_at, event_id) index; rows not yet backfilled come from the partial accountId index
+      - no account_id: the (ingested_at, event_id) B-tree returns rows in list order (no sort)
+      - since/until: ingestedAt range [since, until) on the same B-tree (BRIN for wide range scans)
+      - after + limit: keyset pagination; `after` is encode_cursor() of the last event of the previous
+        page, so each page is a bounded index range scan instead of an OFFSET scan
+    """
+    position = decode_cursor(after) if after is not None else None
+    return get_event_store(db).scan(account_id, since, until, position, limit)
+
+
+def _list_order(event: Dict[str, Any]) -> Tuple[str, str]:
+    # Same order as ORDER BY ingested_at, event_id: fixed-width ISO strings and lowercase UUID text
+    # compare like the underlying timestamp / uuid values.
+    return event["ingestedAt"], event["eventId"]
+
+
+def get_event_by_id_sharded(shards: ShardRouter, event_id: UUID) -> Optional[Dict[str, Any]]:
+    """
+    get_event_by_id across shards: the shard hinted by the event ID first, the others only if the
+    hint misses (IDs issued before sharding carry no valid hint).
+    """
+    cached = get_cache().get(_cache_key(event_id))
+    if cached is not None:
+        return cached
+    for shard in shards.lookup_order(event_id):
+        with shards.session(shard) as db:
+            event = get_event_by_id(db, event_id)
+        if event is not None:
+            return event
+    return None
+
+
+def get_events_by_ids_sharded(shards: ShardRouter, event_ids: Sequence[UUID]) -> Dict[UUID, Dict[str, Any]]:
+    """
+    get_events_by_ids across shards: cache first, then one query per hinted shard; IDs not found on
+    their hinted shard (or carrying no valid hint) are looked up on the remaining shards together.
+    """
+    found = get_cached_events(event_ids)
+    by_shard: Dict[int, List[UUID]] = {}
+    for eid in dict.fromkeys(event_ids):
+        if eid not in found:
+            by_shard.setdefault(shards.lookup_order(eid)[0], []).append(eid)
+    asked: Dict[UUID, int] = {}
+    for shard, ids in by_shard.items():
+        with shards.session(shard) as db:
+            found.update(fetch_events_by_ids(db, ids))
+        asked.update((eid, shard) for eid in ids if eid not in found)
+    if asked:
+        for shard in range(shards.count):
+            ids = [eid for eid, hinted in asked.items() if hinted != shard and eid not in found]
+            if ids:
+                with shards.session(shard) as db:
+                    found.update(fetch_events_by_ids(db, ids))
+    return found
+
+
+def list_events_sharded(
+    shards: ShardRouter,
+    account_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    list_events across shards, same contract and order.
+
+    A tenant-filtered list runs on the tenant's shard only. Otherwise every shard is queried in
+    parallel with the same filters and limit (each returns its first `limit` rows after the cursor),
+    and the sorted per-shard results are merged; the first `limit` merged rows are exactly the
+    global page.
+    """
+    if after is not None:
+        decode_cursor(after)  # fail fast on a bad cursor instead of once per shard
+    targets = [shards.shard_for_account(account_id)] if account_id is not None else None
+    per_shard = shards.map(
+        lambda db: list_events(db, account_id=account_id, since=since, until=until, after=after, limit=limit),
+        targets,
+    )
+    merged = heapq.merge(*per_shard, key=_list_order)
+    return list(islice(merged, limit)) if limit is not None else list(merged)
@@ -0,0 +1,72 @@
+# app/services/http_cache.py
+"""
+HTTP caching validators for the read endpoints.
+
+Why:
+- Audit events are immutable, so GET /events/{eventId} can be cached by browsers and CDNs forever and
+  revalidated without reading anything: the ETag is derived from the eventId alone.
+- A list page is fixed by its filters, its start cursor, its last event and its row count. Any insert or
+  delete inside that range changes the count or the last event, so this tuple is a strong validator
+  that costs no hashing of the body.
+
+Notes:
+- ETAG_VERSION is part of every ETag; bump it when the event JSON representation changes so cached
+  copies are not revalidated as current.
+- A single-event 304 is answered without checking that the event still exists (it may have been
+  removed by retention since the client cached it).
+- Compressed responses get the coding appended to the ETag; it is ignored when comparing.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional, Sequence
+from uuid import UUID
+
+from app.config import EVENT_CACHE_MAX_AGE_SECONDS, LIST_PAGE_CACHE_MAX_AGE_SECONDS
+
+ETAG_VERSION = "1"
+# Content codings the compression middleware may append to an ETag
+CONTENT_CODINGS = ("gzip", "zstd")
+
+# Single events never change; full list pages only change if retention removes rows from them.
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={EVENT_CACHE_MAX_AGE_SECONDS}, immutable"
+PAGE_CACHE_CONTROL = f"public, max-age={LIST_PAGE_CACHE_MAX_AGE_SECONDS}"
+# Last / unpaginated page: may grow with the next insert -> always revalidate (ETag still applies)
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def event_etag(event_id: UUID) -> str:
+    return f'"e{ETAG_VERSION}-{event_id}"'
+
+
+def page_etag(filters: Sequence[Any], last_cursor: Optional[str], count: int) -> str:
+    """Strong ETag of a list page: its request filters (incl. start cursor), last event and row count."""
+    raw = json.dumps([ETAG_VERSION, *[_plain(f) for f in filters], last_cursor, count], separators=(",", ":"))
+    return f'"p{ETAG_VERSION}-{hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match evaluation (RFC 9110: weak comparison, "*" matches any current representation)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = _strip_encoding(candidate.strip().removeprefix("W/"))
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def cache_headers(etag: str, cache_control: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def _strip_encoding(etag: str) -> str:
+    # Compressed representations carry the coding inside the quotes (app/middleware/compression.py)
+    for coding in CONTENT_CODINGS:
+        suffix = f'-{coding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+def _plain(value: Any) -> Any:
+    return value.isoformat() if hasattr(value, "isoformat") else value
@@ -0,0 +1,77 @@
+# app/services/json_codec.py
+"""
+One JSON codec for the hot paths (request bodies, API responses, stream bus payloads, outbox rows).
+
+Why:
+- Events are encoded/decoded several times per request (request body, response, bus publish, stream
+  fan-out); stdlib json is the main CPU cost on those paths.
+- orjson is several times faster and produces UTF-8 bytes directly, which is what sockets, Redis and
+  the /stream queues want anyway.
+
+Design notes:
+- JSON_CODEC: "auto" (orjson if installed, else stdlib) | "orjson" | "stdlib".
+- Output is compact (no spaces) and not ASCII-escaped with both backends, i.e. what the bus and
+  outbox already stored.
+- orjson rejects some inputs stdlib accepts (integers beyond 64 bits, non-string dict keys); those
+  calls fall back to stdlib instead of failing, so clients' arbitrary `metadata` always round-trips.
+"""
+import json
+from typing import Any, Union
+
+from starlette.responses import JSONResponse
+
+from app.config import JSON_CODEC
+
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _stdlib_loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    return json.loads(data)
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj)
+    except TypeError:  # orjson.JSONEncodeError: big ints, non-str keys, ...
+        return _stdlib_dumps(obj)
+
+
+def _orjson_loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # Also raised for valid JSON orjson cannot represent (e.g. integers beyond 64 bits);
+        # stdlib either parses it or raises the usual ValueError.
+        return _stdlib_loads(data)
+
+
+def _select(name: str):
+    if name == "stdlib" or (name == "auto" and orjson is None):
+        return "stdlib", _stdlib_dumps, _stdlib_loads
+    if name in ("auto", "orjson"):
+        if orjson is None:
+            raise ValueError("JSON_CODEC=orjson but the orjson package is not installed")
+        return "orjson", _orjson_dumps, _orjson_loads
+    raise ValueError(f"Unknown JSON_CODEC: {name!r} (expected 'auto', 'orjson' or 'stdlib')")
+
+
+backend, dumps, loads = _select(JSON_CODEC)
+
+
+def dumps_str(obj: Any) -> str:
+    """dumps() as text, for text columns and string-typed transports (outbox rows, NOTIFY payloads)."""
+    return dumps(obj).decode("utf-8")
+
+
+class CodecJSONResponse(JSONResponse):
+    """FastAPI/Starlette JSON response rendered with the codec (the app's default response class)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,95 @@
+# app/services/leader_election.py
+
+import logging
+import zlib
+from contextlib import suppress
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.database import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+
+def advisory_lock_key(name: str) -> int:
+    """Stable 32-bit key for a named lock (same on every worker and replica)."""
+    return zlib.crc32(name.encode("utf-8"))
+
+
+class AdvisoryLockLeader:
+    """
+    Leader election on a Postgres session-level advisory lock.
+
+    Why:
+    - Singleton background jobs (retention, outbox relay) must run on exactly one node across
+      all workers and replicas, without another coordination service.
+    - Failover is automatic: the lock belongs to the leader's DB session, so it is released by
+      Postgres as soon as that process dies or its connection drops; the next poll of another
+      node acquires it.
+
+    Notes:
+    - The leader keeps one dedicated connection checked out; followers only borrow a connection
+      for the try-lock call and return it immediately.
+    - Synchronous (DB I/O); call from a worker thread (asyncio.to_thread) in async code.
+    """
+
+    def __init__(self, name: str, engine: Engine = default_engine) -> None:
+        self.name = name
+        self.key = advisory_lock_key(name)
+        self._engine = engine
+        self._conn: Optional[Connection] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._conn is not None
+
+    def ensure(self) -> bool:
+        """Return True if this node holds the lock (acquiring it if free), False otherwise."""
+        if self._conn is not None:
+            # Verify the session (and therefore the lock) is still alive.
+            try:
+                self._conn.execute(text("SELECT 1"))
+                self._conn.commit()
+                return True
+            except Exception:
+                logger.warning("Leader %s: lost lock connection; re-electing.", self.name)
+                self._drop()
+
+        conn = self._engine.connect()
+        try:
+            acquired = bool(conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": self.key}).scalar())
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        if not acquired:
+            conn.close()
+            return False
+        self._conn = conn
+        logger.info("Leader %s: acquired leadership.", self.name)
+        return True
+
+    def release(self) -> None:
+        """Give up leadership (idempotent)."""
+        if self._conn is None:
+            return
+        # Pooled connections survive close(), and so would a session-level advisory lock:
+        # unlock explicitly, or drop the DBAPI connection if that is not possible.
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": self.key})
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+            logger.info("Leader %s: released leadership.", self.name)
+        except Exception:
+            self._drop()
+
+    def _drop(self) -> None:
+        if self._conn is not None:
+            with suppress(Exception):
+                self._conn.invalidate()
+            with suppress(Exception):
+                self._conn.close()
+            self._conn = None
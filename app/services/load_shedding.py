@@ -0,0 +1,184 @@
+# app/services/load_shedding.py
+"""
+Adaptive load shedding: reject low-priority requests early (503) while the worker is overloaded.
+
+Why:
+- When Postgres slows down, requests pile up waiting for pool checkouts and every route degrades
+  together. Refusing the expensive, retryable work up front keeps connections and the event loop for
+  ingestion and probes (/health never touches the database; /ready uses its own probe connection).
+
+Signals (LOAD_SHED_* thresholds; each is turned into a ratio to its threshold):
+  pool_wait  mean SQLAlchemy pool checkout wait per monitor tick (from the audit_db_pool_checkout_wait_seconds
+             histogram of every instrumented pool), smoothed (EWMA)
+  loop_lag   how late the monitor task wakes up relative to its sleep: time the event loop spent busy
+             (blocking calls, CPU-bound handlers), smoothed (EWMA)
+  in_flight  requests currently inside the app (live, not smoothed; /stream connections are not counted)
+
+Pressure is the largest ratio. Requests are classified before routing:
+  critical  /health, /ready, /metrics, /__*__ probes      never shed
+  ingest    POST /events                                  never shed (rate limits apply, app/services/rate_limit.py)
+  bulk      GET /events without limit (full export) or     shed at pressure >= 1
+            with limit > LOAD_SHED_BULK_PAGE_SIZE
+  read      every other request (pages, by-id, lookup, /stream)  shed at pressure >= LOAD_SHED_READ_FACTOR
+
+Notes:
+- Shedding happens in the ASGI middleware before the request body is read or a DB session is opened,
+  so a rejection costs no I/O. Rejections carry Retry-After.
+- A checkout that is still blocked is not a pool_wait sample yet; in_flight and loop_lag react to it
+  meanwhile. Once checkouts complete fast again, the pool_wait average decays within a few ticks.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from app.config import (
+    LOAD_SHED_BULK_PAGE_SIZE,
+    LOAD_SHED_ENABLED,
+    LOAD_SHED_INTERVAL_SECONDS,
+    LOAD_SHED_LOOP_LAG_SECONDS,
+    LOAD_SHED_MAX_IN_FLIGHT,
+    LOAD_SHED_POOL_WAIT_SECONDS,
+    LOAD_SHED_READ_FACTOR,
+)
+from app.services.metrics import DB_POOL_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+CRITICAL = "critical"
+INGEST = "ingest"
+READ = "read"
+BULK = "bulk"
+PRIORITIES = (CRITICAL, INGEST, READ, BULK)
+
+# Weight of the newest tick in the smoothed signals
+EWMA_ALPHA = 0.3
+
+
+def classify(method: str, path: str, query_string: bytes = b"") -> str:
+    """Priority of a request from its method, path and query string (before routing)."""
+    if path in ("/health", "/ready", "/metrics") or path.startswith("/__"):
+        return CRITICAL
+    if path == "/events":
+        if method == "POST":
+            return INGEST
+        if method == "GET":
+            limit = parse_qs(query_string.decode("latin-1")).get("limit", [None])[-1]
+            if limit is None or not limit.isdigit() or int(limit) > LOAD_SHED_BULK_PAGE_SIZE:
+                return BULK
+    return READ
+
+
+class AdmissionController:
+    """Tracks the load signals of this worker and decides which requests to admit; see the module docstring."""
+
+    def __init__(
+        self,
+        pool_wait_threshold: float = LOAD_SHED_POOL_WAIT_SECONDS,
+        loop_lag_threshold: float = LOAD_SHED_LOOP_LAG_SECONDS,
+        max_in_flight: int = LOAD_SHED_MAX_IN_FLIGHT,
+        read_factor: float = LOAD_SHED_READ_FACTOR,
+        interval: float = LOAD_SHED_INTERVAL_SECONDS,
+    ) -> None:
+        # threshold <= 0 disables that signal
+        self.pool_wait_threshold = pool_wait_threshold
+        self.loop_lag_threshold = loop_lag_threshold
+        self.max_in_flight = max_in_flight
+        self.read_factor = read_factor
+        self.interval = interval
+        self.in_flight = 0
+        self.pool_wait = 0.0
+        self.loop_lag = 0.0
+        self.decisions: Dict[Tuple[str, str], int] = {(p, o): 0 for p in PRIORITIES for o in ("admitted", "shed")}
+        self._pool_totals = DB_POOL_WAIT_SECONDS.totals()
+        self._task: Optional[asyncio.Task] = None
+        self._shedding_logged = 0  # highest shedding level already logged
+
+    def pressure(self) -> float:
+        """Largest signal/threshold ratio (>= 1 means overloaded)."""
+        ratios = [0.0]
+        if self.pool_wait_threshold > 0:
+            ratios.append(self.pool_wait / self.pool_wait_threshold)
+        if self.loop_lag_threshold > 0:
+            ratios.append(self.loop_lag / self.loop_lag_threshold)
+        if self.max_in_flight > 0:
+            ratios.append(self.in_flight / self.max_in_flight)
+        return max(ratios)
+
+    def level(self) -> int:
+        """0: admit everything, 1: shed bulk, 2: shed bulk and reads."""
+        pressure = self.pressure()
+        if pressure >= self.read_factor:
+            return 2
+        return 1 if pressure >= 1 else 0
+
+    def admit(self, priority: str) -> bool:
+        """Decide one request (O(1)); counts the decision."""
+        if priority in (CRITICAL, INGEST):
+            admitted = True
+        else:
+            level = self.level()
+            admitted = level == 0 or (level == 1 and priority == READ)
+            if not admitted and level > self._shedding_logged:
+                self._shedding_logged = level
+                logger.warning("load shedding: rejecting %s requests (%s)", priority, self.signals())
+        self.decisions[(priority, "admitted" if admitted else "shed")] += 1
+        return admitted
+
+    def sample(self, loop_lag: float) -> None:
+        """Fold one monitor tick into the smoothed signals."""
+        total, count = DB_POOL_WAIT_SECONDS.totals()
+        last_total, last_count = self._pool_totals
+        self._pool_totals = (total, count)
+        pool_wait = (total - last_total) / (count - last_count) if count > last_count else 0.0
+        self.pool_wait += EWMA_ALPHA * (pool_wait - self.pool_wait)
+        self.loop_lag += EWMA_ALPHA * (loop_lag - self.loop_lag)
+        if self._shedding_logged and self.level() == 0:
+            self._shedding_logged = 0
+            logger.info("load shedding: pressure back to normal (%s)", self.signals())
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._monitor(), name="load-shed-monitor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _monitor(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.sample(max(0.0, time.perf_counter() - expected))
+
+    def signals(self) -> Dict[str, float]:
+        return {
+            "pool_wait_seconds": round(self.pool_wait, 6),
+            "loop_lag_seconds": round(self.loop_lag, 6),
+            "in_flight": self.in_flight,
+            "pressure": round(self.pressure(), 3),
+        }
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            **self.signals(),
+            "level": self.level(),
+            "decisions": {f"{p}:{o}": n for (p, o), n in self.decisions.items()},
+        }
+
+
+# Singleton accessor (None when LOAD_SHED_ENABLED is off)
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    global _controller
+    if _controller is None and LOAD_SHED_ENABLED:
+        _controller = AdmissionController()
+    return _controller
@@ -1,7 +1,7 @@
 # app/services/lru_cache.py 
 from collections import OrderedDict
 from threading import RLock
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterable, Mapping
 import time
 
 class LRUCacheImpl:
@@ -21,23 +21,52 @@ class LRUCacheImpl:
         self.capacity = max(1, capacity)
         self._data: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
         self._lock = RLock()
+        # Counters for /metrics (updated under the lock that is held anyway)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
     def get(self, key: str) -> Optional[Dict[str, Any]]:
         now = time.time()
         with self._lock:
             item = self._data.get(key)
             if item is None:
+                self.misses += 1
                 return None
             expires_at, value = item
             if expires_at and expires_at < now:
                 # Expired: evict and miss
                 self._data.pop(key, None)
+                self.expirations += 1
+                self.misses += 1
                 return None
             # Move to MRU
             self._data.pop(key)
             self._data[key] = (expires_at, dict(value))
+            self.hits += 1
             return dict(value)
 
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        # One lock acquisition for the whole batch (POST /events/lookup reads up to hundreds of IDs).
+        now = time.time()
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for key in keys:
+                item = self._data.pop(key, None)
+                if item is None:
+                    self.misses += 1
+                    continue
+                expires_at, value = item
+                if expires_at and expires_at < now:
+                    self.expirations += 1  # Expired: stays evicted
+                    self.misses += 1
+                    continue
+                self._data[key] = item  # Move to MRU
+                found[key] = dict(value)
+            self.hits += len(found)
+        return found
+
     def set(self, key: str, value: Dict[str, Any], ttl_seconds: Optional[int] = None) -> None:
         expires_at = time.time() + ttl_seconds if ttl_seconds else 0.0
         with self._lock:
@@ -45,8 +74,37 @@ class LRUCacheImpl:
                 self._data.pop(key)
             elif len(self._data) >= self.capacity:
                 self._data.popitem(last=False)  # Evict LRU
+                self.evictions += 1
             self._data[key] = (expires_at, dict(value))
 
+    def set_many(self, items: Mapping[str, Dict[str, Any]], ttl_seconds: Optional[int] = None) -> None:
+        expires_at = time.time() + ttl_seconds if ttl_seconds else 0.0
+        with self._lock:
+            for key, value in items.items():
+                if key in self._data:
+                    self._data.pop(key)
+                elif len(self._data) >= self.capacity:
+                    self._data.popitem(last=False)  # Evict LRU
+                    self.evictions += 1
+                self._data[key] = (expires_at, dict(value))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._data),
+            }
+
     def delete(self, key: str) -> None:
         with self._lock:
             self._data.pop(key, None)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        # One lock acquisition for the whole batch (retention evicts thousands of IDs at once).
+        with self._lock:
+            pop = self._data.pop
+            for key in keys:
+                pop(key, None)
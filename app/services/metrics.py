@@ -0,0 +1,449 @@
+# app/services/metrics.py
+"""
+In-process metrics with Prometheus text exposition (GET /metrics).
+
+Why:
+- No external client library: a counter increment or histogram observation is one small lock and a
+  few integer updates (see benchmarks/bench_metrics.py for the measured per-request cost).
+- Gauges that describe current state (queue depths, pool usage, cache size) are read at scrape time by
+  collector callbacks, so the hot paths do not maintain them.
+
+Metric families (all prefixed audit_):
+  http_request_duration_seconds{method,route,status}   histogram, per route template
+  db_query_duration_seconds{statement}                   histogram, registered statement name or SQL verb
+  db_pool_checkout_wait_seconds{pool}                    histogram, time waiting for a pooled connection
+  db_pool_connections{pool,state}                        gauge (scrape)
+  cache_*                                                event cache / dimension cache counters (scrape)
+  bus_publish_duration_seconds{backend,op}               histogram
+  bus_publish_errors_total{backend,op}                   counter
+  stream_*                                               connection manager counters, queue depth/bytes max and sum
+                                                         over clients, clients with a half-full queue (scrape; per-client
+                                                         detail stays in /__stream_probe__ to keep series bounded)
+  retention_batch_duration_seconds / retention_deleted_total / retention_batch_size
+  read_routing_decisions_total{reason}                   counter (scrape)
+  rate_limit_decisions_total / ingest_*                  POST /events rate limits and fair write scheduler (scrape)
+  load_shed_*                                            admission controller level, signals and decisions (scrape)
+  outbox_pending_rows / outbox_oldest_pending_seconds    unsent stream_outbox backlog, per relay purge tick
+  outbox_dropped_total                                   undelivered rows dropped (OUTBOX_MAX_PENDING_AGE_SECONDS)
+"""
+import bisect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request / query latencies: 0.5 ms .. 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Background batches (retention): 10 ms .. 5 min
+BATCH_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """Child for one label combination (created on first use; keep label values low-cardinality)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+    @abstractmethod
+    def _new_child(self):
+        ...
+
+    @abstractmethod
+    def samples(self) -> Iterator[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        ...
+
+    def _label_pairs(self, values: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(zip(self.labelnames, values))
+
+
+class _Value:
+    """Counter/gauge child. set() is also used by scrape-time collectors for counters kept elsewhere."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield self.name, self._label_pairs(values), child.value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot: +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def totals(self) -> Tuple[float, int]:
+        """(sum, count) over all label combinations; deltas between two calls give a windowed mean."""
+        total, count = 0.0, 0
+        for child in list(self._children.values()):
+            with child._lock:
+                total += child.sum
+                count += child.count
+        return total, count
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            pairs = self._label_pairs(values)
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                cumulative += n
+                yield f"{self.name}_bucket", pairs + (("le", _format_value(bound)),), cumulative
+            yield f"{self.name}_sum", pairs, total
+            yield f"{self.name}_count", pairs, count
+
+
+class MetricsRegistry:
+    """Metric families plus scrape-time collectors, rendered in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        """Register a callback that refreshes gauges/counters right before each scrape."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self) -> str:
+        for collect in list(self._collectors):
+            collect()
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}" if label_text else f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "audit_http_request_duration_seconds", "Time to response start per route template.", ("method", "route", "status")
+)
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "audit_db_query_duration_seconds", "SQL execution time per registered statement (else per SQL verb).", ("statement",)
+)
+DB_POOL_WAIT_SECONDS = REGISTRY.histogram(
+    "audit_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection.", ("pool",)
+)
+DB_POOL_CONNECTIONS = REGISTRY.gauge("audit_db_pool_connections", "Pooled DB connections by state.", ("pool", "state"))
+CACHE_OPERATIONS = REGISTRY.counter("audit_cache_operations_total", "Cache lookups and evictions by outcome.", ("cache", "outcome"))
+CACHE_ENTRIES = REGISTRY.gauge("audit_cache_entries", "Entries currently cached.", ("cache",))
+BUS_PUBLISH_SECONDS = REGISTRY.histogram("audit_bus_publish_duration_seconds", "Stream bus publish latency.", ("backend", "op"))
+BUS_PUBLISH_ERRORS = REGISTRY.counter("audit_bus_publish_errors_total", "Failed stream bus publishes.", ("backend", "op"))
+STREAM_CONNECTIONS = REGISTRY.gauge("audit_stream_connections", "Open /stream connections on this worker.")
+STREAM_EVENTS = REGISTRY.counter("audit_stream_connection_events_total", "/stream admissions and closes by kind.", ("kind",))
+STREAM_QUEUE_DEPTH = REGISTRY.gauge("audit_stream_queue_depth", "Queued events over /stream clients (max, sum).", ("stat",))
+STREAM_QUEUE_BYTES = REGISTRY.gauge("audit_stream_queue_bytes", "Queued bytes over /stream clients (max, sum).", ("stat",))
+STREAM_BACKLOGGED_CLIENTS = REGISTRY.gauge(
+    "audit_stream_backlogged_clients", "/stream clients whose queue is at least half of STREAM_QUEUE_MAXSIZE."
+)
+RETENTION_BATCH_SECONDS = REGISTRY.histogram(
+    "audit_retention_batch_duration_seconds", "Duration of one retention delete batch.", buckets=BATCH_BUCKETS
+)
+RETENTION_DELETED = REGISTRY.counter("audit_retention_deleted_total", "Events deleted by retention.")
+RETENTION_BATCH_SIZE = REGISTRY.gauge("audit_retention_batch_size", "Current adaptive retention batch size.")
+READ_ROUTING_DECISIONS = REGISTRY.counter(
+    "audit_read_routing_decisions_total", "Read routing decisions (replica vs primary) by reason.", ("reason",)
+)
+RATE_LIMIT_DECISIONS = REGISTRY.counter(
+    "audit_rate_limit_decisions_total", "POST /events rate limit decisions by outcome.", ("outcome",)
+)
+INGEST_WRITE_SLOTS = REGISTRY.gauge("audit_ingest_write_slots", "Fair ingest scheduler write slots by state.", ("state",))
+INGEST_QUEUED_WRITES = REGISTRY.gauge("audit_ingest_queued_writes", "Inserts waiting for an ingest write slot.")
+INGEST_SCHEDULER_EVENTS = REGISTRY.counter(
+    "audit_ingest_scheduler_events_total", "Fair ingest scheduler grants, queued waits and rejections.", ("kind",)
+)
+LOAD_SHED_LEVEL = REGISTRY.gauge("audit_load_shed_level", "Admission level: 0 admit all, 1 shed bulk reads, 2 shed all reads.")
+LOAD_SHED_SIGNALS = REGISTRY.gauge("audit_load_shed_signal", "Admission controller inputs (seconds, requests, pressure ratio).", ("signal",))
+LOAD_SHED_DECISIONS = REGISTRY.counter(
+    "audit_load_shed_decisions_total", "Admission controller decisions by request priority.", ("priority", "decision")
+)
+OUTBOX_PENDING_ROWS = REGISTRY.gauge("audit_outbox_pending_rows", "Unsent stream_outbox rows (all databases).")
+OUTBOX_OLDEST_PENDING_SECONDS = REGISTRY.gauge(
+    "audit_outbox_oldest_pending_seconds", "Age of the oldest unsent stream_outbox row (0 when drained)."
+)
+OUTBOX_DROPPED = REGISTRY.counter("audit_outbox_dropped_total", "Undelivered stream_outbox rows dropped by age.")
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited for a connection (DB_POOL_WAIT_SECONDS).
+    Includes opening a new connection when the pool grows; an exhausted pool shows up as a long tail.
+    """
+
+    metrics_name = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT_SECONDS.labels(self.metrics_name).observe(time.perf_counter() - started)
+
+
+def instrumented_pool(name: str) -> type:
+    """Pool class for create_engine(poolclass=...) labelled `name` in the pool metrics."""
+    return type(f"InstrumentedQueuePool_{name}", (InstrumentedQueuePool,), {"metrics_name": name})
+
+
+@contextmanager
+def timed_publish(bus: object, op: str) -> Iterator[None]:
+    """Time a stream bus call (BUS_PUBLISH_SECONDS) and count it in BUS_PUBLISH_ERRORS if it raises."""
+    backend = type(bus).__name__
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        BUS_PUBLISH_ERRORS.labels(backend, op).inc()
+        raise
+    finally:
+        BUS_PUBLISH_SECONDS.labels(backend, op).observe(time.perf_counter() - started)
+
+
+def statement_label(sql: Optional[str]) -> str:
+    """Low-cardinality label for ad-hoc SQL: its leading verb (SELECT, INSERT, DELETE, ...)."""
+    verb = (sql or "").lstrip().split(None, 1)[:1]
+    return verb[0].upper() if verb else "UNKNOWN"
+
+
+_engines: Dict[str, Engine] = {}
+
+
+def instrument_engine(name: str, engine: Engine) -> Engine:
+    """
+    Time every cursor execution of `engine` (DB_QUERY_SECONDS, labelled by SQL verb) and report its
+    pool usage at scrape time. Create the engine with poolclass=instrumented_pool(name) to also record
+    checkout waits. Registered statements (app/services/queries.py) run on the raw cursor and are
+    recorded by the query registry under their own names instead.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_started"].pop()
+        DB_QUERY_SECONDS.labels(statement_label(statement)).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("metrics_started") if context.connection is not None else None
+        if stack:
+            stack.pop()
+
+    _engines[name] = engine
+    return engine
+
+
+def _collect_pools() -> None:
+    for name, engine in list(_engines.items()):
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            DB_POOL_CONNECTIONS.labels(name, "checked_out").set(pool.checkedout())
+            DB_POOL_CONNECTIONS.labels(name, "idle").set(pool.checkedin())
+            DB_POOL_CONNECTIONS.labels(name, "overflow").set(max(0, pool.overflow()))
+
+
+def _collect_caches() -> None:
+    from app.services.cache_factory import get_cache
+    from app.services.dimensions import all_dimension_caches
+
+    stats = get_cache().stats()
+    for outcome in ("hits", "misses", "evictions", "expirations"):
+        if outcome in stats:
+            CACHE_OPERATIONS.labels("events", outcome).set(stats[outcome])
+    if "entries" in stats:
+        CACHE_ENTRIES.labels("events").set(stats["entries"])
+
+    dimension_caches = all_dimension_caches()
+    CACHE_OPERATIONS.labels("dimensions", "hits").set(sum(c.hits for c in dimension_caches))
+    CACHE_OPERATIONS.labels("dimensions", "misses").set(sum(c.misses for c in dimension_caches))
+    CACHE_ENTRIES.labels("dimensions").set(sum(len(c) for c in dimension_caches))
+
+
+def _collect_streams() -> None:
+    from app.config import STREAM_QUEUE_MAXSIZE
+    from app.services.stream_manager import get_stream_manager
+
+    manager = get_stream_manager()
+    snapshot = manager.snapshot()
+    STREAM_CONNECTIONS.set(snapshot["active"])
+    for kind in ("admitted", "rejected", "reaped", "overflowed"):
+        STREAM_EVENTS.labels(kind).set(snapshot[kind])
+    # Aggregates only: a series per client would churn with every connection
+    stats = [client.stats() for client in manager.clients()]
+    depths = [s["queueDepth"] for s in stats]
+    queued = [s["queuedBytes"] for s in stats]
+    STREAM_QUEUE_DEPTH.labels("max").set(max(depths, default=0))
+    STREAM_QUEUE_DEPTH.labels("sum").set(sum(depths))
+    STREAM_QUEUE_BYTES.labels("max").set(max(queued, default=0))
+    STREAM_QUEUE_BYTES.labels("sum").set(sum(queued))
+    STREAM_BACKLOGGED_CLIENTS.set(sum(1 for d in depths if d and d * 2 >= STREAM_QUEUE_MAXSIZE))
+
+
+def _collect_read_routing() -> None:
+    from app.services.read_routing import get_read_router
+
+    for reason, count in get_read_router().stats()["decisions"].items():
+        READ_ROUTING_DECISIONS.labels(reason).set(count)
+
+
+def _collect_ingest_admission() -> None:
+    from app.services.rate_limit import get_ingest_scheduler, get_rate_limiter
+
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        snapshot = limiter.snapshot()
+        RATE_LIMIT_DECISIONS.labels("admitted").set(snapshot["admitted"])
+        for dimension, count in snapshot["limited"].items():
+            RATE_LIMIT_DECISIONS.labels(f"limited_{dimension}").set(count)
+        RATE_LIMIT_DECISIONS.labels("backend_error").set(snapshot["errors"])
+    scheduler = get_ingest_scheduler()
+    if scheduler is not None:
+        snapshot = scheduler.snapshot()
+        INGEST_WRITE_SLOTS.labels("busy").set(snapshot["busy"])
+        INGEST_WRITE_SLOTS.labels("free").set(snapshot["slots"] - snapshot["busy"])
+        INGEST_QUEUED_WRITES.set(snapshot["waiting"])
+        for kind in ("granted", "queued", "rejected"):
+            INGEST_SCHEDULER_EVENTS.labels(kind).set(snapshot[kind])
+
+
+def _collect_load_shedding() -> None:
+    from app.services.load_shedding import get_admission_controller
+
+    controller = get_admission_controller()
+    if controller is None:
+        return
+    LOAD_SHED_LEVEL.set(controller.level())
+    for signal, value in controller.signals().items():
+        LOAD_SHED_SIGNALS.labels(signal).set(value)
+    for (priority, decision), count in controller.decisions.items():
+        LOAD_SHED_DECISIONS.labels(priority, decision).set(count)
+
+
+for _collector in (
+    _collect_pools, _collect_caches, _collect_streams, _collect_read_routing, _collect_ingest_admission,
+    _collect_load_shedding,
+):
+    REGISTRY.add_collector(_collector)
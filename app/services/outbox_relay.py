@@ -0,0 +1,215 @@
+# app/services/outbox_relay.py
+
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_MAX_PENDING_AGE_SECONDS,
+    OUTBOX_PENDING_ALERT_SECONDS,
+    OUTBOX_POLL_INTERVAL_SECONDS,
+    OUTBOX_SENT_RETENTION_SECONDS,
+)
+from app.database import engine
+from app.services.leader_election import AdvisoryLockLeader
+from app.services.metrics import OUTBOX_DROPPED, OUTBOX_OLDEST_PENDING_SECONDS, OUTBOX_PENDING_ROWS, timed_publish
+from app.services.sharding import get_shard_router
+from app.services.stream_bus import get_stream_bus
+
+logger = logging.getLogger(__name__)
+
+# Only one relay per database publishes at a time, which keeps delivery in outbox order
+# across workers and replicas.
+OUTBOX_RELAY_LOCK_NAME = "audit-events:outbox-relay"
+
+# How often relayed (and, if configured, stale) rows are purged and the backlog is checked.
+PURGE_INTERVAL_SECONDS = 30.0
+
+
+class OutboxRelay:
+    """
+    Background worker that publishes rows from stream_outbox to the stream bus.
+
+    Why:
+    - POST /events only writes the outbox row in its own transaction; bus latency/outages no longer
+      reach ingestion latency, and a failed publish is retried instead of lost.
+
+    Delivery:
+    - At least once: rows are marked sent only after the bus accepted the batch; a crash in between
+      re-publishes the batch.
+    - One publisher: an advisory-lock leader election makes one relay the active publisher (others
+      stand by and take over if its connection goes away).
+    - In order: rows are published in (txid, id) order (transactions by xid, a transaction's rows by
+      id), and only rows below the commit watermark
+      (txid older than every transaction still running, pg_snapshot_xmin) are read. Ids are drawn
+      before commit, so without the watermark id N+1 could be relayed before id N commits; below it
+      no transaction can still add a row that sorts before one already published.
+    - The watermark waits for the oldest running write transaction in the database, ingest or not:
+      a long one delays relaying (rows wait, nothing is skipped).
+    - Bounded: relayed rows are purged after OUTBOX_SENT_RETENTION_SECONDS. Undelivered rows are kept:
+      the backlog is exported as metrics and logged as an error once the oldest row is older than
+      OUTBOX_PENDING_ALERT_SECONDS. Dropping them after OUTBOX_MAX_PENDING_AGE_SECONDS is opt-in.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_INTERVAL_SECONDS,
+        engines: Sequence[Engine] | None = None,
+    ) -> None:
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        # Databases holding stream_outbox (every shard when sharding is enabled); order is per database.
+        shards = get_shard_router()
+        self.engines = list(engines) if engines else (shards.engines if shards is not None else [engine])
+        self._task: asyncio.Task | None = None
+        self._stop = asyncio.Event()
+        self.leader = AdvisoryLockLeader(OUTBOX_RELAY_LOCK_NAME)
+        self._last_purge = 0.0
+
+    async def start(self) -> None:
+        """Start the background relay task."""
+        if self._task is not None:
+            return  # Already started
+        self._stop = asyncio.Event()  # fresh event: bound to the loop that runs this start()
+        logger.info("Starting OutboxRelay (batch=%s, poll=%ss)...", self.batch_size, self.poll_interval)
+        self._task = asyncio.create_task(self._run(), name="outbox-relay")
+
+    async def stop(self) -> None:
+        """Signal the relay to stop and wait for it to finish."""
+        logger.info("Stopping OutboxRelay...")
+        self._stop.set()
+        if self._task:
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except asyncio.TimeoutError:
+                logger.warning("Outbox relay did not stop in time; cancelling...")
+                self._task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await self._task
+            finally:
+                self._task = None
+        await asyncio.to_thread(self.leader.release)
+        logger.info("OutboxRelay stopped.")
+
+    async def _run(self) -> None:
+        """Main loop: relay batches back-to-back while there is a backlog, otherwise poll."""
+        backoff = self.poll_interval
+        while not self._stop.is_set():
+            try:
+                sent = await self.relay_once()
+                backoff = self.poll_interval
+                if sent >= self.batch_size:
+                    continue  # backlog: keep going without sleeping
+            except Exception:
+                logger.exception("Outbox relay batch failed; will retry.")
+                backoff = min(max(backoff * 2, 0.5), 10.0)
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+
+    async def relay_once(self) -> int:
+        """Publish one batch of pending rows per database; returns the largest batch relayed."""
+        if not await asyncio.to_thread(self.leader.ensure):
+            return 0  # another relay is the active publisher
+        largest = 0
+        for db_engine in self.engines:
+            batch = await asyncio.to_thread(self._fetch_batch, db_engine)
+            if batch:
+                ids = [row_id for row_id, _ in batch]
+                bus = get_stream_bus()
+                with timed_publish(bus, "publish_many"):
+                    await bus.publish_many([payload for _, payload in batch])
+                await asyncio.to_thread(self._mark_sent, db_engine, ids)
+                logger.debug("Outbox relay published %s events (ids %s..%s)", len(ids), ids[0], ids[-1])
+            largest = max(largest, len(batch))
+        if self.leader.is_leader and time.monotonic() - self._last_purge >= PURGE_INTERVAL_SECONDS:
+            await asyncio.to_thread(self.purge)
+        return largest
+
+    def _fetch_batch(self, db_engine: Engine) -> List[Tuple[int, str]]:
+        with db_engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    """
+                    SELECT id, payload
+                    FROM stream_outbox
+                    WHERE sent_at IS NULL
+                      AND txid < pg_snapshot_xmin(pg_current_snapshot())
+                    ORDER BY txid, id
+                    LIMIT :limit
+                    """
+                ),
+                {"limit": self.batch_size},
+            ).all()
+        return [(r[0], r[1]) for r in rows]
+
+    def _mark_sent(self, db_engine: Engine, ids: List[int]) -> None:
+        with db_engine.begin() as conn:
+            conn.execute(
+                text("UPDATE stream_outbox SET sent_at = (NOW() AT TIME ZONE 'UTC') WHERE id = ANY(:ids)"),
+                {"ids": ids},
+            )
+
+    def purge(self) -> int:
+        """Delete relayed rows past retention (and stale pending rows if configured), export the backlog; returns rows removed."""
+        self._last_purge = time.monotonic()
+        removed, pending, oldest = 0, 0, 0.0
+        for db_engine in self.engines:
+            deleted, count, age = self._purge_on(db_engine)
+            removed, pending, oldest = removed + deleted, pending + count, max(oldest, age)
+        OUTBOX_PENDING_ROWS.set(pending)
+        OUTBOX_OLDEST_PENDING_SECONDS.set(oldest)
+        if OUTBOX_PENDING_ALERT_SECONDS > 0 and oldest > OUTBOX_PENDING_ALERT_SECONDS:
+            logger.error("Outbox backlog: %s undelivered events, oldest %.0fs old", pending, oldest)
+        return removed
+
+    def _purge_on(self, db_engine: Engine) -> Tuple[int, int, float]:
+        """(rows removed, rows still pending, age of the oldest pending row in seconds) for one database."""
+        with db_engine.begin() as conn:
+            sent = conn.execute(
+                text(
+                    """
+                    DELETE FROM stream_outbox
+                    WHERE sent_at IS NOT NULL
+                      AND sent_at < (NOW() AT TIME ZONE 'UTC') - make_interval(secs => :secs)
+                    """
+                ),
+                {"secs": OUTBOX_SENT_RETENTION_SECONDS},
+            ).rowcount or 0
+            stale = 0
+            if OUTBOX_MAX_PENDING_AGE_SECONDS > 0:
+                stale = conn.execute(
+                    text(
+                        """
+                        DELETE FROM stream_outbox
+                        WHERE sent_at IS NULL
+                          AND created_at < (NOW() AT TIME ZONE 'UTC') - make_interval(secs => :secs)
+                        """
+                    ),
+                    {"secs": OUTBOX_MAX_PENDING_AGE_SECONDS},
+                ).rowcount or 0
+            # Pending rows only (partial index ix_stream_outbox_pending): small unless the bus is down
+            pending, oldest = conn.execute(
+                text(
+                    """
+                    SELECT COUNT(*),
+                           COALESCE(EXTRACT(EPOCH FROM (NOW() AT TIME ZONE 'UTC') - MIN(created_at)), 0)
+                    FROM stream_outbox
+                    WHERE sent_at IS NULL
+                    """
+                )
+            ).one()
+        if stale:
+            OUTBOX_DROPPED.inc(stale)
+            logger.error("Outbox purge dropped %s undelivered events older than %ss", stale, OUTBOX_MAX_PENDING_AGE_SECONDS)
+        if sent:
+            logger.debug("Outbox purge removed %s relayed rows", sent)
+        return sent + stale, pending, float(oldest)
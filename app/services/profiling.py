@@ -0,0 +1,310 @@
+# app/services/profiling.py
+"""
+Opt-in profiling: per-request traces and a process-wide sampling profiler, both written as folded
+stacks (`frame;frame;frame weight` per line), the input format of flamegraph.pl, speedscope and
+inferno.
+
+Why:
+- When POST /events p99 regresses we need to see whether jsonschema, Pydantic, the SQLAlchemy flush
+  or the bus publish moved, on the real code path and without redeploying.
+
+Design notes:
+- RequestProfile is a deterministic tracer (sys.setprofile) for one request. Weights are
+  microseconds of self time per stack, so a single 5 ms request still gives a usable graph (a
+  sampler would take one or two samples). The traced request itself runs roughly 10x slower.
+- The tracer only records frames running in the request's context (a ContextVar), so other requests
+  interleaved on the event loop do not leak into the profile. Time the request spends suspended
+  (awaiting Redis, the outbox, a slow client) is recorded as an "<await>" frame under the frame that
+  awaited.
+- The hook is installed on the event-loop thread. Sync handlers and dependencies run in the
+  threadpool; they are traced too on Python 3.12+ (threading.setprofile_all_threads), otherwise only
+  the event-loop part of the request is captured; use the sampler for those.
+- One request profile at a time per process (the profile hook is a single slot); concurrent
+  candidates are simply not profiled.
+- StackSampler polls sys._current_frames() from a daemon thread; weights are sample counts. It
+  costs one stack walk per thread per interval while running and nothing when stopped.
+"""
+import asyncio.events
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from types import CodeType
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import PROFILING_DIR, PROFILING_SAMPLER_INTERVAL_SECONDS
+
+AWAIT_FRAME = "<await>"
+
+_ASYNC_FLAGS = inspect.CO_COROUTINE | inspect.CO_ITERABLE_COROUTINE | inspect.CO_ASYNC_GENERATOR
+_LOOP_CALLBACK_CODE = asyncio.events.Handle._run.__code__
+_set_all_threads = getattr(threading, "setprofile_all_threads", None)  # Python 3.12+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("active_request_profile", default=None)
+_profile_slot = threading.Lock()
+_code_labels: Dict[CodeType, str] = {}
+_path_prefixes = sorted(
+    {os.path.join(os.path.abspath(p), "") for p in sys.path if p and os.path.isdir(p)} | {os.path.join(os.getcwd(), "")},
+    key=len,
+    reverse=True,
+)
+
+
+def _short_path(filename: str) -> str:
+    for prefix in _path_prefixes:
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def code_label(code: CodeType) -> str:
+    """Frame name in the folded output: `qualname (path:first line)` (one node per function)."""
+    label = _code_labels.get(code)
+    if label is None:
+        name = getattr(code, "co_qualname", code.co_name)
+        label = _code_labels[code] = f"{name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+def _c_label(func: object) -> str:
+    name = getattr(func, "__qualname__", None) or getattr(func, "__name__", None) or repr(func)
+    module = getattr(func, "__module__", None)
+    return f"{module}.{name} [C]" if module else f"{name} [C]"
+
+
+def write_folded(path: Path, stacks: Iterable[Tuple[List[str], float]]) -> int:
+    """Write `a;b;c weight` lines (weights rounded to integers, zero weights dropped); returns the line count."""
+    lines = []
+    for frames, weight in stacks:
+        rounded = int(round(weight))
+        if rounded > 0:
+            lines.append(f"{';'.join(f.replace(';', ':') for f in frames)} {rounded}")
+    lines.sort()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text("\n".join(lines) + ("\n" if lines else ""), encoding="utf-8")
+    os.replace(tmp, path)
+    return len(lines)
+
+
+class _ThreadStack:
+    __slots__ = ("stack", "last", "unwinding", "waiting")
+
+    def __init__(self, root: str, now: float) -> None:
+        # Entries are (key, frame, C function or None); key is the nested (parent_key, label) stack id
+        self.stack: List[Tuple[tuple, object, object]] = [((None, root), None, None)]
+        self.last = now
+        self.unwinding: Optional[tuple] = None
+        self.waiting: Optional[tuple] = None
+
+
+def _is_async(frame) -> bool:
+    return bool(frame.f_code.co_flags & _ASYNC_FLAGS)
+
+
+def _is_task_root(frame) -> bool:
+    """Outermost coroutine of a task step (its caller is event-loop machinery)."""
+    return _is_async(frame) and (frame.f_back is None or not _is_async(frame.f_back))
+
+
+class RequestProfile:
+    """Deterministic trace of one request; see the module docstring."""
+
+    def __init__(self) -> None:
+        self.totals: Dict[tuple, float] = defaultdict(float)
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self._home = threading.get_ident()
+        self._threads: Dict[int, _ThreadStack] = {}
+        self._previous = None
+        self._token = None
+
+    @classmethod
+    def start(cls) -> Optional["RequestProfile"]:
+        """Begin tracing the calling task; None if another request is being profiled."""
+        if not _profile_slot.acquire(blocking=False):
+            return None
+        profile = cls()
+        profile._threads[profile._home] = _ThreadStack("request", profile.started)
+        profile._token = _active.set(profile)
+        profile._previous = sys.getprofile()
+        if _set_all_threads is not None:
+            _set_all_threads(profile._hook)
+        else:
+            sys.setprofile(profile._hook)
+        return profile
+
+    def stop(self) -> None:
+        if _set_all_threads is not None:
+            _set_all_threads(None)
+        sys.setprofile(self._previous)
+        self.elapsed = time.perf_counter() - self.started
+        self._threads.clear()  # drop frame references
+        _active.reset(self._token)
+        _profile_slot.release()
+
+    def stacks(self) -> Iterator[Tuple[List[str], float]]:
+        """(frames root-first, microseconds) per recorded stack."""
+        for key, seconds in self.totals.items():
+            frames = []
+            while key is not None:
+                key, label = key
+                frames.append(label)
+            frames.reverse()
+            yield frames, seconds * 1_000_000
+
+    def write(self, path: Path) -> int:
+        return write_folded(path, self.stacks())
+
+    def _hook(self, frame, event: str, arg) -> None:
+        if _active.get() is not self:
+            return
+        now = time.perf_counter()
+        tid = threading.get_ident()
+        state = self._threads.get(tid)
+        if state is None:
+            state = self._threads[tid] = _ThreadStack(f"thread:{threading.current_thread().name}", now)
+        stack = state.stack
+        if state.waiting is not None:
+            self.totals[(state.waiting, AWAIT_FRAME)] += now - state.last
+            state.waiting = None
+        else:
+            self.totals[stack[-1][0]] += now - state.last
+
+        if event == "call" or event == "c_call":
+            parent = frame.f_back if event == "call" else frame
+            top = stack[-1]
+            if top[1] is not parent or top[2] is not None:
+                self._resync(stack, parent, tid == self._home)
+            if event == "call":
+                stack.append(((stack[-1][0], code_label(frame.f_code)), frame, None))
+            else:
+                stack.append(((stack[-1][0], _c_label(arg)), frame, arg))
+            state.unwinding = None
+        else:
+            index = _find(stack, frame) if event == "return" else (len(stack) - 1 if stack[-1][2] is arg else None)
+            if index is not None and index > 0:
+                if state.unwinding is None:
+                    state.unwinding = stack[-1][0]
+                del stack[index:]
+            if len(stack) == 1 and event == "return" and tid == self._home:
+                # The task's outermost coroutine returned: it is suspended until its next event
+                state.waiting = state.unwinding
+        state.last = time.perf_counter()
+
+    @staticmethod
+    def _resync(stack: List[Tuple[tuple, object, object]], parent, home: bool) -> None:
+        """
+        Make `parent` the top of `stack`: truncate to it if known, else push its missing ancestors
+        (on the event-loop thread only up to the task's outermost frame, not the loop machinery).
+        """
+        missing = []
+        frame = parent
+        while frame is not None:
+            index = _find(stack, frame)
+            if index is not None:
+                del stack[index + 1:]
+                break
+            if home and frame.f_code is _LOOP_CALLBACK_CODE:  # a loop callback run in the request's context
+                del stack[1:]
+                break
+            missing.append(frame)
+            if home and _is_task_root(frame):
+                del stack[1:]
+                break
+            frame = frame.f_back
+        else:
+            del stack[1:]
+        for f in reversed(missing):
+            stack.append(((stack[-1][0], code_label(f.f_code)), f, None))
+
+
+def _find(stack: List[Tuple[tuple, object, object]], frame) -> Optional[int]:
+    for i in range(len(stack) - 1, 0, -1):
+        if stack[i][1] is frame and stack[i][2] is None:
+            return i
+    return None
+
+
+class StackSampler:
+    """Process-wide sampling profiler (all threads); toggled at runtime, see the module docstring."""
+
+    def __init__(self, interval: float = PROFILING_SAMPLER_INTERVAL_SECONDS, directory: str = PROFILING_DIR) -> None:
+        self.interval = interval
+        self.directory = Path(directory)
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self._counts: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, interval: Optional[float] = None) -> bool:
+        """Start sampling; False if already running."""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            if interval is not None:
+                self.interval = interval
+            self._counts = defaultdict(int)
+            self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> Optional[Path]:
+        """Stop sampling and write the folded file; None if it was not running."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return None
+            self._stop.set()
+            thread.join()
+            stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(self.started_at))
+            path = self.directory / f"sampler-{stamp}-{os.getpid()}.folded"
+            write_folded(path, ((list(frames), n) for frames, n in self._counts.items()))
+            return path
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "intervalSeconds": self.interval,
+            "samples": self.samples,
+            "stacks": len(self._counts),
+        }
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(code_label(frame.f_code))
+                    frame = frame.f_back
+                frames.append(f"thread:{names.get(tid, tid)}")
+                frames.reverse()
+                self._counts[tuple(frames)] += 1
+            self.samples += 1
+
+
+_sampler: Optional[StackSampler] = None
+
+
+def get_sampler() -> StackSampler:
+    """Singleton accessor (per process)."""
+    global _sampler
+    if _sampler is None:
+        _sampler = StackSampler()
+    return _sampler
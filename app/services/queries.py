@@ -0,0 +1,129 @@
+# app/services/queries.py
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Dialect
+from sqlalchemy.orm import Session
+
+from app.database import engine as default_engine
+from app.services.metrics import DB_QUERY_SECONDS
+
+
+@dataclass
+class QueryStats:
+    calls: int = 0
+    rows: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "rows": self.rows,
+            "totalMs": round(self.total_seconds * 1000, 3),
+            "meanMs": round(self.total_seconds * 1000 / self.calls, 3) if self.calls else 0.0,
+            "maxMs": round(self.max_seconds * 1000, 3),
+        }
+
+
+@dataclass
+class PreparedQuery:
+    """One hot statement: its SQL with :name binds, compiled once to the driver's paramstyle."""
+
+    name: str
+    sql: str
+    driver_sql: str
+    stats: QueryStats = field(default_factory=QueryStats)
+
+
+class QueryRegistry:
+    """
+    Hot-path SQL defined once and executed as server-side prepared statements.
+
+    Why:
+    - The read paths used to rebuild their SQL (f-string + text()) on every call, and SQLAlchemy
+      re-processed it each time before psycopg sent it to Postgres.
+    - Here every statement is compiled once at registration. It runs on the raw psycopg cursor with
+      prepare=True, so each pooled connection parses/plans it on first use and only sends
+      Bind/Execute afterwards. Without this, psycopg only prepares a statement after 5 runs on a
+      connection (prepare_threshold), and only if the SQL text is byte-identical each time.
+    - Per-statement call counts, rows and timings (stats()) show where DB time goes.
+
+    Notes:
+    - Prepared statements live per connection. A transaction-pooling proxy (PgBouncer in
+      transaction mode) breaks them; use session pooling or a direct connection.
+    - Statements run on the session's current connection and transaction, like db.execute().
+    - psycopg keeps at most `prepared_max` (100) statements per connection, far above what is
+      registered here.
+    """
+
+    def __init__(self, dialect: Dialect = default_engine.dialect) -> None:
+        self._dialect = dialect
+        self._queries: Dict[str, PreparedQuery] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, sql: str) -> PreparedQuery:
+        """Define a statement (idempotent for the same name and SQL)."""
+        with self._lock:
+            existing = self._queries.get(name)
+            if existing is not None:
+                if existing.sql != sql:
+                    raise ValueError(f"Query {name!r} is already registered with different SQL")
+                return existing
+            query = PreparedQuery(name, sql, str(text(sql).compile(dialect=self._dialect)))
+            self._queries[name] = query
+            return query
+
+    def get_or_register(self, name: str, build_sql: Callable[[], str]) -> PreparedQuery:
+        """Registered statement `name`, building its SQL on first use (for a bounded set of variants)."""
+        query = self._queries.get(name)
+        return query if query is not None else self.register(name, build_sql())
+
+    def fetch_all(self, db: Session, query: PreparedQuery, params: Mapping[str, Any]) -> List[Tuple[Any, ...]]:
+        """Run a registered statement in the session's transaction and return all rows."""
+        cursor = db.connection().connection.cursor()
+        started = time.perf_counter()
+        try:
+            cursor.execute(query.driver_sql, params, prepare=True)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        self._record(query, len(rows), time.perf_counter() - started)
+        return rows
+
+    def fetch_one(self, db: Session, query: PreparedQuery, params: Mapping[str, Any]) -> Optional[Tuple[Any, ...]]:
+        rows = self.fetch_all(db, query, params)
+        return rows[0] if rows else None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: q.stats.as_dict() for name, q in sorted(self._queries.items())}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for q in self._queries.values():
+                q.stats = QueryStats()
+
+    def _record(self, query: PreparedQuery, rows: int, elapsed: float) -> None:
+        DB_QUERY_SECONDS.labels(query.name).observe(elapsed)
+        with self._lock:
+            s = query.stats
+            s.calls += 1
+            s.rows += rows
+            s.total_seconds += elapsed
+            s.max_seconds = max(s.max_seconds, elapsed)
+
+
+_query_registry: Optional[QueryRegistry] = None
+
+
+def get_query_registry() -> QueryRegistry:
+    """Singleton accessor (per process)."""
+    global _query_registry
+    if _query_registry is None:
+        _query_registry = QueryRegistry()
+    return _query_registry
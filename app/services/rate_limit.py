@@ -0,0 +1,354 @@
+# app/services/rate_limit.py
+"""
+Ingest admission for POST /events: per-tenant / per-service token buckets and a fair write scheduler.
+
+Why:
+- One misbehaving service could flood POST /events and take every DB connection, starving all other
+  tenants. Limits per account.accountId and per reportingService cap each sender; the scheduler
+  keeps a tenant that is within its limit but bursty from monopolizing the insert slots.
+
+Design notes:
+- Token buckets: `rate` tokens per second up to `burst`; a request takes one token from its account
+  bucket and one from its service bucket, or from neither (a rejected request costs nothing). A
+  rejection carries the time until the emptiest bucket has a token again (Retry-After).
+- The check runs right after the body is parsed, before JSON Schema validation, so a flood is shed
+  at the cost of one JSON parse. Bodies without a usable accountId / reportingService are not
+  limited on that dimension; schema validation rejects them anyway.
+- In process (RATE_LIMIT_BACKEND=memory) the limits apply per worker: O(1) dict + refill arithmetic
+  per request, bucket tables bounded by RATE_LIMIT_MAX_KEYS (LRU; an evicted bucket comes back full).
+  With RATE_LIMIT_BACKEND=redis all workers share the buckets: one EVALSHA round-trip per request,
+  refill and take done atomically in Lua on Redis' clock. If Redis is unreachable, requests are
+  admitted (limits are protection, not correctness) and the failure is logged once.
+- FairScheduler: with INGEST_WRITE_CONCURRENCY set, at most that many inserts run in the threadpool
+  at once per worker. When all slots are busy, waiting requests queue per tenant and freed slots go
+  round-robin over the tenants with waiters, so a flood queues behind itself. Every operation is
+  O(1) (deques); INGEST_MAX_QUEUED_PER_TENANT bounds a tenant's queue (excess -> 429).
+"""
+import asyncio
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+from redis import asyncio as aioredis
+
+from app.config import (
+    INGEST_MAX_QUEUED_PER_TENANT,
+    INGEST_WRITE_CONCURRENCY,
+    RATE_LIMIT_ACCOUNT_BURST,
+    RATE_LIMIT_ACCOUNT_PER_SECOND,
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_SERVICE_BURST,
+    RATE_LIMIT_SERVICE_PER_SECOND,
+    REDIS_URL,
+)
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT = "account"
+SERVICE = "reportingService"
+INGEST_QUEUE = "ingestQueue"
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request is over a limit; `retry_after` is in seconds."""
+
+    def __init__(self, dimension: str, retry_after: float) -> None:
+        super().__init__(f"{dimension} rate limit exceeded")
+        self.dimension = dimension
+        self.retry_after = retry_after
+
+
+def rate_limit_keys(payload: Any) -> Tuple[Optional[str], Optional[str]]:
+    """(accountId, reportingService) of an unvalidated POST /events body; None where unusable."""
+    if not isinstance(payload, dict):
+        return None, None
+    account = payload.get("account")
+    account_id = account.get("accountId") if isinstance(account, dict) else None
+    service = payload.get("reportingService")
+    return (
+        account_id if isinstance(account_id, str) else None,
+        service.lower() if isinstance(service, str) else None,
+    )
+
+
+class RateLimiter(ABC):
+    """Token buckets per account and per reporting service; see the module docstring."""
+
+    def __init__(self, account_rate: float, account_burst: float, service_rate: float, service_burst: float) -> None:
+        # rate <= 0 disables that dimension; burst <= 0 means one second's worth (at least 1)
+        self.account_rate = account_rate
+        self.account_burst = account_burst if account_burst > 0 else max(1.0, account_rate)
+        self.service_rate = service_rate
+        self.service_burst = service_burst if service_burst > 0 else max(1.0, service_rate)
+        self.admitted = 0
+        self.limited: Dict[str, int] = {ACCOUNT: 0, SERVICE: 0}
+        self.errors = 0
+
+    @abstractmethod
+    async def check(self, account_id: Optional[str], service: Optional[str]) -> None:
+        """Take one token per limited dimension, or raise RateLimitExceeded (taking none)."""
+
+    def _limits(self, account_id: Optional[str], service: Optional[str]) -> List[Tuple[str, str, float, float]]:
+        """(dimension, key, rate, burst) of the buckets that apply to this request."""
+        limits = []
+        if account_id is not None and self.account_rate > 0:
+            limits.append((ACCOUNT, account_id, self.account_rate, self.account_burst))
+        if service is not None and self.service_rate > 0:
+            limits.append((SERVICE, service, self.service_rate, self.service_burst))
+        return limits
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "admitted": self.admitted,
+            "limited": dict(self.limited),
+            "errors": self.errors,
+        }
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+
+
+class InProcessRateLimiter(RateLimiter):
+    """Per-worker buckets (RATE_LIMIT_BACKEND=memory)."""
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        account_rate: float = RATE_LIMIT_ACCOUNT_PER_SECOND,
+        account_burst: float = RATE_LIMIT_ACCOUNT_BURST,
+        service_rate: float = RATE_LIMIT_SERVICE_PER_SECOND,
+        service_burst: float = RATE_LIMIT_SERVICE_BURST,
+        max_keys: int = RATE_LIMIT_MAX_KEYS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(account_rate, account_burst, service_rate, service_burst)
+        self._max_keys = max(1, max_keys)
+        self._clock = clock
+        self._buckets: Dict[str, "OrderedDict[str, _Bucket]"] = {ACCOUNT: OrderedDict(), SERVICE: OrderedDict()}
+        self._lock = threading.Lock()
+
+    async def check(self, account_id: Optional[str], service: Optional[str]) -> None:
+        self.check_now(account_id, service)
+
+    def check_now(self, account_id: Optional[str], service: Optional[str]) -> None:
+        """Synchronous check (no I/O involved)."""
+        limits = self._limits(account_id, service)
+        now = self._clock()
+        with self._lock:
+            buckets = [(dimension, rate, self._refill(dimension, key, rate, burst, now))
+                       for dimension, key, rate, burst in limits]
+            for dimension, rate, bucket in buckets:
+                if bucket.tokens < 1:
+                    self.limited[dimension] += 1
+                    raise RateLimitExceeded(dimension, (1 - bucket.tokens) / rate)
+            for _, _, bucket in buckets:
+                bucket.tokens -= 1
+            self.admitted += 1
+
+    def _refill(self, dimension: str, key: str, rate: float, burst: float, now: float) -> _Bucket:
+        table = self._buckets[dimension]
+        bucket = table.get(key)
+        if bucket is None:
+            bucket = table[key] = _Bucket(burst, now)
+            if len(table) > self._max_keys:
+                table.popitem(last=False)  # least recently used
+            return bucket
+        table.move_to_end(key)
+        bucket.tokens = min(burst, bucket.tokens + (now - bucket.updated) * rate)
+        bucket.updated = now
+        return bucket
+
+    def __len__(self) -> int:
+        return sum(len(table) for table in self._buckets.values())
+
+
+# Refill and take for up to two buckets, all or nothing. ARGV: rate, burst per key.
+# Returns {0, "0"} when admitted, else {index of the empty bucket (1-based), seconds until a token}.
+_TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local level = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    level = math.min(burst, level + math.max(0, now - ts) * rate)
+    if level < 1 then
+        return {i, tostring((1 - level) / rate)}
+    end
+    tokens[i] = level
+end
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', tokens[i] - 1, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+end
+return {0, '0'}
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Buckets shared by every worker (RATE_LIMIT_BACKEND=redis); fails open when Redis is down."""
+
+    backend = "redis"
+
+    def __init__(
+        self,
+        url: str = REDIS_URL,
+        account_rate: float = RATE_LIMIT_ACCOUNT_PER_SECOND,
+        account_burst: float = RATE_LIMIT_ACCOUNT_BURST,
+        service_rate: float = RATE_LIMIT_SERVICE_PER_SECOND,
+        service_burst: float = RATE_LIMIT_SERVICE_BURST,
+        prefix: str = "audit-events:ratelimit",
+    ) -> None:
+        super().__init__(account_rate, account_burst, service_rate, service_burst)
+        self._redis = aioredis.Redis.from_url(url, decode_responses=True)
+        self._take = self._redis.register_script(_TAKE_SCRIPT)
+        self._prefix = prefix
+        self._failing = False
+
+    async def check(self, account_id: Optional[str], service: Optional[str]) -> None:
+        limits = self._limits(account_id, service)
+        if not limits:
+            self.admitted += 1
+            return
+        keys = [f"{self._prefix}:{dimension}:{key}" for dimension, key, _, _ in limits]
+        args = [value for _, _, rate, burst in limits for value in (rate, burst)]
+        try:
+            index, retry_after = await self._take(keys=keys, args=args)
+        except Exception:
+            self.errors += 1
+            if not self._failing:
+                self._failing = True
+                logger.exception("Redis rate limiter unavailable; admitting requests unlimited")
+            self.admitted += 1
+            return
+        if self._failing:
+            self._failing = False
+            logger.info("Redis rate limiter recovered")
+        if int(index):
+            dimension = limits[int(index) - 1][0]
+            self.limited[dimension] += 1
+            raise RateLimitExceeded(dimension, float(retry_after))
+        self.admitted += 1
+
+
+class FairScheduler:
+    """Round-robin over tenants for a fixed number of concurrent ingest writes; see the module docstring."""
+
+    def __init__(self, slots: int, max_queued_per_tenant: int = 0) -> None:
+        self.slots = max(1, slots)
+        self.max_queued_per_tenant = max_queued_per_tenant
+        self._free = self.slots
+        self._queues: Dict[str, Deque[asyncio.Future]] = {}
+        self._ring: Deque[str] = deque()  # tenants with waiters, in service order
+        self.granted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    async def acquire(self, tenant: str) -> None:
+        """Wait for a write slot; raises RateLimitExceeded if the tenant's queue is full."""
+        if self._free > 0 and not self._ring:
+            self._free -= 1
+            self.granted += 1
+            return
+        queue = self._queues.get(tenant)
+        if queue is None:
+            queue = self._queues[tenant] = deque()
+            self._ring.append(tenant)
+        elif self.max_queued_per_tenant and len(queue) >= self.max_queued_per_tenant:
+            self.rejected += 1
+            raise RateLimitExceeded(INGEST_QUEUE, 1.0)
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        self.queued += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # the slot was handed over as we were cancelled: pass it on
+            raise  # a still-queued waiter is skipped (and dropped) by release()
+        self.granted += 1
+
+    def release(self) -> None:
+        """Free a slot: hand it to the next tenant in round-robin order, or return it to the pool."""
+        while self._ring:
+            tenant = self._ring.popleft()
+            queue = self._queues[tenant]
+            while queue and queue[0].done():
+                queue.popleft()  # cancelled while waiting
+            if not queue:
+                del self._queues[tenant]
+                continue
+            waiter = queue.popleft()
+            if queue:
+                self._ring.append(tenant)
+            else:
+                del self._queues[tenant]
+            waiter.set_result(None)
+            return
+        self._free += 1
+
+    @asynccontextmanager
+    async def slot(self, tenant: str) -> AsyncIterator[None]:
+        await self.acquire(tenant)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "busy": self.slots - self._free,
+            "waiting": sum(len(q) for q in self._queues.values()),
+            "tenantsWaiting": len(self._ring),
+            "granted": self.granted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+
+# Singleton accessors (None when the feature is off)
+_limiter: Optional[RateLimiter] = None
+_limiter_ready = False
+_scheduler: Optional[FairScheduler] = None
+_scheduler_ready = False
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Returns the process-wide limiter based on RATE_LIMIT_BACKEND, or None when neither
+    RATE_LIMIT_ACCOUNT_PER_SECOND nor RATE_LIMIT_SERVICE_PER_SECOND is set:
+      - "memory" -> InProcessRateLimiter (default; per worker)
+      - "redis"  -> RedisRateLimiter (shared across workers)
+    """
+    global _limiter, _limiter_ready
+    if not _limiter_ready:
+        if RATE_LIMIT_ACCOUNT_PER_SECOND > 0 or RATE_LIMIT_SERVICE_PER_SECOND > 0:
+            _limiter = RedisRateLimiter() if RATE_LIMIT_BACKEND == "redis" else InProcessRateLimiter()
+        _limiter_ready = True
+    return _limiter
+
+
+def get_ingest_scheduler() -> Optional[FairScheduler]:
+    """The process-wide FairScheduler, or None when INGEST_WRITE_CONCURRENCY is 0 (unbounded inserts)."""
+    global _scheduler, _scheduler_ready
+    if not _scheduler_ready:
+        if INGEST_WRITE_CONCURRENCY > 0:
+            _scheduler = FairScheduler(INGEST_WRITE_CONCURRENCY, INGEST_MAX_QUEUED_PER_TENANT)
+        _scheduler_ready = True
+    return _scheduler
@@ -0,0 +1,147 @@
+# app/services/read_routing.py
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.config import (
+    READ_REPLICA_LAG_CHECK_SECONDS,
+    READ_REPLICA_MAX_LAG_SECONDS,
+    READ_YOUR_WRITES_MARGIN_SECONDS,
+)
+from app.database import read_engine
+
+logger = logging.getLogger(__name__)
+
+# Request headers understood by the router
+CONSISTENCY_HEADER = "X-Consistency"  # "strong" -> always read from the primary
+READ_AFTER_HEADER = "X-Read-After"    # write timestamp (epoch ms) returned by POST /events
+
+# Routing decisions (counted per reason)
+REASON_REPLICA = "replica"
+REASON_NO_REPLICA = "no_replica"
+REASON_STRONG = "strong"
+REASON_LAG = "lag"
+REASON_UNHEALTHY = "replica_unhealthy"
+REASON_READ_YOUR_WRITES = "read_your_writes"
+REASON_MISS_FALLBACK = "miss_fallback"
+
+LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0  -- caught up (idle primary)
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class ReplicaLagTracker:
+    """
+    Measures replica replay lag, at most once per check interval.
+
+    Notes:
+    - Refreshed lazily by the reads themselves (no background task); a single thread refreshes while
+      concurrent readers keep using the last value.
+    - A failed measurement marks the replica unhealthy (lag None) until the next successful check.
+    """
+
+    def __init__(self, engine: Engine, check_interval: float = READ_REPLICA_LAG_CHECK_SECONDS) -> None:
+        self._engine = engine
+        self._check_interval = check_interval
+        self._lag: Optional[float] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def lag_seconds(self) -> Optional[float]:
+        """Last measured lag in seconds, or None if the replica is unreachable."""
+        if time.monotonic() - self._checked_at >= self._check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._lag = self._measure()
+                self._checked_at = time.monotonic()
+            finally:
+                self._lock.release()
+        return self._lag
+
+    def _measure(self) -> Optional[float]:
+        try:
+            with self._engine.connect() as conn:
+                return float(conn.execute(LAG_SQL).scalar() or 0.0)
+        except Exception as ex:
+            logger.warning("Replica lag check failed; routing reads to the primary: %s", ex)
+            return None
+
+
+class ReadRouter:
+    """
+    Decides per request whether a read may be served by the replica.
+
+    Why:
+    - Heavy list queries compete with ingestion on the primary; replicas take them off it.
+    - Replicas lag, so some reads must still go to the primary:
+        * X-Consistency: strong                        -> primary
+        * replica unreachable or lag > max lag         -> primary
+        * X-Read-After (epoch ms of the caller's write, returned by POST) younger than
+          lag + margin                                 -> primary (read-your-writes)
+        * by-id miss on the replica                    -> retried on the primary (see events router)
+    - Every decision is counted by reason (stats()).
+    """
+
+    def __init__(self, tracker: Optional[ReplicaLagTracker]) -> None:
+        self.tracker = tracker
+        self._decisions: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def use_replica(self, consistency: Optional[str] = None, read_after: Optional[str] = None) -> bool:
+        """True if this read can go to the replica (records the routing decision)."""
+        if self.tracker is None:
+            return self._decide(False, REASON_NO_REPLICA)
+        if (consistency or "").lower() == "strong":
+            return self._decide(False, REASON_STRONG)
+        lag = self.tracker.lag_seconds()
+        if lag is None:
+            return self._decide(False, REASON_UNHEALTHY)
+        if lag > READ_REPLICA_MAX_LAG_SECONDS:
+            return self._decide(False, REASON_LAG)
+        written_ms = _parse_epoch_ms(read_after)
+        if written_ms is not None and time.time() * 1000 - written_ms < (lag + READ_YOUR_WRITES_MARGIN_SECONDS) * 1000:
+            return self._decide(False, REASON_READ_YOUR_WRITES)
+        return self._decide(True, REASON_REPLICA)
+
+    def record(self, reason: str) -> None:
+        with self._lock:
+            self._decisions[reason] += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            decisions = dict(self._decisions)
+        lag = self.tracker.lag_seconds() if self.tracker is not None else None
+        return {"replicaConfigured": self.tracker is not None, "lagSeconds": lag, "decisions": decisions}
+
+    def _decide(self, replica: bool, reason: str) -> bool:
+        self.record(reason)
+        return replica
+
+
+def _parse_epoch_ms(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None  # malformed token: ignore rather than fail the read
+
+
+_read_router: Optional[ReadRouter] = None
+
+
+def get_read_router() -> ReadRouter:
+    """Singleton accessor (per process)."""
+    global _read_router
+    if _read_router is None:
+        _read_router = ReadRouter(ReplicaLagTracker(read_engine) if read_engine is not None else None)
+    return _read_router
@@ -0,0 +1,132 @@
+# app/services/sharding.py
+"""
+Optional hash sharding of audit_events across several Postgres databases, by tenant.
+
+Enabled by SHARD_DATABASE_URLS (comma-separated, order defines shard numbers 0..N-1). Each shard is a
+full database with the normal schema; migrate them all with:
+
+    python -m app.services.sharding migrate
+
+Placement and routing:
+  - An event lives on shard crc32(account.accountId) % N, so a tenant's events (and its list queries)
+    stay on one shard.
+  - The shard number is also written into the last byte of the event ID, so GET /events/{id} goes
+    straight to the right shard. IDs without a valid hint (issued before sharding) fall back to
+    asking every shard.
+  - Cross-shard lists query every shard with the same filters/limit and merge-sort the results on
+    (ingestedAt, eventId); tenant-filtered lists query only the owning shard.
+
+Notes:
+  - N must not change without moving data (placement is plain modulo, no consistent hashing).
+  - Background jobs (retention, outbox relay) iterate over all shards; leader election stays on
+    the DATABASE_URL database.
+"""
+import os
+import subprocess
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, TypeVar
+from uuid import UUID
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import SHARD_DATABASE_URLS
+from app.services.metrics import instrument_engine, instrumented_pool
+
+T = TypeVar("T")
+
+# The shard hint is one byte of the event ID.
+MAX_SHARDS = 256
+
+
+def with_shard_hint(event_id: UUID, shard: int) -> UUID:
+    """Return event_id with its last byte replaced by the shard number (version/variant bits untouched)."""
+    return UUID(int=(event_id.int & ~0xFF) | shard)
+
+
+def shard_hint(event_id: UUID) -> int:
+    """Shard number encoded in an event ID (may be out of range for IDs issued before sharding)."""
+    return event_id.int & 0xFF
+
+
+class ShardRouter:
+    """Engines for the shard databases plus the placement rules."""
+
+    def __init__(self, urls: Sequence[str]) -> None:
+        if not 1 <= len(urls) <= MAX_SHARDS:
+            raise ValueError(f"SHARD_DATABASE_URLS must list 1..{MAX_SHARDS} databases, got {len(urls)}")
+        self.urls = list(urls)
+        self.engines: List[Engine] = [
+            instrument_engine(f"shard{i}", create_engine(url, future=True, pool_pre_ping=True, poolclass=instrumented_pool(f"shard{i}")))
+            for i, url in enumerate(self.urls)
+        ]
+        self._sessions = [sessionmaker(autocommit=False, autoflush=False, bind=e, future=True) for e in self.engines]
+        self._pool = ThreadPoolExecutor(max_workers=len(self.urls), thread_name_prefix="shard")
+
+    @property
+    def count(self) -> int:
+        return len(self.engines)
+
+    def shard_for_account(self, account_id: str) -> int:
+        return zlib.crc32(account_id.encode("utf-8")) % self.count
+
+    def session(self, shard: int) -> Session:
+        return self._sessions[shard]()
+
+    def lookup_order(self, event_id: UUID) -> List[int]:
+        """Shards to ask for an event ID: the hinted shard first, then the rest."""
+        hint = shard_hint(event_id)
+        if hint >= self.count:
+            return list(range(self.count))
+        return [hint] + [s for s in range(self.count) if s != hint]
+
+    def map(self, fn: Callable[[Session], T], shards: Optional[Sequence[int]] = None) -> List[T]:
+        """Run fn(session) on each shard in parallel; results in shard order."""
+        def run(shard: int) -> T:
+            with self.session(shard) as db:
+                return fn(db)
+        targets = list(range(self.count)) if shards is None else list(shards)
+        if len(targets) == 1:
+            return [run(targets[0])]
+        return list(self._pool.map(run, targets))
+
+    def dispose(self) -> None:
+        self._pool.shutdown(wait=False)
+        for e in self.engines:
+            e.dispose()
+
+
+def parse_shard_urls(value: str) -> List[str]:
+    return [u.strip() for u in value.split(",") if u.strip()]
+
+
+_shard_router: Optional[ShardRouter] = None
+
+
+def get_shard_router() -> Optional[ShardRouter]:
+    """Singleton accessor; None when sharding is not configured."""
+    global _shard_router
+    if _shard_router is None and SHARD_DATABASE_URLS:
+        _shard_router = ShardRouter(parse_shard_urls(SHARD_DATABASE_URLS))
+    return _shard_router
+
+
+def migrate_shards(urls: Sequence[str]) -> None:
+    """Run `alembic upgrade head` against every shard database."""
+    root = Path(__file__).resolve().parents[2]
+    for url in urls:
+        subprocess.run(
+            [sys.executable, "-m", "alembic", "upgrade", "head"],
+            cwd=root, env={**os.environ, "DATABASE_URL": url}, check=True,
+        )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["migrate"]:
+        print("usage: python -m app.services.sharding migrate", file=sys.stderr)
+        sys.exit(2)
+    migrate_shards(parse_shard_urls(SHARD_DATABASE_URLS))
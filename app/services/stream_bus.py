@@ -1,14 +1,74 @@
 # app/services/stream_bus.py
-import json
+import asyncio
 import logging
-from typing import Any, Dict, Optional
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Set, Union
 
+import psycopg
 from redis import asyncio as aioredis
-from app.config import REDIS_URL, STREAM_CHANNEL
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from app.config import (
+    DATABASE_URL,
+    REDIS_URL,
+    SHARD_DATABASE_URLS,
+    STREAM_BUS_BACKEND,
+    STREAM_CHANNEL,
+    STREAM_PG_NOTIFY_PAYLOAD,
+    STREAM_QUEUE_MAXSIZE,
+)
+from app.database import SessionLocal
+from app.services import json_codec
 
 logger = logging.getLogger(__name__)
 
-class RedisBus:
+Payload = Union[str, bytes]
+
+
+class StreamBus(ABC):
+    """Minimal pub/sub interface so /stream and POST /events do not depend on the transport (Redis, in-process)."""
+
+    @abstractmethod
+    async def publish(self, event_json: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    async def open_subscriber(self) -> Any:
+        ...
+
+    @abstractmethod
+    async def get_message(self, subscriber: Any, timeout: float) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def listen(self, subscriber: Any) -> AsyncIterator[Payload]:
+        """Yield raw compact-JSON payloads (one event each) as they arrive."""
+        ...
+
+    @abstractmethod
+    async def close_subscriber(self, subscriber: Any) -> None:
+        ...
+
+    async def publish_many(self, payloads: Sequence[str]) -> None:
+        """Publish pre-encoded compact-JSON payloads in order (used by the outbox relay)."""
+        for payload in payloads:
+            await self.publish(json_codec.loads(payload))
+
+
+class TransactionalBus(ABC):
+    """
+    Mixin for buses that publish from INSIDE the insert transaction via stage(); the caller then
+    skips the post-commit publish(). Callers check isinstance(bus, TransactionalBus).
+    """
+
+    @abstractmethod
+    def stage(self, db: Session, event_json: Dict[str, Any]) -> None:
+        """Publish as part of the caller's open DB transaction."""
+        ...
+
+
+class RedisBus(StreamBus):
     """Redis Pub/Sub fan-out across multiple workers."""
 
     def __init__(self, url: str = REDIS_URL, channel: str = STREAM_CHANNEL):
@@ -17,9 +77,16 @@ class RedisBus:
         self._pub = aioredis.Redis.from_url(self._url, decode_responses=True)
 
     async def publish(self, event_json: Dict[str, Any]) -> None:
-        payload = json.dumps(event_json, separators=(",", ":"), ensure_ascii=False)
-        await self._pub.publish(self._channel, payload)
+        await self._pub.publish(self._channel, json_codec.dumps(event_json))
 
+    async def publish_many(self, payloads: Sequence[str]) -> None:
+        """Pipelined publish: one round-trip per batch instead of one per event."""
+        if not payloads:
+            return
+        async with self._pub.pipeline(transaction=False) as pipe:
+            for payload in payloads:
+                pipe.publish(self._channel, payload)
+            await pipe.execute()
 
     async def open_subscriber(self):
         """Create and subscribe a dedicated PubSub connection (ignoring subscribe messages)."""
@@ -40,7 +107,7 @@ class RedisBus:
             if not data:
                 return None
             try:
-                return json.loads(data)
+                return json_codec.loads(data)
             except Exception as ex:
                 logger.exception("redis_bus: failed to decode message: %s", ex)
                 return None
@@ -48,6 +115,12 @@ class RedisBus:
             logger.exception("redis_bus: get_message error: %s", ex)
             return None
 
+    async def listen(self, pubsub) -> AsyncIterator[Payload]:
+        async for msg in pubsub.listen():
+            data = msg.get("data")
+            if data:
+                yield data
+
     async def close_subscriber(self, pubsub) -> None:
         try:
             await pubsub.unsubscribe(self._channel)
@@ -58,11 +131,229 @@ class RedisBus:
         except Exception:
             pass
 
+
+class _MemorySubscriber:
+    """Bounded per-subscriber queue of encoded payloads (drop-oldest if the reader falls behind)."""
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, maxsize: int) -> None:
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, payload: bytes) -> None:
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(payload)
+
+
+class InMemoryBus(StreamBus):
+    """
+    In-process fan-out for single-worker deployments.
+
+    Why:
+    - With one uvicorn worker, Redis only adds two network trips per event.
+    - publish() encodes the event ONCE and hands the same bytes object to every subscriber queue.
+
+    Notes:
+    - Events published by other processes are NOT seen; use RedisBus for multi-worker setups.
+    - Must be used from the event loop thread (asyncio queues are not thread-safe).
+    """
+
+    def __init__(self, maxsize: int = STREAM_QUEUE_MAXSIZE) -> None:
+        self._maxsize = max(1, maxsize)
+        self._subscribers: Set[_MemorySubscriber] = set()
+
+    async def publish(self, event_json: Dict[str, Any]) -> None:
+        if not self._subscribers:
+            return
+        self._fan_out(json_codec.dumps(event_json))
+
+    async def publish_many(self, payloads: Sequence[str]) -> None:
+        for payload in payloads:
+            self._fan_out(payload.encode("utf-8"))
+
+    def _fan_out(self, payload: bytes) -> None:
+        for sub in tuple(self._subscribers):
+            sub.offer(payload)
+
+    async def open_subscriber(self) -> _MemorySubscriber:
+        sub = _MemorySubscriber(self._maxsize)
+        self._subscribers.add(sub)
+        return sub
+
+    async def get_message(self, sub: _MemorySubscriber, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            data = await asyncio.wait_for(sub.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        try:
+            return json_codec.loads(data)
+        except Exception as ex:
+            logger.exception("memory_bus: failed to decode message: %s", ex)
+            return None
+
+    async def listen(self, sub: _MemorySubscriber) -> AsyncIterator[Payload]:
+        while True:
+            yield await sub.queue.get()
+
+    async def close_subscriber(self, sub: _MemorySubscriber) -> None:
+        self._subscribers.discard(sub)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+PG_NOTIFY_MAX_PAYLOAD_BYTES = 7999
+
+
+class PgNotifyBus(InMemoryBus, TransactionalBus):
+    """
+    Postgres LISTEN/NOTIFY bus: the NOTIFY is issued inside the insert transaction.
+
+    Why:
+    - No extra service: stream delivery keeps working when Redis is unavailable.
+    - Postgres delivers notifications only on COMMIT, so there is no "committed but not
+      published" window (and a rolled back insert is never streamed).
+
+    Design notes:
+    - Payload is either the compact event JSON or just the eventId (STREAM_PG_NOTIFY_PAYLOAD).
+      JSON payloads that would exceed the NOTIFY size limit automatically fall back to the ID;
+      listeners tell them apart by the leading '{'.
+    - One dedicated LISTEN connection per worker (started lazily with the first subscriber)
+      fans out to local subscriber queues, reusing InMemoryBus.
+    - ID payloads are resolved through the read-through cache / DB before fan-out.
+    """
+
+    def __init__(
+        self,
+        database_url: str = DATABASE_URL,
+        channel: str = STREAM_CHANNEL,
+        payload_mode: str = STREAM_PG_NOTIFY_PAYLOAD,
+        maxsize: int = STREAM_QUEUE_MAXSIZE,
+    ) -> None:
+        super().__init__(maxsize=maxsize)
+        # psycopg wants a plain libpq URL (no SQLAlchemy "+driver" suffix).
+        self._dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._channel = channel
+        self._payload_mode = payload_mode
+        self._listener: Optional[asyncio.Task] = None
+        self._listening = asyncio.Event()
+
+    def encode_payload(self, event_json: Dict[str, Any]) -> str:
+        """Return the NOTIFY payload for an event (compact JSON, or eventId if too large / configured)."""
+        if self._payload_mode == "json":
+            payload = json_codec.dumps(event_json)
+            if len(payload) <= PG_NOTIFY_MAX_PAYLOAD_BYTES:
+                return payload.decode("utf-8")
+        return str(event_json["eventId"])
+
+    def stage(self, db: Session, event_json: Dict[str, Any]) -> None:
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": self._channel, "payload": self.encode_payload(event_json)},
+        )
+
+    async def publish(self, event_json: Dict[str, Any]) -> None:
+        """Out-of-transaction publish (own short transaction); used when there is no insert to tie to."""
+        payload = self.encode_payload(event_json)
+        async with await psycopg.AsyncConnection.connect(self._dsn, autocommit=True) as conn:
+            await conn.execute("SELECT pg_notify(%s, %s)", (self._channel, payload))
+
+    async def publish_many(self, payloads: Sequence[str]) -> None:
+        """Batch publish over one connection and one transaction (notifications are sent in order on commit)."""
+        if not payloads:
+            return
+        notify_payloads = []
+        for payload in payloads:
+            if self._payload_mode == "json" and len(payload.encode("utf-8")) <= PG_NOTIFY_MAX_PAYLOAD_BYTES:
+                notify_payloads.append(payload)
+            else:
+                notify_payloads.append(str(json_codec.loads(payload)["eventId"]))
+        async with await psycopg.AsyncConnection.connect(self._dsn) as conn:
+            async with conn.cursor() as cur:
+                await cur.executemany(
+                    "SELECT pg_notify(%s, %s)", [(self._channel, p) for p in notify_payloads]
+                )
+            await conn.commit()
+
+    async def open_subscriber(self):
+        if self._listener is None or self._listener.done():
+            self._listening.clear()
+            self._listener = asyncio.create_task(self._listen_loop(), name="pg-notify-listener")
+        sub = await super().open_subscriber()
+        # Make sure LISTEN is active before the caller relies on the subscription.
+        try:
+            await asyncio.wait_for(self._listening.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            await super().close_subscriber(sub)
+            raise RuntimeError("pg_notify listener is not connected")
+        return sub
+
+    async def _listen_loop(self) -> None:
+        """Hold the single LISTEN connection of this worker; reconnect with backoff on failure."""
+        backoff = 0.5
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._dsn, autocommit=True) as conn:
+                    channel = self._channel.replace('"', '""')
+                    await conn.execute(f'LISTEN "{channel}"')
+                    self._listening.set()
+                    backoff = 0.5
+                    logger.info("pg_notify_bus: listening on channel %s", self._channel)
+                    async for notify in conn.notifies():
+                        await self._deliver(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.exception("pg_notify_bus: listener error (reconnecting): %s", ex)
+            self._listening.clear()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 10.0)
+
+    async def _deliver(self, payload: str) -> None:
+        if not self._subscribers or not payload:
+            return
+        if payload.startswith("{"):
+            self._fan_out(payload.encode("utf-8"))
+            return
+        # ID payload: resolve the event (cache first, then DB) and fan out its JSON.
+        event_json = await asyncio.to_thread(self._load_event, payload)
+        if event_json is None:
+            logger.warning("pg_notify_bus: notified event %s not found", payload)
+            return
+        self._fan_out(json_codec.dumps(event_json))
+
+    @staticmethod
+    def _load_event(event_id: str) -> Optional[Dict[str, Any]]:
+        from app.services.events_service import get_event_by_id
+        with SessionLocal() as db:
+            return get_event_by_id(db, event_id)
+
+
 # Singleton accessor
-_bus: Optional[RedisBus] = None
+_bus: Optional[StreamBus] = None
 
-def get_stream_bus() -> RedisBus:
+def get_stream_bus() -> StreamBus:
+    """
+    Returns the process-wide stream bus based on STREAM_BUS_BACKEND:
+      - "redis"  -> RedisBus (default; fan-out across workers and replicas)
+      - "memory" -> InMemoryBus (single worker; no network hop)
+      - "pgnotify" -> PgNotifyBus (NOTIFY inside the insert transaction)
+    """
     global _bus
     if _bus is None:
-        _bus = RedisBus()
+        if STREAM_BUS_BACKEND == "memory":
+            _bus = InMemoryBus()
+        elif STREAM_BUS_BACKEND == "pgnotify":
+            if SHARD_DATABASE_URLS:
+                # NOTIFY is per database and the listener holds one connection to DATABASE_URL
+                raise ValueError("STREAM_BUS_BACKEND=pgnotify does not support SHARD_DATABASE_URLS; use redis")
+            _bus = PgNotifyBus()
+        else:
+            _bus = RedisBus()
     return _bus
@@ -0,0 +1,147 @@
+# app/services/stream_client.py
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from uuid import uuid4
+
+from app.config import (
+    STREAM_QUEUE_MAXSIZE,
+    STREAM_SLOW_CONSUMER_POLICY,
+    STREAM_SPILL_MAX_BYTES,
+    STREAM_WRITE_BUDGET_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_DISCONNECT = "disconnect"
+POLICY_SPILL = "spill"
+POLICIES = (POLICY_DROP_OLDEST, POLICY_DISCONNECT, POLICY_SPILL)
+
+
+class StreamClientQueue:
+    """
+    Per-client buffer of encoded NDJSON lines for /stream.
+
+    Why:
+    - Coalesce everything queued since the last wakeup into ONE write (bounded by a byte budget)
+      instead of one chunk/syscall per event.
+    - Make the slow-consumer behavior explicit and configurable instead of silently dropping.
+
+    Policies (applied once `maxsize` lines are queued):
+    - "drop_oldest": evict the oldest line to make room (previous behavior, now counted).
+    - "disconnect":  mark the client as overflowed; the generator closes the stream.
+    - "spill":       keep buffering beyond `maxsize` until `spill_max_bytes` is reached,
+                     then disconnect (no silent loss).
+
+    Notes:
+    - put() is synchronous and O(1); it is called from the reader task on the same event loop.
+    - Lines are stored already encoded, so draining is a plain bytes join.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = STREAM_QUEUE_MAXSIZE,
+        policy: str = STREAM_SLOW_CONSUMER_POLICY,
+        spill_max_bytes: int = STREAM_SPILL_MAX_BYTES,
+    ) -> None:
+        if policy not in POLICIES:
+            logger.warning("stream: unknown slow-consumer policy %r; using %s", policy, POLICY_DROP_OLDEST)
+            policy = POLICY_DROP_OLDEST
+        self.client_id = uuid4().hex[:12]
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.spill_max_bytes = spill_max_bytes
+        self._lines: Deque[bytes] = deque()
+        self._bytes = 0
+        self._ready = asyncio.Event()
+
+        # Per-client counters
+        self.overflowed = False
+        self.enqueued = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.delivered = 0
+        self.writes = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._lines)
+
+    def put(self, line: bytes) -> None:
+        """Enqueue one encoded NDJSON line, applying the slow-consumer policy if the buffer is full."""
+        if self.overflowed:
+            self.dropped += 1
+            return
+
+        if len(self._lines) >= self.maxsize:
+            if self.policy == POLICY_DROP_OLDEST:
+                old = self._lines.popleft()
+                self._bytes -= len(old)
+                self.dropped += 1
+            elif self.policy == POLICY_SPILL and self._bytes + len(line) <= self.spill_max_bytes:
+                self.spilled += 1
+            else:
+                # "disconnect", or "spill" with the spill budget exhausted.
+                self.overflowed = True
+                self.dropped += 1
+                self._ready.set()  # wake the generator so it can close the stream
+                return
+
+        self._lines.append(line)
+        self._bytes += len(line)
+        self.enqueued += 1
+        if len(self._lines) > self.max_depth:
+            self.max_depth = len(self._lines)
+        self._ready.set()
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until at least one line is queued (or the client overflowed). Returns False on timeout."""
+        if timeout is None:
+            await self._ready.wait()
+            return True
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def drain(self, budget_bytes: int = STREAM_WRITE_BUDGET_BYTES) -> bytes:
+        """
+        Pop queued lines up to `budget_bytes` and return them as a single chunk.
+        At least one line is always returned (if any), even if it alone exceeds the budget.
+        """
+        parts: List[bytes] = []
+        size = 0
+        lines = self._lines
+        while lines:
+            nxt = len(lines[0])
+            if parts and size + nxt > budget_bytes:
+                break
+            parts.append(lines.popleft())
+            size += nxt
+        self._bytes -= size
+        if not lines:
+            self._ready.clear()
+        if parts:
+            self.delivered += len(parts)
+            self.writes += 1
+        return b"".join(parts)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clientId": self.client_id,
+            "policy": self.policy,
+            "queueDepth": self.depth,
+            "queuedBytes": self._bytes,
+            "maxDepth": self.max_depth,
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "writes": self.writes,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "overflowed": self.overflowed,
+        }
+
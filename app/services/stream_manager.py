@@ -0,0 +1,115 @@
+# app/services/stream_manager.py
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from app.config import STREAM_MAX_CONNECTIONS, STREAM_MAX_CONNECTIONS_PER_TENANT
+from app.services.stream_client import StreamClientQueue
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS_TENANT = "anonymous"
+
+
+class StreamAdmissionError(Exception):
+    """Raised when a new /stream connection would exceed the worker or tenant budget."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class StreamConnectionManager:
+    """
+    Tracks live /stream connections of this worker and enforces admission limits.
+
+    Why:
+    - Every stream pins a pubsub connection, a reader task and a queue; unbounded streams can
+      exhaust Redis connections and memory, so new streams are shed (503) when over budget.
+    - One place to see what is live (exposed through /__stream_probe__).
+
+    Notes:
+    - Single event loop per worker -> no locking needed; all calls happen on the loop.
+    - The worker limit is always enforced (it must be > 0). The tenant comes from an unauthenticated
+      header (STREAM_TENANT_HEADER) a client can rotate, so the per-tenant limit is fairness between
+      well-behaved tenants, not protection; 0 disables it.
+    """
+
+    def __init__(
+        self,
+        max_streams: int = STREAM_MAX_CONNECTIONS,
+        max_per_tenant: int = STREAM_MAX_CONNECTIONS_PER_TENANT,
+    ) -> None:
+        if max_streams <= 0:
+            raise ValueError("STREAM_MAX_CONNECTIONS must be > 0 (the per-tenant limit alone can be evaded)")
+        self.max_streams = max_streams
+        self.max_per_tenant = max_per_tenant
+        self._clients: Dict[str, StreamClientQueue] = {}
+        self._tenant_of: Dict[str, str] = {}
+        self._per_tenant: Counter = Counter()
+
+        # Lifetime counters
+        self.admitted = 0
+        self.rejected = 0
+        self.reaped = 0
+        self.overflowed = 0
+
+    @property
+    def active(self) -> int:
+        return len(self._clients)
+
+    def admit(self, tenant: Optional[str]) -> StreamClientQueue:
+        """Reserve a slot for a new stream and return its client queue, or raise StreamAdmissionError."""
+        tenant = tenant or ANONYMOUS_TENANT
+        if len(self._clients) >= self.max_streams:
+            self.rejected += 1
+            raise StreamAdmissionError("worker stream limit reached")
+        if self.max_per_tenant and self._per_tenant[tenant] >= self.max_per_tenant:
+            self.rejected += 1
+            raise StreamAdmissionError("tenant stream limit reached")
+
+        client = StreamClientQueue()
+        self._clients[client.client_id] = client
+        self._tenant_of[client.client_id] = tenant
+        self._per_tenant[tenant] += 1
+        self.admitted += 1
+        return client
+
+    def release(self, client: StreamClientQueue, reason: str = "closed") -> None:
+        """Free the slot held by `client` (idempotent)."""
+        if self._clients.pop(client.client_id, None) is None:
+            return
+        tenant = self._tenant_of.pop(client.client_id, ANONYMOUS_TENANT)
+        self._per_tenant[tenant] -= 1
+        if self._per_tenant[tenant] <= 0:
+            del self._per_tenant[tenant]
+        if reason == "reaped":
+            self.reaped += 1
+        elif reason == "overflow":
+            self.overflowed += 1
+        logger.debug("stream: released %s (tenant=%s, reason=%s)", client.client_id, tenant, reason)
+
+    def clients(self) -> List[StreamClientQueue]:
+        return list(self._clients.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "active": len(self._clients),
+            "maxStreams": self.max_streams,
+            "maxPerTenant": self.max_per_tenant,
+            "perTenant": dict(self._per_tenant),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "reaped": self.reaped,
+            "overflowed": self.overflowed,
+        }
+
+
+# Singleton accessor
+_manager: Optional[StreamConnectionManager] = None
+
+def get_stream_manager() -> StreamConnectionManager:
+    global _manager
+    if _manager is None:
+        _manager = StreamConnectionManager()
+    return _manager
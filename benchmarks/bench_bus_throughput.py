@@ -0,0 +1,100 @@
+# benchmarks/bench_bus_throughput.py
+"""
+Publish/delivery throughput of the stream bus backends (redis vs pgnotify, memory as a baseline).
+
+For pgnotify the publish side is measured the way POST /events uses it: one short transaction
+per event that issues the NOTIFY via stage() and commits (no insert, to isolate the bus cost).
+For redis/memory it is a plain publish() per event.
+
+Usage:
+    python -m benchmarks.bench_bus_throughput --events 5000
+    python -m benchmarks.bench_bus_throughput --backends pgnotify memory --payload id
+
+Prints one JSON line per backend. Redis is skipped if REDIS_URL is unreachable.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.database import SessionLocal
+from app.services.stream_bus import InMemoryBus, PgNotifyBus, RedisBus, StreamBus
+from benchmarks.bench_stream_bus import SAMPLE_EVENT, _redis_available
+
+
+def _stage_and_commit(bus: PgNotifyBus, count: int) -> None:
+    with SessionLocal() as db:
+        for i in range(count):
+            bus.stage(db, {**SAMPLE_EVENT, "seq": i})
+            db.commit()
+
+
+async def _run(backend: str, bus: StreamBus, events: int) -> dict:
+    sub = await bus.open_subscriber()
+    received = 0
+    done = asyncio.Event()
+
+    async def consume() -> None:
+        nonlocal received
+        async for _ in bus.listen(sub):
+            received += 1
+            if received >= events:
+                done.set()
+                return
+
+    consumer = asyncio.create_task(consume())
+    await asyncio.sleep(0.2)
+
+    started = time.perf_counter()
+    if isinstance(bus, PgNotifyBus):
+        await asyncio.to_thread(_stage_and_commit, bus, events)
+    else:
+        for i in range(events):
+            await bus.publish({**SAMPLE_EVENT, "seq": i})
+            if i % 100 == 0:
+                await asyncio.sleep(0)
+    published = time.perf_counter() - started
+    try:
+        await asyncio.wait_for(done.wait(), timeout=60)
+    except asyncio.TimeoutError:
+        pass
+    delivered = time.perf_counter() - started
+
+    consumer.cancel()
+    await bus.close_subscriber(sub)
+    if isinstance(bus, PgNotifyBus) and bus._listener:
+        bus._listener.cancel()
+
+    return {
+        "backend": backend,
+        "events": events,
+        "received": received,
+        "publish_per_sec": round(events / published, 1),
+        "delivered_per_sec": round(received / delivered, 1),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--backends", nargs="+", default=["memory", "redis", "pgnotify"],
+                        choices=["memory", "redis", "pgnotify"])
+    parser.add_argument("--payload", choices=["json", "id"], default="json",
+                        help="pgnotify payload mode (id mode resolves events via cache/DB on delivery)")
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        if backend == "redis":
+            if not await _redis_available():
+                print("redis: unreachable, skipped")
+                continue
+            bus: StreamBus = RedisBus()
+        elif backend == "pgnotify":
+            bus = PgNotifyBus(channel="audit-events-bench", payload_mode=args.payload, maxsize=args.events + 1)
+        else:
+            bus = InMemoryBus(maxsize=args.events + 1)
+        print(json.dumps(await _run(backend, bus, args.events)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+# benchmarks/bench_compression.py
+"""
+Bandwidth and CPU per codec for the compression middleware (no database needed).
+
+Workloads, built from synthetic events shaped like the API JSON:
+  - list    one GET /events body of --events events (JSON array), compressed in one go
+  - stream  the same events as /stream NDJSON, --batch events per write, flushed after every batch
+            (what the middleware does per connection to keep latency unchanged)
+Reported per codec/level and workload:
+  - wire_bytes, ratio        compressed size and original/compressed
+  - cpu_ms_per_mb            compression CPU per MB of JSON (process time)
+  - mb_per_sec               single-core compression throughput
+
+Usage:
+    python -m benchmarks.bench_compression --events 50000
+    python -m benchmarks.bench_compression --codecs gzip-1 gzip-6 zstd-3 --batch 5
+
+Prints one JSON line per codec and workload. zstd rows need the optional `zstandard` package.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.middleware.compression import _Compressor, zstandard
+
+CODECS = ["gzip-1", "gzip-6", "gzip-9", "zstd-1", "zstd-3", "zstd-9"]
+
+
+def _events(n: int) -> list:
+    rnd = random.Random(42)
+    tenants = [(f"acct-{i}", f"Tenant {i}") for i in range(50)]
+    services = [str(uuid4()) for _ in range(20)]
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    events = []
+    for i in range(n):
+        account_id, account_name = rnd.choice(tenants)
+        events.append({
+            "eventId": str(uuid4()),
+            "ingestedAt": (start + timedelta(milliseconds=i * 37)).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "logType": rnd.choice(["Login", "System", "Management"]),
+            "reportingService": rnd.choice(services),
+            "logLevel": rnd.choice(["informational", "warning", "error"]),
+            "activityType": rnd.choice(["user-login", "role-change", "export", "api-call"]),
+            "identityType": "User",
+            "user": {"identityUuid": str(uuid4()), "userEmail": f"user{rnd.randint(1, 5000)}@example.com"},
+            "action": rnd.choice(["Access", "Update", "Create", "Delete"]),
+            "message": f"User performed operation {rnd.randint(1, 10_000)} from session {uuid4().hex[:12]}",
+            "ipAddress": f"10.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}",
+            "account": {"accountId": account_id, "accountName": account_name},
+        })
+    return events
+
+
+def _run(codec: str, workload: str, chunks: list) -> dict:
+    name, level = codec.split("-")
+    raw = sum(len(c) for c in chunks)
+    compressor = _Compressor(name, int(level))
+    started_cpu, started = time.process_time(), time.perf_counter()
+    wire = 0
+    for chunk in chunks[:-1]:
+        wire += len(compressor.chunk(chunk))
+    wire += len(compressor.finish(chunks[-1]))
+    cpu, elapsed = time.process_time() - started_cpu, time.perf_counter() - started
+    mb = raw / 1_000_000
+    return {
+        "codec": codec,
+        "workload": workload,
+        "raw_bytes": raw,
+        "wire_bytes": wire,
+        "ratio": round(raw / wire, 2),
+        "cpu_ms_per_mb": round(cpu * 1000 / mb, 2),
+        "mb_per_sec": round(mb / elapsed, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=10, help="events per /stream write")
+    parser.add_argument("--codecs", nargs="+", default=CODECS, choices=CODECS)
+    args = parser.parse_args()
+
+    events = _events(args.events)
+    workloads = {
+        "list": [json.dumps(events, separators=(",", ":")).encode("utf-8")],
+        "stream": [
+            b"".join(json.dumps(e, separators=(",", ":")).encode("utf-8") + b"\n" for e in events[i:i + args.batch])
+            for i in range(0, len(events), args.batch)
+        ],
+    }
+    for codec in args.codecs:
+        if codec.startswith("zstd") and zstandard is None:
+            print(json.dumps({"codec": codec, "skipped": "zstandard not installed"}))
+            continue
+        for workload, chunks in workloads.items():
+            print(json.dumps(_run(codec, workload, chunks)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_event_ids.py
+"""
+Insert throughput and primary-key index size for random (uuid4) vs time-ordered (uuid7) event IDs.
+
+Each mode gets its own scratch table shaped like audit_events' hot path (uuid PK + ingested_at + a
+jsonb payload) and is filled with --rows rows in --batch-size transactions from --workers threads,
+the way several API workers insert concurrently. Reported per mode:
+  - rows_per_sec            sustained insert rate
+  - pk_index_bytes          size of the event_id B-tree after the load
+  - pk_index_bytes_per_row  bloat indicator (random inserts split pages and leave them half full)
+  - pk_leaf_density         avg leaf fill %, if the pgstattuple extension is available
+
+The gap grows with table size: once the index no longer fits in shared_buffers, random inserts also
+miss the cache on almost every row, while uuid7 keeps touching the same rightmost leaves.
+
+Usage:
+    python -m benchmarks.bench_event_ids --rows 200000
+    python -m benchmarks.bench_event_ids --modes uuid7 --rows 1000000 --workers 8 --keep
+
+Prints one JSON line per mode. Scratch tables are dropped unless --keep is given.
+"""
+import argparse
+import json
+import threading
+import time
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.services.ids import get_id_generator
+
+PAYLOAD = json.dumps({"message": "User logged in successfully", "account": {"accountId": "acct-1"}})
+
+
+def _table(mode: str) -> str:
+    return f"bench_event_ids_{mode}"
+
+
+def _create(mode: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {_table(mode)}"))
+        conn.execute(text(
+            f"""
+            CREATE TABLE {_table(mode)} (
+                event_id UUID PRIMARY KEY,
+                ingested_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                payload JSONB NOT NULL
+            )
+            """
+        ))
+
+
+def _load(mode: str, rows: int, batch_size: int) -> None:
+    new_id = get_id_generator(mode)
+    sql = text(f"INSERT INTO {_table(mode)} (event_id, payload) VALUES (:id, CAST(:payload AS jsonb))")
+    done = 0
+    while done < rows:
+        n = min(batch_size, rows - done)
+        with engine.begin() as conn:
+            conn.execute(sql, [{"id": new_id(), "payload": PAYLOAD} for _ in range(n)])
+        done += n
+
+
+def _index_stats(mode: str) -> dict:
+    with engine.begin() as conn:
+        size = conn.execute(text(f"SELECT pg_relation_size('{_table(mode)}_pkey')")).scalar_one()
+        density = None
+        try:
+            with conn.begin_nested():
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pgstattuple"))
+                density = conn.execute(text(f"SELECT avg_leaf_density FROM pgstatindex('{_table(mode)}_pkey')")).scalar_one()
+        except Exception:
+            pass
+    return {"pk_index_bytes": size, "pk_leaf_density": density}
+
+
+def run(mode: str, rows: int, batch_size: int, workers: int, keep: bool) -> dict:
+    _create(mode)
+    per_worker = rows // workers
+    threads = [threading.Thread(target=_load, args=(mode, per_worker, batch_size)) for _ in range(workers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    total = per_worker * workers
+    stats = _index_stats(mode)
+    if not keep:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {_table(mode)}"))
+    return {
+        "mode": mode,
+        "rows": total,
+        "workers": workers,
+        "batch_size": batch_size,
+        "rows_per_sec": round(total / elapsed, 1),
+        **stats,
+        "pk_index_bytes_per_row": round(stats["pk_index_bytes"] / total, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=1, help="rows per transaction (POST /events commits one)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=["uuid4", "uuid7"], choices=["uuid4", "uuid7"])
+    parser.add_argument("--keep", action="store_true", help="keep the scratch tables for inspection")
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        print(json.dumps(run(mode, args.rows, args.batch_size, args.workers, args.keep)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# benchmarks/bench_indexes.py
+"""
+Index strategies for audit_events: insert rate, index size and query latency per configuration.
+
+Configurations (each on its own scratch copy of audit_events, PK always present):
+  btree          both legacy B-trees: (ingested_at) and (ingested_at, event_id)   [before 183415943c60]
+  composite      only the (ingested_at, event_id) B-tree                          [after 68b6975b4233]
+  brin           BRIN on ingested_at only
+  brin+tenant    BRIN + (account->>'accountId', ingested_at, event_id) B-tree (no composite: unfiltered
+                 pages and the full export fall back to a sort)
+  brin+composite+tenant  composite + BRIN + tenant B-tree                        [migration 183415943c60]
+
+Load: --rows synthetic events with ingested_at increasing over ~5 years (append-only, like production),
+spread across --accounts tenants, inserted in --batch-size row statements.
+
+Queries (median of --reps runs, milliseconds):
+  tenant_page     first 100 events of one account in ingestion order (GET /events?accountId=&limit=100)
+  global_page     a keyset page of 100 from the middle of the table (GET /events?cursor=&limit=100)
+  range_count     count of one day in the middle of the table (since/until range scan)
+  retention       one retention victim batch: 1000 rows older than the cutoff
+
+Usage:
+    python -m benchmarks.bench_indexes --rows 500000
+    python -m benchmarks.bench_indexes --configs composite brin+composite+tenant --rows 2000000 --reps 20
+
+Prints one JSON line per configuration. Scratch tables are dropped unless --keep is given.
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.database import engine
+
+CONFIGS = {
+    "btree": [
+        "CREATE INDEX {t}_ing ON {t} (ingested_at)",
+        "CREATE INDEX {t}_ing_id ON {t} (ingested_at, event_id)",
+    ],
+    "composite": [
+        "CREATE INDEX {t}_ing_id ON {t} (ingested_at, event_id)",
+    ],
+    "brin": [
+        "CREATE INDEX {t}_brin ON {t} USING brin (ingested_at) WITH (pages_per_range = 32)",
+    ],
+    "brin+tenant": [
+        "CREATE INDEX {t}_brin ON {t} USING brin (ingested_at) WITH (pages_per_range = 32)",
+        "CREATE INDEX {t}_tenant ON {t} ((account->>'accountId'), ingested_at, event_id)",
+    ],
+    "brin+composite+tenant": [
+        "CREATE INDEX {t}_ing_id ON {t} (ingested_at, event_id)",
+        "CREATE INDEX {t}_brin ON {t} USING brin (ingested_at) WITH (pages_per_range = 32)",
+        "CREATE INDEX {t}_tenant ON {t} ((account->>'accountId'), ingested_at, event_id)",
+    ],
+}
+
+START = datetime(2021, 1, 1)
+SPAN = timedelta(days=5 * 365)
+
+INSERT_SQL = """
+    INSERT INTO {t} (event_id, ingested_at, log_type, reporting_service, log_level, activity_type,
+                     identity_type, "user", action, message, account)
+    SELECT gen_random_uuid(),
+           CAST(:start AS timestamp) + g * make_interval(secs => :step),
+           'Login', gen_random_uuid(), 'informational', 'bench-login', 'User',
+           CAST('{{"identityUuid": "bench-user"}}' AS json), 'Access', 'benchmark event ' || g,
+           json_build_object('accountId', 'acct-' || (g % :accounts), 'accountName', 'Bench Tenant')
+    FROM generate_series(CAST(:lo AS bigint), CAST(:hi AS bigint)) AS g
+"""
+
+QUERIES = {
+    "tenant_page": """
+        SELECT * FROM {t} WHERE (account->>'accountId') = :account
+        ORDER BY ingested_at, event_id LIMIT 100
+    """,
+    "global_page": """
+        SELECT * FROM {t}
+        WHERE ingested_at >= :mid AND (ingested_at, event_id) > (:mid, CAST('00000000-0000-0000-0000-000000000000' AS uuid))
+        ORDER BY ingested_at, event_id LIMIT 100
+    """,
+    "range_count": "SELECT count(*) FROM {t} WHERE ingested_at >= :mid AND ingested_at < :mid_end",
+    "retention": "SELECT event_id FROM {t} WHERE ingested_at < :cutoff LIMIT 1000",
+}
+
+
+def _table(config: str) -> str:
+    return "bench_idx_" + config.replace("+", "_")
+
+
+def _timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def run(config: str, rows: int, batch_size: int, accounts: int, reps: int, keep: bool) -> dict:
+    t = _table(config)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {t}"))
+        conn.execute(text(f"CREATE TABLE {t} (LIKE audit_events INCLUDING DEFAULTS)"))
+        conn.execute(text(f"ALTER TABLE {t} ADD PRIMARY KEY (event_id)"))
+        for ddl in CONFIGS[config]:
+            conn.execute(text(ddl.format(t=t)))
+
+    step = SPAN.total_seconds() / rows
+    insert = text(INSERT_SQL.format(t=t))
+
+    def load() -> None:
+        for lo in range(0, rows, batch_size):
+            with engine.begin() as conn:
+                conn.execute(insert, {"start": START, "step": step, "accounts": accounts,
+                                      "lo": lo, "hi": min(lo + batch_size, rows) - 1})
+
+    load_seconds = _timed(load)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"VACUUM ANALYZE {t}"))
+        sizes = {
+            r[0]: r[1]
+            for r in conn.execute(text(
+                """
+                SELECT c.relname, pg_relation_size(c.oid)
+                FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE i.indrelid = CAST(:t AS regclass) AND NOT i.indisprimary
+                """
+            ), {"t": t})
+        }
+        table_bytes = conn.execute(text("SELECT pg_relation_size(CAST(:t AS regclass))"), {"t": t}).scalar_one()
+
+    mid = START + SPAN / 2
+    params = {"account": "acct-1", "mid": mid, "mid_end": mid + timedelta(days=1), "cutoff": START + SPAN / 10}
+    latencies = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            stmt = text(sql.format(t=t))
+            conn.execute(stmt, params).all()  # warm up
+            samples = [_timed(lambda: conn.execute(stmt, params).all()) for _ in range(reps)]
+            latencies[name] = round(statistics.median(samples) * 1000, 3)
+
+    if not keep:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {t}"))
+    return {
+        "config": config,
+        "rows": rows,
+        "insert_rows_per_sec": round(rows / load_seconds, 1),
+        "table_bytes": table_bytes,
+        "index_bytes": sum(sizes.values()),
+        "indexes": sizes,
+        "query_ms_p50": latencies,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--reps", type=int, default=10)
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--keep", action="store_true", help="keep the scratch tables for inspection")
+    args = parser.parse_args()
+
+    for config in args.configs:
+        print(json.dumps(run(config, args.rows, args.batch_size, args.accounts, args.reps, args.keep)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_json_codec.py
+"""
+Encode/decode cost of stdlib json vs orjson on the event shapes this service moves around.
+
+Shapes:
+  - event         valid_event.json enriched like a POST response (the bus / outbox / GET by id payload)
+  - event_large   the same event with a ~4 KB metadata object (upper end of what clients send)
+  - page_100      a GET /events page of 100 events (one response body)
+Operations per shape and backend:
+  - dumps_us      compact encode to UTF-8 bytes (what the codec returns)
+  - loads_us      decode from bytes
+Backends:
+  - stdlib        json.dumps(..., separators, ensure_ascii=False).encode() / json.loads
+  - orjson        app/services/json_codec.py with orjson (skipped when not installed)
+
+Usage:
+    python -m benchmarks.bench_json_codec
+    python -m benchmarks.bench_json_codec --number 20000
+
+Prints one JSON line per shape and backend (microseconds per call, best of --repeat runs).
+"""
+import argparse
+import json
+import timeit
+from pathlib import Path
+from uuid import uuid4
+
+from app.services import json_codec
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _shapes() -> dict:
+    base = json.loads((ROOT / "valid_event.json").read_text(encoding="utf-8"))
+
+    def enriched(metadata=None) -> dict:
+        event = {"eventId": str(uuid4()), "ingestedAt": "2026-01-01T12:00:00.123456Z", **base}
+        if metadata is not None:
+            event["metadata"] = metadata
+        return event
+
+    large_metadata = {f"attr_{i}": {"value": f"some attribute value {i}", "n": i, "ok": i % 2 == 0} for i in range(60)}
+    return {
+        "event": enriched(),
+        "event_large": enriched(large_metadata),
+        "page_100": [enriched() for _ in range(100)],
+    }
+
+
+def _backends() -> dict:
+    backends = {"stdlib": (json_codec._stdlib_dumps, json_codec._stdlib_loads)}
+    if json_codec.orjson is not None:
+        backends["orjson"] = (json_codec._orjson_dumps, json_codec._orjson_loads)
+    return backends
+
+
+def _us_per_call(fn, number: int, repeat: int) -> float:
+    return round(min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1_000_000, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=5_000, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for shape, obj in _shapes().items():
+        number = max(1, args.number // 100) if shape == "page_100" else args.number
+        encoded = json_codec._stdlib_dumps(obj)
+        for backend, (dumps, loads) in _backends().items():
+            print(json.dumps({
+                "shape": shape,
+                "backend": backend,
+                "bytes": len(encoded),
+                "dumps_us": _us_per_call(lambda: dumps(obj), number, args.repeat),
+                "loads_us": _us_per_call(lambda: loads(encoded), number, args.repeat),
+            }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_metrics.py
+"""
+Overhead of the /metrics collectors (app/services/metrics.py, app/middleware/metrics.py).
+
+Measured:
+  - observe_ns / inc_ns       one labelled Histogram.observe / Counter.inc (labels() lookup included)
+  - middleware_us             MetricsMiddleware around a no-op ASGI app, minus the bare app
+  - per_request_us            middleware + the instrumentation a GET /events/{id} cache miss runs
+                              (route histogram, 2 DB statements, pool checkout, 2 cache counters)
+  - request_us                end-to-end GET /events/{id} through the app (--with-app, needs Postgres)
+  - cpu_fraction_at_rate      per_request_us * --rate, as a share of one core
+  - overhead_pct              per_request_us / request_us
+
+Usage:
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --rate 5000 --with-app
+
+Prints one JSON line.
+"""
+import argparse
+import asyncio
+import json
+import time
+import timeit
+
+from app.middleware.metrics import MetricsMiddleware
+from app.services.metrics import MetricsRegistry
+
+
+def _ns(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9
+
+
+async def _noop_app(scope, receive, send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _noop_send(message) -> None:
+    return None
+
+
+async def _noop_receive():
+    return {"type": "http.request", "body": b""}
+
+
+def _asgi_us(app, number: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/events/x"}
+
+    async def run() -> float:
+        best = float("inf")
+        for _ in range(5):
+            started = time.perf_counter()
+            for _ in range(number):
+                await app(scope, _noop_receive, _noop_send)
+            best = min(best, time.perf_counter() - started)
+        return best / number * 1e6
+
+    return asyncio.run(run())
+
+
+def _request_us(number: int) -> float:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    payload = json.load(open("valid_event.json", encoding="utf-8"))
+    with TestClient(app) as client:
+        event_id = client.post("/events", json=payload).json()["eventId"]
+        url = f"/events/{event_id}"
+        for _ in range(50):
+            client.get(url)
+        started = time.perf_counter()
+        for _ in range(number):
+            client.get(url)
+        return (time.perf_counter() - started) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=2_000, help="requests per second per worker")
+    parser.add_argument("--number", type=int, default=100_000)
+    parser.add_argument("--with-app", action="store_true", help="also time GET /events/{id} end to end")
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    hist = registry.histogram("bench_seconds", "bench", ("method", "route", "status"))
+    counter = registry.counter("bench_total", "bench", ("cache", "outcome"))
+    observe_ns = _ns(lambda: hist.labels("GET", "/events/{event_id}", "200").observe(0.0042), args.number)
+    inc_ns = _ns(lambda: counter.labels("events", "hits").inc(), args.number)
+
+    asgi_number = max(1, args.number // 10)
+    middleware_us = max(0.0, _asgi_us(MetricsMiddleware(_noop_app), asgi_number) - _asgi_us(_noop_app, asgi_number))
+    # The middleware already includes the route histogram; add 2 statements + 1 pool wait + 2 cache counters.
+    per_request_us = middleware_us + (3 * observe_ns + 2 * inc_ns) / 1000
+
+    result = {
+        "observe_ns": round(observe_ns, 1),
+        "inc_ns": round(inc_ns, 1),
+        "middleware_us": round(middleware_us, 2),
+        "per_request_us": round(per_request_us, 2),
+        "rate": args.rate,
+        "cpu_fraction_at_rate": round(per_request_us * args.rate / 1e6, 5),
+    }
+    if args.with_app:
+        request_us = _request_us(max(1, args.number // 100))
+        result["request_us"] = round(request_us, 1)
+        result["overhead_pct"] = round(per_request_us / request_us * 100, 3)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
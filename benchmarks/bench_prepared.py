@@ -0,0 +1,133 @@
+# benchmarks/bench_prepared.py
+"""
+By-id lookup latency and Postgres CPU: ad-hoc SQL vs the prepared query registry.
+
+Modes (all run the same event_by_id SQL on one connection, cache bypassed):
+  - adhoc     f-string + text() + Session.execute with psycopg auto-prepare disabled: Postgres parses
+              and plans every call (the behaviour behind a transaction-pooling proxy)
+  - auto      the previous code path with psycopg defaults: auto-prepared after 5 runs per connection
+  - registry  app/services/queries.py: compiled once, prepare=True on the raw cursor
+Reported per mode:
+  - lookups_per_sec, p50_ms, p99_ms   client-side wall time per lookup
+  - backend_cpu_ms_per_1k             user+system CPU of the serving Postgres backend per 1000 lookups,
+                                      read from /proc/<pid>/stat (null unless the server is local)
+
+Usage:
+    python -m benchmarks.bench_prepared --lookups 20000
+    python -m benchmarks.bench_prepared --modes adhoc registry --seed-rows 50000
+
+Prints one JSON line per mode. Seeded rows are deleted afterwards.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from uuid import uuid4
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.config import DATABASE_URL
+from app.database import engine
+from app.services.events_service import EVENT_BY_ID, EVENT_FROM, EVENT_JSON_COLUMN
+from app.services.queries import get_query_registry
+
+SEED_MARKER = "bench_prepared"
+
+
+def _seed(rows: int) -> list:
+    ids = [uuid4() for _ in range(rows)]
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO audit_events (event_id, ingested_at, log_type, reporting_service, log_level,
+                    activity_type, identity_type, "user", action, message, account)
+                VALUES (:id, NOW() AT TIME ZONE 'UTC', 'Login', :id, 'informational', :marker, 'User',
+                    CAST('{"identityUuid": "u-bench"}' AS json), 'Access', 'bench row',
+                    CAST('{"accountId": "acct-bench", "accountName": "Bench"}' AS json))
+                """
+            ),
+            [{"id": i, "marker": SEED_MARKER} for i in ids],
+        )
+    return ids
+
+
+def _cleanup() -> None:
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM audit_events WHERE activity_type = :m"), {"m": SEED_MARKER})
+
+
+def _backend_cpu_seconds(pid: int):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _lookup_adhoc(db: Session, event_id) -> dict:
+    sql = f"""
+        SELECT {EVENT_JSON_COLUMN}
+        FROM {EVENT_FROM}
+        WHERE ae.event_id = :id
+        LIMIT 1
+    """
+    return db.execute(text(sql), {"id": str(event_id)}).mappings().first()["event_json"]
+
+
+def _lookup_registry(db: Session, event_id) -> dict:
+    return get_query_registry().fetch_one(db, EVENT_BY_ID, {"id": event_id})[0]
+
+
+def run(mode: str, ids: list, lookups: int) -> dict:
+    connect_args = {"prepare_threshold": None} if mode == "adhoc" else {}
+    bench_engine = create_engine(DATABASE_URL, future=True, connect_args=connect_args)
+    lookup = _lookup_registry if mode == "registry" else _lookup_adhoc
+    timings = []
+    with Session(bench_engine) as db:
+        pid = db.execute(text("SELECT pg_backend_pid()")).scalar_one()
+        for event_id in ids[:50]:  # warm-up (connection, catalog caches, auto-prepare)
+            lookup(db, event_id)
+        cpu_before = _backend_cpu_seconds(pid)
+        started = time.perf_counter()
+        for _ in range(lookups):
+            t0 = time.perf_counter()
+            lookup(db, random.choice(ids))
+            timings.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+        cpu_after = _backend_cpu_seconds(pid)
+    bench_engine.dispose()
+
+    timings.sort()
+    cpu = None if cpu_before is None or cpu_after is None else (cpu_after - cpu_before) * 1000 / lookups * 1000
+    return {
+        "mode": mode,
+        "lookups": lookups,
+        "lookups_per_sec": round(lookups / elapsed, 1),
+        "p50_ms": round(statistics.median(timings) * 1000, 4),
+        "p99_ms": round(timings[int(len(timings) * 0.99) - 1] * 1000, 4),
+        "backend_cpu_ms_per_1k": None if cpu is None else round(cpu, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--seed-rows", type=int, default=10_000)
+    parser.add_argument("--modes", nargs="+", default=["adhoc", "auto", "registry"], choices=["adhoc", "auto", "registry"])
+    args = parser.parse_args()
+
+    ids = _seed(args.seed_rows)
+    try:
+        for mode in args.modes:
+            print(json.dumps(run(mode, ids, args.lookups)))
+    finally:
+        _cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_stream_bus.py
+"""
+End-to-end publish -> subscriber latency for the stream bus backends.
+
+Each published event carries its send timestamp; every subscriber records the delay
+until the payload arrives through bus.listen() (the same path /stream uses).
+
+Usage:
+    python -m benchmarks.bench_stream_bus --events 2000 --subscribers 1 10 100
+    python -m benchmarks.bench_stream_bus --backends memory          # no Redis needed
+
+Redis is skipped (with a note) if REDIS_URL is not reachable.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from app.services.stream_bus import InMemoryBus, RedisBus, StreamBus
+
+SAMPLE_EVENT = {
+    "eventId": "00000000-0000-4000-8000-000000000000",
+    "ingestedAt": "2025-08-10T12:00:00.000000Z",
+    "logType": "Login",
+    "reportingService": "11111111-1111-1111-1111-111111111111",
+    "logLevel": "informational",
+    "activityType": "user-login",
+    "identityType": "User",
+    "action": "Access",
+    "message": "User signed in successfully",
+    "user": {"identityUuid": "u-123", "userEmail": "u@example.com"},
+    "account": {"accountId": "tenant-1", "accountName": "Acme"},
+}
+
+
+def _pct(values: List[float], p: float) -> float:
+    values = sorted(values)
+    idx = min(len(values) - 1, max(0, int(round(p / 100.0 * (len(values) - 1)))))
+    return values[idx]
+
+
+async def _run_one(bus: StreamBus, events: int, subscribers: int) -> Dict[str, float]:
+    subs = [await bus.open_subscriber() for _ in range(subscribers)]
+    latencies: List[float] = []
+    done = asyncio.Event()
+    remaining = [events * subscribers]
+
+    async def consume(sub) -> None:
+        async for data in bus.listen(sub):
+            latencies.append(time.perf_counter() - json.loads(data)["_sentAt"])
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                done.set()
+            if remaining[0] <= 0:
+                return
+
+    tasks = [asyncio.create_task(consume(s)) for s in subs]
+    await asyncio.sleep(0.2)  # let Redis subscriptions settle
+
+    started = time.perf_counter()
+    for _ in range(events):
+        await bus.publish({**SAMPLE_EVENT, "_sentAt": time.perf_counter()})
+        await asyncio.sleep(0)  # let consumers interleave like a real server
+    try:
+        await asyncio.wait_for(done.wait(), timeout=60)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - started
+
+    for t in tasks:
+        t.cancel()
+    for s in subs:
+        await bus.close_subscriber(s)
+
+    ms = [v * 1000 for v in latencies] or [float("nan")]
+    return {
+        "subscribers": subscribers,
+        "delivered": len(latencies),
+        "expected": events * subscribers,
+        "events_per_sec": round(events / elapsed, 1),
+        "p50_ms": round(statistics.median(ms), 3),
+        "p99_ms": round(_pct(ms, 99), 3),
+        "max_ms": round(max(ms), 3),
+    }
+
+
+async def _redis_available() -> bool:
+    try:
+        bus = RedisBus()
+        await asyncio.wait_for(bus._pub.ping(), timeout=1)
+        return True
+    except Exception:
+        return False
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--backends", nargs="+", default=["memory", "redis"], choices=["memory", "redis"])
+    args = parser.parse_args()
+
+    results = []
+    for backend in args.backends:
+        if backend == "redis" and not await _redis_available():
+            print("redis: unreachable, skipped")
+            continue
+        for n in args.subscribers:
+            bus = InMemoryBus(maxsize=args.events + 1) if backend == "memory" else RedisBus()
+            row = {"backend": backend, **await _run_one(bus, args.events, n)}
+            results.append(row)
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+# benchmarks/compare.py
+"""
+Compare two result documents of the same suite (benchmarks/load_suite.py, benchmarks/scale_test.py),
+e.g. main vs a branch.
+
+For every scenario and metric present in both runs it prints one JSON line with the base and new
+values, the change in percent and a verdict. Direction comes from the metric name:
+  *_per_sec, delivered_ratio          higher is better
+  *_ms, errors, post_errors, wire_*   lower is better
+  anything else (counts, settings)    reported, never judged
+
+Usage:
+    python -m benchmarks.compare bench-results/base.json bench-results/head.json
+    python -m benchmarks.compare base.json head.json --threshold 10 --only ingest by_id_hit
+
+Exit status 1 if any judged metric got worse by more than --threshold percent (default 5), so the
+script can gate a CI job. Runs with different targets or settings are compared anyway, with a warning.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+HIGHER_IS_BETTER = ("_per_sec", "delivered_ratio")
+LOWER_IS_BETTER = ("_ms", "errors", "wire_bytes_per_event")
+
+
+def direction(metric: str) -> Optional[int]:
+    """+1 if higher is better, -1 if lower is better, None if the metric is not judged."""
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def compare(base: dict, new: dict, threshold: float, only=None) -> list:
+    rows = []
+    for scenario, base_metrics in base["results"].items():
+        new_metrics = new["results"].get(scenario)
+        if new_metrics is None or (only and scenario not in only):
+            continue
+        for metric, base_value in base_metrics.items():
+            new_value = new_metrics.get(metric)
+            if not isinstance(base_value, (int, float)) or not isinstance(new_value, (int, float)):
+                continue
+            delta = new_value - base_value
+            change = delta / base_value * 100 if base_value else None  # None: from zero (e.g. errors)
+            sign = direction(metric)
+            if sign is None:
+                verdict = "info"
+            elif delta == 0 or (change is not None and abs(change) <= threshold):
+                verdict = "same"
+            else:
+                verdict = "better" if delta * sign > 0 else "worse"
+            rows.append({
+                "scenario": scenario,
+                "metric": metric,
+                "base": base_value,
+                "new": new_value,
+                "change_pct": None if change is None else round(change, 2),
+                "verdict": verdict,
+            })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=5.0, help="percent change treated as noise")
+    parser.add_argument("--only", nargs="+", help="scenarios to compare (default: all in both runs)")
+    args = parser.parse_args()
+
+    base = json.loads(args.base.read_text(encoding="utf-8"))
+    new = json.loads(args.new.read_text(encoding="utf-8"))
+    if base.get("suite") != new.get("suite"):
+        print(f"warning: comparing different suites ({base.get('suite')} vs {new.get('suite')})", file=sys.stderr)
+    for key in ("target", "settings", "cpus"):
+        if base["meta"].get(key) != new["meta"].get(key):
+            print(f"warning: runs differ in {key}; compare with care", file=sys.stderr)
+
+    rows = compare(base, new, args.threshold, args.only)
+    for row in rows:
+        print(json.dumps(row))
+    worse = sum(row["verdict"] == "worse" for row in rows)
+    print(json.dumps({
+        "base": base["meta"].get("commit", "")[:12],
+        "new": new["meta"].get("commit", "")[:12],
+        "better": sum(row["verdict"] == "better" for row in rows),
+        "worse": worse,
+    }))
+    sys.exit(1 if worse else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+# benchmarks/datagen.py
+"""
+Bulk-load a large synthetic audit_events table (10^7..10^8 rows) for scale testing.
+
+Rows are schema-valid events from benchmarks/payloads.py, written in the current (normalized)
+layout: account_key / reporting_service_key, legacy account / reporting_service columns NULL.
+
+Shape:
+  --tenants / --tenant-skew     Zipf-skewed tenants (rank 1 = acct-00000 is the busiest)
+  --services / --service-skew   Zipf-skewed reporting services (skew 0 = uniform)
+  --years                       ingested_at spread evenly over the last N years, oldest first; with
+                                the default 6 > RETENTION_YEARS about half the table is retention backlog
+  --id-mode                     uuid4 (random, like EVENT_ID_MODE=uuid4) or uuid7 built from ingested_at
+
+Load:
+  - the time range is cut into --batch-rows chunks; --workers processes each COPY whole chunks
+    (one transaction per chunk) over their own connection. Chunks finish out of order, so physical
+    order follows ingested_at only per chunk, which is what BRIN sees in production anyway.
+  - --defer-indexes drops the secondary indexes of audit_events (the primary key stays) before the
+    load and recreates them afterwards; on a large load that is much faster than maintaining them
+    row by row. Their definitions are printed first, and they are recreated even if the load fails.
+  - VACUUM (ANALYZE) at the end, so planner statistics and the visibility map match a settled table.
+
+Writes into the database of DATABASE_URL. Point it at a scratch database: --truncate empties
+audit_events first, and benchmarks/scale_test.py runs retention against it.
+
+Usage:
+    python -m benchmarks.datagen --rows 1000000
+    python -m benchmarks.datagen --rows 100000000 --workers 8 --tenants 20000 --defer-indexes --truncate
+    python -m benchmarks.scale_test --out bench-results/scale.json
+
+Prints progress to stderr and one JSON summary line on stdout.
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import psycopg
+from sqlalchemy.engine import make_url
+
+from app.config import DATABASE_URL
+from app.services.json_codec import dumps_str
+from benchmarks.payloads import EventFactory
+
+COLUMNS = (
+    "event_id", "ingested_at", "time", "log_type", "log_level", "activity_type", "identity_type",
+    '"user"', "action", "message", "ip_address", "error_code", "metadata_", "account_key", "reporting_service_key",
+)
+COPY_SQL = f"COPY audit_events ({', '.join(COLUMNS)}) FROM STDIN"
+
+# Set per worker process by _init_worker
+_worker: dict = {}
+
+
+def _conninfo(url: str) -> str:
+    """libpq connection string for a SQLAlchemy URL (postgresql+psycopg://... -> postgresql://...)."""
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def _uuid7_at(ms: int, rnd: random.Random) -> uuid.UUID:
+    # Same layout as app.services.ids.uuid7, with the timestamp taken from ingested_at
+    return uuid.UUID(int=(ms << 80) | (0x7 << 76) | (rnd.getrandbits(12) << 64) | (0b10 << 62) | rnd.getrandbits(62))
+
+
+def _init_worker(conninfo: str, settings: dict) -> None:
+    _worker["conn"] = psycopg.connect(conninfo, autocommit=True)  # conn.transaction() per chunk commits
+    _worker["conn"].execute("SET synchronous_commit = off")  # a lost tail of a benchmark load is harmless
+    _worker.update(settings)
+
+
+def _load_chunk(chunk: Tuple[int, int]) -> int:
+    """COPY rows [first, last) of the dataset in one transaction; returns the row count."""
+    first, last = chunk
+    s = _worker
+    factory = EventFactory(
+        seed=s["seed"] * 1_000_003 + first, accounts=s["tenants"], services=s["services"],
+        users_per_account=s["users_per_account"], skew=s["tenant_skew"], service_skew=s["service_skew"],
+    )
+    rnd = random.Random(s["seed"] ^ first)
+    account_keys: Dict[str, int] = s["account_keys"]
+    service_keys: Dict[str, int] = s["service_keys"]
+    start: datetime = s["start"]
+    step_us: float = s["step_us"]
+    uuid7 = s["id_mode"] == "uuid7"
+
+    conn = s["conn"]
+    with conn.transaction(), conn.cursor() as cur, cur.copy(COPY_SQL) as copy:
+        for i in range(first, last):
+            event = factory.payload()
+            offset_us = int(i * step_us)
+            ingested_at = start + timedelta(microseconds=offset_us)
+            if uuid7:
+                event_id = _uuid7_at(int(start.timestamp() * 1000) + offset_us // 1000, rnd)
+            else:
+                event_id = uuid.UUID(int=rnd.getrandbits(128), version=4)
+            copy.write_row((
+                event_id,
+                ingested_at,
+                ingested_at - timedelta(milliseconds=rnd.randint(0, 5_000)),  # client clock / delivery lag
+                event["logType"],
+                event["logLevel"],
+                event["activityType"],
+                event["identityType"],
+                dumps_str(event["user"]),
+                event["action"],
+                event["message"],
+                event.get("ipAddress"),
+                event.get("errorCode"),
+                dumps_str(event["metadata"]),
+                account_keys[event["account"]["accountId"]],
+                service_keys[event["reportingService"]],
+            ))
+    return last - first
+
+
+def _upsert_dimensions(conn: psycopg.Connection, factory: EventFactory) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Create the tenant and service dimension rows; returns accountId -> key and service uuid -> key."""
+    account_ids = [a for a, _ in factory.accounts]
+    account_names = [n for _, n in factory.accounts]
+    with conn.transaction():
+        conn.execute(
+            """
+            INSERT INTO accounts (account_id, account_name)
+            SELECT * FROM unnest(%s::text[], %s::text[])
+            ON CONFLICT (account_id, account_name) DO NOTHING
+            """,
+            (account_ids, account_names),
+        )
+        conn.execute(
+            """
+            INSERT INTO reporting_services (service_uuid)
+            SELECT * FROM unnest(%s::uuid[])
+            ON CONFLICT (service_uuid) DO NOTHING
+            """,
+            (factory.services,),
+        )
+        account_keys = dict(conn.execute(
+            """
+            SELECT a.account_id, a.id FROM accounts a
+            JOIN unnest(%s::text[], %s::text[]) AS t(account_id, account_name)
+              ON a.account_id = t.account_id AND a.account_name = t.account_name
+            """,
+            (account_ids, account_names),
+        ).fetchall())
+        service_keys = {
+            str(service_uuid): key for service_uuid, key in conn.execute(
+                "SELECT service_uuid, id FROM reporting_services WHERE service_uuid = ANY(%s::uuid[])",
+                (factory.services,),
+            ).fetchall()
+        }
+    return account_keys, service_keys
+
+
+def _secondary_indexes(conn: psycopg.Connection) -> List[Tuple[str, str]]:
+    """(name, CREATE INDEX statement) of every audit_events index that does not back a constraint."""
+    return conn.execute(
+        """
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        WHERE i.schemaname = current_schema() AND i.tablename = 'audit_events'
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint c
+              WHERE c.conrelid = 'audit_events'::regclass AND c.conname = i.indexname
+          )
+        ORDER BY i.indexname
+        """
+    ).fetchall()
+
+
+def _log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def _table_sizes(conn: psycopg.Connection) -> dict:
+    table_bytes, index_bytes = conn.execute(
+        "SELECT pg_table_size('audit_events'), pg_indexes_size('audit_events')"
+    ).fetchone()
+    return {"table_bytes": table_bytes, "index_bytes": index_bytes}
+
+
+def run(args: argparse.Namespace) -> dict:
+    conninfo = _conninfo(args.database_url)
+    factory = EventFactory(
+        seed=args.seed, accounts=args.tenants, services=args.services,
+        skew=args.tenant_skew, service_skew=args.service_skew,
+    )
+    end = datetime.utcnow().replace(microsecond=0)
+    start = end - timedelta(days=365 * args.years)
+    chunks = [(first, min(first + args.batch_rows, args.rows)) for first in range(0, args.rows, args.batch_rows)]
+
+    with psycopg.connect(conninfo, autocommit=True) as conn:
+        account_keys, service_keys = _upsert_dimensions(conn, factory)
+        if args.truncate:
+            _log("truncating audit_events")
+            conn.execute("TRUNCATE audit_events")
+        deferred: List[Tuple[str, str]] = []
+        if args.defer_indexes:
+            deferred = _secondary_indexes(conn)
+            for name, definition in deferred:
+                _log(f"dropping {name} (recreated after the load): {definition}")
+                conn.execute(f'DROP INDEX "{name}"')
+
+        settings = {
+            "seed": args.seed,
+            "tenants": args.tenants,
+            "tenant_skew": args.tenant_skew,
+            "services": args.services,
+            "service_skew": args.service_skew,
+            "users_per_account": args.users_per_tenant,
+            "account_keys": account_keys,
+            "service_keys": service_keys,
+            "start": start,
+            "step_us": (end - start) / timedelta(microseconds=1) / max(args.rows, 1),
+            "id_mode": args.id_mode,
+        }
+        loaded = 0
+        index_seconds: Optional[float] = None
+        started = time.perf_counter()
+        try:
+            ctx = multiprocessing.get_context("spawn")
+            with ctx.Pool(args.workers, initializer=_init_worker, initargs=(conninfo, settings)) as pool:
+                last_report = started
+                for rows in pool.imap_unordered(_load_chunk, chunks):
+                    loaded += rows
+                    now = time.perf_counter()
+                    if now - last_report >= 10:
+                        last_report = now
+                        _log(f"{loaded:,}/{args.rows:,} rows, {loaded / (now - started):,.0f} rows/s")
+            load_seconds = time.perf_counter() - started
+        finally:
+            if deferred:
+                index_started = time.perf_counter()
+                for name, definition in deferred:
+                    _log(f"creating {name}")
+                    conn.execute(definition)
+                index_seconds = time.perf_counter() - index_started
+        _log("vacuum analyze")
+        vacuum_started = time.perf_counter()
+        conn.execute("VACUUM (ANALYZE) audit_events")
+        vacuum_seconds = time.perf_counter() - vacuum_started
+        total = conn.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = 'audit_events'::regclass").fetchone()[0]
+        sizes = _table_sizes(conn)
+
+    return {
+        "rows": loaded,
+        "table_rows_estimate": total,
+        "workers": args.workers,
+        "load_seconds": round(load_seconds, 2),
+        "rows_per_sec": round(loaded / load_seconds, 1) if load_seconds else None,
+        "index_build_seconds": None if index_seconds is None else round(index_seconds, 2),
+        "vacuum_analyze_seconds": round(vacuum_seconds, 2),
+        "ingested_at_from": start.isoformat(),
+        "ingested_at_to": end.isoformat(),
+        **sizes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=max(1, (multiprocessing.cpu_count() or 2) - 1))
+    parser.add_argument("--batch-rows", type=int, default=50_000, help="rows per COPY chunk (one transaction)")
+    parser.add_argument("--tenants", type=int, default=5_000)
+    parser.add_argument("--tenant-skew", type=float, default=1.1)
+    parser.add_argument("--services", type=int, default=200)
+    parser.add_argument("--service-skew", type=float, default=0.8)
+    parser.add_argument("--users-per-tenant", type=int, default=20)
+    parser.add_argument("--years", type=float, default=6.0, help="ingested_at spread, ending now")
+    parser.add_argument("--id-mode", choices=["uuid4", "uuid7"], default="uuid4")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="empty audit_events before loading")
+    parser.add_argument("--defer-indexes", action="store_true", help="drop secondary indexes during the load")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    args = parser.parse_args()
+    print(json.dumps(run(args)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
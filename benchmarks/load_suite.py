@@ -0,0 +1,385 @@
+# benchmarks/load_suite.py
+"""
+Reproducible load test of the HTTP API: ingest, read by id, list/export and /stream fan-out.
+
+Targets:
+  inprocess   the ASGI app driven in this process (httpx ASGITransport, lifespan run here). No server
+              needed, but client and server share one event loop: numbers include client overhead.
+  uvicorn     a local `uvicorn app.main:app` subprocess on a free port, driven over TCP (one worker).
+Both use the database from DATABASE_URL (local Postgres), or with --store memory the in-memory event
+store (EVENT_STORE_BACKEND=memory: the HTTP/Python path without database time). --bus picks the
+stream bus: "memory" (the in-process stand-in, default) or "redis" (REDIS_URL).
+
+Scenarios (payloads from benchmarks/payloads.py, same --seed -> same traffic):
+  ingest      --ingest-requests POST /events at --concurrency: throughput and latency
+  by_id_hit   GET /events/{id} for recently ingested events (served from the event cache)
+  by_id_miss  GET /events/{id} for events evicted from the cache (the server runs with
+              CACHE_CAPACITY=--cache-capacity, so all but the newest ingested events miss)
+  list        GET /events?limit=--page-size: keyset export of the busiest tenant and of the whole
+              table (up to --list-pages pages each): pages/s, events/s and page latency
+  stream_N    N concurrent /stream clients (spread over tenants to stay within the per-tenant
+              limit); --stream-events events are posted (--stream-post-concurrency at a time) and every
+              client must receive each one: connect time, deliveries/s and POST -> client latency
+
+The Python client is part of every measurement; at 1,000 stream clients it is a bottleneck of its
+own. Compare runs of the same settings on the same machine rather than reading absolute capacity.
+
+Output: one JSON line per scenario on stdout, and with --out the whole run as one JSON document
+(commit, settings and all scenarios) for benchmarks/compare.py.
+
+Usage:
+    python -m benchmarks.load_suite --out bench-results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.load_suite --target uvicorn --scenarios ingest stream --stream-clients 1 100 1000
+    python -m benchmarks.compare bench-results/base.json bench-results/head.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.payloads import EventFactory
+from benchmarks.results import document, latency, write
+
+ROOT = Path(__file__).resolve().parents[1]
+SCENARIOS = ["ingest", "by_id", "list", "stream"]
+TENANT_HEADER = "X-Account-Id"
+STREAM_CLIENTS_PER_TENANT = 50
+_SEQ = re.compile(rb'"benchSeq":(\d+)')
+
+
+async def _drive(n: int, concurrency: int, request: Callable[[int], Awaitable[bool]]) -> dict:
+    """Run request(i) for i in range(n) on `concurrency` workers; latency, errors and rate."""
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index, errors
+        while next_index < n:
+            i = next_index
+            next_index += 1
+            started = time.perf_counter()
+            ok = await request(i)
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, n))))
+    elapsed = time.perf_counter() - started
+    return {"requests": n, "errors": errors, "requests_per_sec": round(n / elapsed, 1), **latency(latencies)}
+
+
+# --- targets ---------------------------------------------------------------------------------
+
+class _InProcessTarget:
+    """The app in this process; streams are driven at the ASGI level (httpx buffers whole bodies)."""
+
+    def __init__(self) -> None:
+        from app.main import app
+
+        self.app = app
+        self._lifespan = app.router.lifespan_context(app)
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    async def __aenter__(self) -> "_InProcessTarget":
+        await self._lifespan.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.client.aclose()
+        await self._lifespan.__aexit__(None, None, None)
+
+    async def stream(self, tenant: str, on_chunk: Callable[[bytes], None], closed: asyncio.Event) -> None:
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/stream", "raw_path": b"/stream", "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"bench"), (TENANT_HEADER.lower().encode(), tenant.encode())],
+            "client": ("127.0.0.1", 0), "server": ("bench", 80),
+        }
+
+        async def receive() -> dict:
+            await closed.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            if message["type"] == "http.response.body" and message.get("body"):
+                on_chunk(message["body"])
+
+        await self.app(scope, receive, send)
+
+
+class _UvicornTarget:
+    """`uvicorn app.main:app` in a subprocess on a free local port."""
+
+    def __init__(self, env: Dict[str, str], max_connections: int) -> None:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self._env = {**os.environ, **env}
+        self._process: Optional[subprocess.Popen] = None
+        limits = httpx.Limits(max_connections=max_connections + 64, max_keepalive_connections=64)
+        self.client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{self.port}", timeout=60, limits=limits)
+
+    async def __aenter__(self) -> "_UvicornTarget":
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT, env=self._env,
+        )
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if (await self.client.get("/health")).status_code == 200:
+                    return self
+            except httpx.TransportError:
+                pass
+            if self._process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not come up (see its output above)")
+            await asyncio.sleep(0.2)
+
+    async def __aexit__(self, *exc) -> None:
+        await self.client.aclose()
+        self._process.terminate()
+        self._process.wait(timeout=30)
+
+    async def stream(self, tenant: str, on_chunk: Callable[[bytes], None], closed: asyncio.Event) -> None:
+        async with self.client.stream("GET", "/stream", headers={TENANT_HEADER: tenant}, timeout=None) as res:
+            reading = asyncio.ensure_future(self._read(res, on_chunk))
+            waiting = asyncio.ensure_future(closed.wait())
+            await asyncio.wait({reading, waiting}, return_when=asyncio.FIRST_COMPLETED)
+            reading.cancel()
+            waiting.cancel()
+
+    @staticmethod
+    async def _read(res: httpx.Response, on_chunk: Callable[[bytes], None]) -> None:
+        async for chunk in res.aiter_bytes():  # decoded (/stream is compressed when negotiated)
+            on_chunk(chunk)
+
+
+# --- scenarios -------------------------------------------------------------------------------
+
+def _body(payload: dict) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+async def run_ingest(client: httpx.AsyncClient, factory: EventFactory, n: int, concurrency: int) -> tuple:
+    bodies = [_body(p) for p in factory.payloads(n)]
+    event_ids: List[Optional[str]] = [None] * n
+    headers = {"Content-Type": "application/json"}
+
+    async def post(i: int) -> bool:
+        res = await client.post("/events", content=bodies[i], headers=headers)
+        if res.status_code != 200:
+            return False
+        event_ids[i] = res.json()["eventId"]
+        return True
+
+    result = await _drive(n, concurrency, post)
+    result["bytes_per_event"] = round(sum(map(len, bodies)) / n)
+    return result, [e for e in event_ids if e is not None]
+
+
+async def run_by_id(client: httpx.AsyncClient, event_ids: List[str], cache_capacity: int, n: int, concurrency: int) -> dict:
+    """Hits on the newest ids (still cached), then one read of each evicted id (misses)."""
+    hot = event_ids[-min(cache_capacity // 2, len(event_ids)):]
+    cold = event_ids[:max(0, len(event_ids) - cache_capacity)][:n]
+
+    async def get(ids: List[str], i: int) -> bool:
+        return (await client.get(f"/events/{ids[i % len(ids)]}")).status_code == 200
+
+    results = {"by_id_hit": await _drive(n, concurrency, lambda i: get(hot, i))}
+    if cold:
+        results["by_id_miss"] = await _drive(len(cold), concurrency, lambda i: get(cold, i))
+    else:
+        results["by_id_miss"] = {"skipped": "ingest at least --cache-capacity + 1 events to get misses"}
+    return results
+
+
+async def run_list(client: httpx.AsyncClient, account_id: Optional[str], page_size: int, max_pages: int) -> dict:
+    params = {"limit": page_size}
+    if account_id is not None:
+        params["accountId"] = account_id
+    latencies: List[float] = []
+    events = wire = 0
+    started = time.perf_counter()
+    while len(latencies) < max_pages:
+        page_started = time.perf_counter()
+        res = await client.get("/events", params=params)
+        latencies.append(time.perf_counter() - page_started)
+        res.raise_for_status()
+        events += len(res.json())
+        wire += int(res.headers.get("content-length") or len(res.content))
+        cursor = res.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["cursor"] = cursor
+    elapsed = time.perf_counter() - started
+    return {
+        "pages": len(latencies),
+        "events": events,
+        "pages_per_sec": round(len(latencies) / elapsed, 1),
+        "events_per_sec": round(events / elapsed, 1),
+        "wire_bytes_per_event": round(wire / events) if events else 0,
+        **latency(latencies),
+    }
+
+
+async def run_stream(target, factory: EventFactory, clients: int, events: int, concurrency: int, timeout: float) -> dict:
+    closed = asyncio.Event()
+    sent_at: Dict[int, float] = {}
+    latencies: List[float] = []
+    expected = clients * events
+    all_delivered = asyncio.Event()
+    buffers = [b""] * clients
+
+    def on_chunk(index: int, chunk: bytes) -> None:
+        received = time.perf_counter()
+        data = buffers[index] + chunk
+        lines = data.split(b"\n")
+        buffers[index] = lines.pop()
+        for line in lines:
+            match = _SEQ.search(line)
+            if match:
+                latencies.append(received - sent_at[int(match.group(1))])
+        if len(latencies) >= expected:
+            all_delivered.set()
+
+    async def client_task(index: int) -> None:
+        tenant = f"bench-stream-{index // STREAM_CLIENTS_PER_TENANT}"
+        await target.stream(tenant, lambda chunk: on_chunk(index, chunk), closed)
+
+    connect_started = time.perf_counter()
+    tasks = [asyncio.create_task(client_task(i)) for i in range(clients)]
+    while True:
+        active = (await target.client.get("/__stream_probe__")).json()["streams"]["active"]
+        if active >= clients:
+            break
+        if any(t.done() for t in tasks) or time.perf_counter() - connect_started > timeout:
+            closed.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            return {"clients": clients, "error": f"only {active} of {clients} streams admitted"}
+        await asyncio.sleep(0.02)
+    connect_seconds = time.perf_counter() - connect_started
+
+    bodies = [_body(factory.payload(metadata={"benchSeq": i})) for i in range(events)]
+    headers = {"Content-Type": "application/json"}
+
+    async def post(i: int) -> bool:
+        sent_at[i] = time.perf_counter()
+        return (await target.client.post("/events", content=bodies[i], headers=headers)).status_code == 200
+
+    started = time.perf_counter()
+    ingest = await _drive(events, concurrency, post)
+    try:
+        await asyncio.wait_for(all_delivered.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - started
+    closed.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {
+        "clients": clients,
+        "events": events,
+        "connect_ms": round(connect_seconds * 1000, 1),
+        "deliveries": len(latencies),
+        "delivered_ratio": round(len(latencies) / expected, 4),
+        "deliveries_per_sec": round(len(latencies) / elapsed, 1),
+        "post_errors": ingest["errors"],
+        **latency(latencies),
+    }
+
+
+# --- runner ----------------------------------------------------------------------------------
+
+def _server_env(args: argparse.Namespace) -> Dict[str, str]:
+    max_clients = max(args.stream_clients, default=0)
+    return {
+        "STREAM_BUS_BACKEND": args.bus,
+        "EVENT_STORE_BACKEND": args.store,
+        "CACHE_CAPACITY": str(args.cache_capacity),
+        "STREAM_MAX_CONNECTIONS": str(max(1000, max_clients)),
+        "STREAM_MAX_CONNECTIONS_PER_TENANT": str(STREAM_CLIENTS_PER_TENANT),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    env = _server_env(args)
+    if args.target == "inprocess":
+        os.environ.update(env)  # read by app.config at import
+        target = _InProcessTarget()
+    else:
+        target = _UvicornTarget(env, max(args.stream_clients, default=0))
+
+    factory = EventFactory(seed=args.seed)
+    results: Dict[str, dict] = {}
+
+    def report(name: str, result: dict) -> None:
+        results[name] = result
+        print(json.dumps({"scenario": name, **result}), flush=True)
+
+    async with target:
+        client = target.client
+        if "ingest" in args.scenarios or "by_id" in args.scenarios:
+            ingest, event_ids = await run_ingest(client, factory, args.ingest_requests, args.concurrency)
+            if "ingest" in args.scenarios:
+                report("ingest", ingest)
+            if "by_id" in args.scenarios:
+                for name, result in (await run_by_id(
+                    client, event_ids, args.cache_capacity, args.read_requests, args.concurrency
+                )).items():
+                    report(name, result)
+        if "list" in args.scenarios:
+            busiest = factory.accounts[0][0]  # Zipf rank 1
+            report("list_tenant", await run_list(client, busiest, args.page_size, args.list_pages))
+            report("list_global", await run_list(client, None, args.page_size, args.list_pages))
+        if "stream" in args.scenarios:
+            for clients in args.stream_clients:
+                report(f"stream_{clients}", await run_stream(
+                    target, factory, clients, args.stream_events, args.stream_post_concurrency, args.stream_timeout
+                ))
+
+    return document(
+        "load",
+        results,
+        target=args.target,
+        settings={k: v for k, v in vars(args).items() if k != "out"},
+        serverEnv=env,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--bus", choices=["memory", "redis"], default="memory")
+    parser.add_argument("--store", choices=["postgres", "memory"], default="postgres")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--ingest-requests", type=int, default=2000)
+    parser.add_argument("--read-requests", type=int, default=2000)
+    parser.add_argument("--cache-capacity", type=int, default=500, help="server CACHE_CAPACITY (sets the hit/miss split)")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--list-pages", type=int, default=50, help="max pages per list scan")
+    parser.add_argument("--stream-clients", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--stream-events", type=int, default=100)
+    parser.add_argument("--stream-post-concurrency", type=int, default=1, help="concurrent POSTs feeding the streams")
+    parser.add_argument("--stream-timeout", type=float, default=60.0)
+    parser.add_argument("--out", type=Path, help="write the whole run as one JSON document")
+    args = parser.parse_args()
+
+    doc = asyncio.run(run(args))
+    if args.out is not None:
+        write(args.out, doc)
+
+
+if __name__ == "__main__":
+    main()
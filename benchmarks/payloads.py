@@ -0,0 +1,118 @@
+# benchmarks/payloads.py
+"""
+Deterministic, production-shaped POST /events payloads for the load benchmarks.
+
+Shape (valid against audit_log_schema.json):
+  - tenants are Zipf-skewed: a handful of accounts send most of the traffic, with a long tail
+  - reporting services are Zipf-skewed too (service_skew; 0 = uniform)
+  - log levels ~85% informational / 10% warning / 5% error (errors carry an errorCode)
+  - ipAddress: ~70% IPv4, ~20% IPv6, ~10% absent
+  - metadata: ~70% small (2-4 keys), ~25% medium (~12 keys), ~5% large (~4 KB)
+
+Same --seed -> same sequence of payloads, so runs on different commits send identical traffic.
+Account and service ids depend only on their rank, so factories with different seeds (e.g. one per
+benchmarks/datagen.py worker) share the same tenants and services.
+"""
+import random
+import uuid
+from itertools import accumulate
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+LOG_TYPES = {
+    "Login": ["UserLogin", "UserLogout", "PasswordReset", "MfaChallenge"],
+    "System": ["ServiceStart", "ConfigReload", "QuotaExceeded", "BackupCompleted"],
+    "Management": ["RoleChange", "UserInvite", "ApiKeyRotate", "PolicyUpdate", "DataExport"],
+}
+ACTIONS = ["Access", "Approve", "Create", "Update", "Delete", "Deny", "Execute", "Notify", "Revoke", "Export"]
+LEVELS = (["informational", "warning", "error"], [85, 10, 5])
+IDENTITY_TYPES = (["User", "Application", "API Key"], [80, 12, 8])
+BROWSERS = ["Chrome", "Firefox", "Safari", "Edge"]
+OSES = ["Windows", "macOS", "Linux", "iOS", "Android"]
+SERVICE_NAMESPACE = uuid.UUID("5b0f8a4e-2f61-4c1e-9a57-8d2b9e0c7a13")
+
+
+def zipf_cum_weights(n: int, skew: float) -> List[float]:
+    """Cumulative Zipf weights for ranks 1..n (for random.choices(cum_weights=...))."""
+    return list(accumulate(1.0 / (rank + 1) ** skew for rank in range(n)))
+
+
+class EventFactory:
+    """Deterministic POST /events payloads; see the module docstring for the distribution."""
+
+    def __init__(self, seed: int = 42, accounts: int = 200, services: int = 40, users_per_account: int = 50,
+                 skew: float = 1.1, start: Optional[datetime] = None, service_skew: float = 0.0) -> None:
+        self._rnd = random.Random(seed)
+        self.accounts: List[Tuple[str, str]] = [(f"acct-{i:05d}", f"Tenant {i}") for i in range(accounts)]
+        self._account_weights = zipf_cum_weights(accounts, skew)
+        self.services = [str(uuid.uuid5(SERVICE_NAMESPACE, f"service-{i}")) for i in range(services)]
+        self._service_weights = zipf_cum_weights(services, service_skew)
+        self._users: Dict[str, List[Tuple[str, str, str]]] = {}
+        self._users_per_account = users_per_account
+        self._clock = start or datetime.now(timezone.utc) - timedelta(hours=1)
+
+    def account(self) -> Tuple[str, str]:
+        return self._rnd.choices(self.accounts, cum_weights=self._account_weights)[0]
+
+    def service(self) -> str:
+        return self._rnd.choices(self.services, cum_weights=self._service_weights)[0]
+
+    def payload(self, account: Optional[Tuple[str, str]] = None, metadata: Optional[dict] = None) -> dict:
+        rnd = self._rnd
+        account_id, account_name = account or self.account()
+        log_type = rnd.choice(list(LOG_TYPES))
+        level = rnd.choices(*LEVELS)[0]
+        identity_uuid, email, full_name = self._user(account_id)
+        self._clock += timedelta(milliseconds=rnd.randint(1, 50))
+        event = {
+            "time": self._clock.isoformat(timespec="microseconds"),
+            "logType": log_type,
+            "reportingService": self.service(),
+            "logLevel": level,
+            "activityType": rnd.choice(LOG_TYPES[log_type]),
+            "identityType": rnd.choices(*IDENTITY_TYPES)[0],
+            "user": {"identityUuid": identity_uuid, "userEmail": email, "userFullName": full_name},
+            "action": rnd.choice(ACTIONS),
+            "message": f"{full_name} {rnd.choice(['completed', 'requested', 'failed'])} operation "
+                       f"{rnd.randint(1, 99_999)} on resource /{rnd.choice(['users', 'roles', 'keys', 'reports'])}/"
+                       f"{rnd.getrandbits(48):012x}",
+            "account": {"accountId": account_id, "accountName": account_name},
+        }
+        ip = rnd.random()
+        if ip < 0.7:
+            event["ipAddress"] = f"10.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}"
+        elif ip < 0.9:
+            event["ipAddress"] = f"2001:db8::{rnd.getrandbits(16):x}:{rnd.getrandbits(16):x}"
+        if level == "error":
+            event["errorCode"] = rnd.choice(["AUTH_DENIED", "QUOTA", "TIMEOUT", "VALIDATION"])
+        event["metadata"] = self._metadata() if metadata is None else metadata
+        return event
+
+    def payloads(self, n: int) -> List[dict]:
+        return [self.payload() for _ in range(n)]
+
+    def _user(self, account_id: str) -> Tuple[str, str, str]:
+        users = self._users.get(account_id)
+        if users is None:
+            rnd = self._rnd
+            users = self._users[account_id] = [
+                (str(uuid.UUID(int=rnd.getrandbits(128), version=4)), f"user{i}@{account_id}.example.com", f"User {i}")
+                for i in range(self._users_per_account)
+            ]
+        return self._rnd.choice(users)
+
+    def _metadata(self) -> dict:
+        rnd = self._rnd
+        size = rnd.random()
+        metadata = {"browser": rnd.choice(BROWSERS), "os": rnd.choice(OSES)}
+        if size < 0.7:
+            if rnd.random() < 0.5:
+                metadata["requestId"] = f"{rnd.getrandbits(64):016x}"
+        elif size < 0.95:
+            metadata.update({f"attr{i}": f"value-{rnd.randint(0, 10_000)}" for i in range(10)})
+        else:
+            metadata["changes"] = [
+                {"field": f"field{i}", "old": f"{rnd.getrandbits(96):024x}", "new": f"{rnd.getrandbits(96):024x}"}
+                for i in range(40)
+            ]
+        return metadata
@@ -0,0 +1,65 @@
+# benchmarks/results.py
+"""
+Shared helpers for benchmark result documents (latency summaries, run metadata, --out files).
+
+Every suite writes `{"suite", "version", "meta", "results": {scenario: {metric: value}}}`, so
+benchmarks/compare.py can diff any two runs of the same suite.
+"""
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULT_VERSION = 1
+
+
+def pct(values: List[float], p: float) -> float:
+    values = sorted(values)
+    idx = min(len(values) - 1, max(0, int(round(p / 100.0 * (len(values) - 1)))))
+    return values[idx]
+
+
+def latency(seconds: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max in milliseconds; {} for no samples."""
+    if not seconds:
+        return {}
+    return {
+        "p50_ms": round(pct(seconds, 50) * 1000, 3),
+        "p95_ms": round(pct(seconds, 95) * 1000, 3),
+        "p99_ms": round(pct(seconds, 99) * 1000, 3),
+        "max_ms": round(max(seconds) * 1000, 3),
+    }
+
+
+def git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def document(suite: str, results: Dict[str, dict], **meta) -> dict:
+    """The --out document: commit and machine metadata plus the suite's own `meta` entries."""
+    return {
+        "suite": suite,
+        "version": RESULT_VERSION,
+        "meta": {
+            "commit": git("rev-parse", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            **meta,
+        },
+        "results": results,
+    }
+
+
+def write(path: Path, doc: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
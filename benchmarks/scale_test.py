@@ -0,0 +1,245 @@
+# benchmarks/scale_test.py
+"""
+Time the hot database paths against a large audit_events table (see benchmarks/datagen.py).
+
+Runs the service code itself (events_service, RetentionService) in this process against
+DATABASE_URL, with the event cache off (CACHE_BACKEND=none) so every read reaches Postgres.
+
+Scenarios:
+  table                  row estimate, heap and per-index sizes (reported, not judged)
+  by_id_hit              get_event_by_id for --lookups ids sampled across the table (TABLESAMPLE)
+  by_id_miss             get_event_by_id for random ids that do not exist
+  tenant_first_page      list_events(accountId=<busiest tenant>, limit=--page-size), --reps times
+  tenant_scan            keyset scan of the busiest tenant, up to --pages pages: pages/s, page latency
+  tail_tenant_first_page first page of a rarely seen tenant (sparse index range)
+  global_first_page      list_events(limit=--page-size): the oldest events of the whole table
+  range_scan             keyset scan from the middle of the time range (since=<median ingested_at>)
+  retention              --retention-cycles cycles of RetentionService._retention_cycle (0 skips):
+                         rows deleted, batches, final batch size, deleted rows/s
+
+Tenants are picked from a TABLESAMPLE of account_key, the time midpoint from the planner's
+ingested_at histogram, so no step needs a full scan of a 10^8-row table.
+
+retention DELETES every row older than RETENTION_YEARS (that is the point of the test). It runs with
+the service's own batching and pauses (RETENTION_* settings); set RETENTION_PAUSE_FACTOR=0 to time the
+deletes alone and RETENTION_CYCLE_BUDGET_SECONDS to bound a cycle. Run it last, on a scratch database.
+
+Usage:
+    python -m benchmarks.scale_test --retention-cycles 0
+    python -m benchmarks.scale_test --out bench-results/scale-$(git rev-parse --short HEAD).json
+    python -m benchmarks.compare bench-results/scale-base.json bench-results/scale-head.json
+
+Output: one JSON line per scenario on stdout and, with --out, one document for benchmarks/compare.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.results import document, latency, write
+
+
+def _timed(fn: Callable[[], object]) -> Tuple[float, object]:
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def _sample_pct(total: int, wanted: int) -> float:
+    """TABLESAMPLE SYSTEM percentage expected to return about `wanted` rows of `total`."""
+    return min(100.0, max(0.0001, wanted * 100.0 / max(total, 1)))
+
+
+def table_stats(db) -> dict:
+    from sqlalchemy import text
+
+    stats = dict(db.execute(text("""
+        SELECT c.reltuples::bigint AS rows_estimate,
+               pg_table_size(c.oid) AS table_bytes,
+               pg_indexes_size(c.oid) AS index_bytes
+        FROM pg_class c WHERE c.oid = 'audit_events'::regclass
+    """)).mappings().one())
+    for name, size in db.execute(text("""
+        SELECT i.relname, pg_relation_size(i.oid)
+        FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = 'audit_events'::regclass ORDER BY i.relname
+    """)):
+        stats[f"{name}_bytes"] = size
+    return stats
+
+
+def pick_tenants(db, total: int) -> Tuple[Optional[str], Optional[str]]:
+    """(busiest, rarest) accountId seen in a ~100k-row sample of the table."""
+    from sqlalchemy import text
+
+    rows = db.execute(text(f"""
+        SELECT a.account_id, s.n
+        FROM (
+            SELECT account_key, count(*) AS n
+            FROM audit_events TABLESAMPLE SYSTEM ({_sample_pct(total, 100_000)})
+            WHERE account_key IS NOT NULL
+            GROUP BY account_key
+        ) s JOIN accounts a ON a.id = s.account_key
+        ORDER BY s.n DESC, a.account_id
+    """)).all()
+    if not rows:
+        return None, None
+    return rows[0][0], rows[-1][0]
+
+
+def median_ingested_at(db):
+    """Middle bound of the planner's ingested_at histogram (needs ANALYZE), else None."""
+    from sqlalchemy import text
+
+    bounds = db.execute(text("""
+        SELECT histogram_bounds::text::timestamp[]
+        FROM pg_stats
+        WHERE schemaname = current_schema() AND tablename = 'audit_events' AND attname = 'ingested_at'
+    """)).scalar()
+    return bounds[len(bounds) // 2] if bounds else None
+
+
+def run_lookups(db, event_ids: List[uuid.UUID]) -> dict:
+    from app.services.events_service import get_event_by_id
+
+    latencies = []
+    found = 0
+    for event_id in event_ids:
+        seconds, event = _timed(lambda: get_event_by_id(db, event_id))
+        latencies.append(seconds)
+        found += event is not None
+    return {"lookups": len(event_ids), "found": found, **latency(latencies)}
+
+
+def run_first_page(db, reps: int, **filters) -> dict:
+    from app.services.events_service import list_events
+
+    latencies = []
+    events = 0
+    for _ in range(reps):
+        seconds, page = _timed(lambda: list_events(db, **filters))
+        latencies.append(seconds)
+        events = len(page)
+    return {"reps": reps, "page_events": events, **latency(latencies)}
+
+
+def run_scan(db, max_pages: int, **filters) -> dict:
+    """Follow keyset cursors for up to max_pages pages."""
+    from app.services.events_service import encode_cursor, list_events
+
+    latencies = []
+    events = 0
+    after = None
+    started = time.perf_counter()
+    for _ in range(max_pages):
+        seconds, page = _timed(lambda: list_events(db, after=after, **filters))
+        latencies.append(seconds)
+        events += len(page)
+        if len(page) < filters["limit"]:
+            break
+        after = encode_cursor(page[-1])
+    elapsed = time.perf_counter() - started
+    return {
+        "pages": len(latencies),
+        "events": events,
+        "pages_per_sec": round(len(latencies) / elapsed, 1),
+        "events_per_sec": round(events / elapsed, 1),
+        **latency(latencies),
+    }
+
+
+async def run_retention(cycles: int) -> dict:
+    from app.retention import RetentionService
+
+    service = RetentionService(leader_election=False)
+    deleted = batches = 0
+    elapsed = 0.0
+    cycle_latencies = []
+    for _ in range(cycles):
+        started = time.perf_counter()
+        deleted += await service._retention_cycle()
+        cycle_latencies.append(time.perf_counter() - started)
+        batches += service.progress.batches
+        elapsed += service.progress.elapsed_seconds
+        if not service.progress.budget_exhausted:
+            break  # backlog drained; further cycles would only time empty batches
+    return {
+        "cycles": len(cycle_latencies),
+        "deleted": deleted,
+        "batches": batches,
+        "final_batch_size": service.batch_size,
+        "deleted_rows_per_sec": round(deleted / elapsed, 1) if elapsed else 0.0,
+        **{f"cycle_{k}": v for k, v in latency(cycle_latencies).items()},
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    os.environ["CACHE_BACKEND"] = "none"  # read by app.config at import: lookups must reach the database
+    from sqlalchemy import text
+
+    from app.database import SessionLocal
+
+    rnd = random.Random(args.seed)
+    results: Dict[str, dict] = {}
+
+    def report(name: str, result: dict) -> None:
+        results[name] = result
+        print(json.dumps({"scenario": name, **result}), flush=True)
+
+    with SessionLocal() as db:
+        table = table_stats(db)
+        report("table", table)
+        total = table["rows_estimate"]
+
+        ids = [row[0] for row in db.execute(text(
+            f"SELECT event_id FROM audit_events TABLESAMPLE SYSTEM ({_sample_pct(total, args.lookups * 20)})"
+        ))]
+        rnd.shuffle(ids)
+        report("by_id_hit", run_lookups(db, ids[:args.lookups]))
+        report("by_id_miss", run_lookups(db, [uuid.UUID(int=rnd.getrandbits(128), version=4) for _ in range(args.lookups)]))
+
+        busiest, rarest = pick_tenants(db, total)
+        if busiest is not None:
+            report("tenant_first_page", run_first_page(db, args.reps, account_id=busiest, limit=args.page_size))
+            report("tenant_scan", run_scan(db, args.pages, account_id=busiest, limit=args.page_size))
+            report("tail_tenant_first_page", run_first_page(db, args.reps, account_id=rarest, limit=args.page_size))
+        report("global_first_page", run_first_page(db, args.reps, limit=args.page_size))
+        middle = median_ingested_at(db)
+        if middle is not None:
+            report("range_scan", run_scan(db, args.pages, since=middle, limit=args.page_size))
+        db.rollback()
+
+    if args.retention_cycles > 0:
+        report("retention", asyncio.run(run_retention(args.retention_cycles)))
+
+    return document(
+        "scale",
+        results,
+        settings={k: v for k, v in vars(args).items() if k != "out"},
+        tenants={"busiest": busiest, "rarest": rarest},
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=100, help="max pages per keyset scan")
+    parser.add_argument("--reps", type=int, default=20, help="repetitions of each first-page query")
+    parser.add_argument("--retention-cycles", type=int, default=1, help="0 skips the (destructive) retention run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, help="write the whole run as one JSON document")
+    args = parser.parse_args()
+
+    doc = run(args)
+    if args.out is not None:
+        write(args.out, doc)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# tests/test_archive.py
+import json
+import pytest
+from uuid import UUID
+from sqlalchemy import text
+
+from app.database import engine
+from app.retention import RetentionService
+from app.services.archive import SegmentArchive, main as archive_cli
+
+def _event(i: int) -> dict:
+    return {
+        "eventId": f"00000000-0000-4000-8000-{i:012d}",
+        "ingestedAt": f"2001-01-01T00:00:{i % 60:02d}.000000Z",
+        "message": f"event {i}",
+    }
+
+def test_segment_roundtrip_and_time_range(tmp_path):
+    archive = SegmentArchive(str(tmp_path), block_events=8)
+    first = archive.write_segment([_event(i) for i in range(20)])
+    archive.write_segment([{**_event(100), "ingestedAt": "2005-06-01T00:00:00.000000Z"}])
+
+    assert first["count"] == 20
+    # A fresh instance (no in-memory index cache) reads the segment back from disk
+    reader = SegmentArchive(str(tmp_path))
+    assert reader.lookup(_event(13)["eventId"]) == _event(13)
+    assert reader.lookup("00000000-0000-4000-8000-999999999999") is None
+
+    in_range = list(reader.segments(since="2005-01-01T00:00:00Z"))
+    assert [s["count"] for s in in_range] == [1]
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_cli_lookup(tmp_path, capsys):
+    SegmentArchive(str(tmp_path)).write_segment([_event(1)])
+    assert archive_cli(["--dir", str(tmp_path), "lookup", _event(1)["eventId"]]) == 0
+    assert json.loads(capsys.readouterr().out) == _event(1)
+    assert archive_cli(["--dir", str(tmp_path), "lookup", _event(2)["eventId"]]) == 1
+
+def test_retention_archives_before_delete(client, tmp_path):
+    resp = client.post("/events", json={
+        "time": "2025-08-10T12:00:00Z",
+        "logType": "Login",
+        "reportingService": "11111111-1111-1111-1111-111111111111",
+        "logLevel": "informational",
+        "activityType": "user-login",
+        "identityType": "User",
+        "action": "Access",
+        "message": "archived login",
+        "user": {"identityUuid": "user-archive"},
+        "account": {"accountId": "acct-archive", "accountName": "Archive Tenant"},
+    })
+    assert resp.status_code == 200, resp.text
+    event_id = resp.json()["eventId"]
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE audit_events SET ingested_at = TIMESTAMP '2000-01-01 00:00:00+00' WHERE event_id = :e"),
+            {"e": event_id},
+        )
+
+    archive = SegmentArchive(str(tmp_path))
+    svc = RetentionService(interval_seconds=3600, leader_election=False, archive=archive)
+    assert svc._delete_one_batch(limit=1000) >= 1
+
+    assert client.get(f"/events/{event_id}").status_code == 404
+    archived = archive.lookup(event_id)
+    assert archived["message"] == "archived login"
+    assert archived["account"] == {"accountId": "acct-archive", "accountName": "Archive Tenant"}
+
+def test_lookup_prunes_segments_by_uuid7_range_and_bounds_the_index_cache(tmp_path):
+    def v7_event(ms: int, i: int) -> dict:
+        event_id = str(UUID(int=(ms << 80) | (0x7 << 76) | (0b10 << 62) | i))
+        return {**_event(i), "eventId": event_id}
+
+    writer = SegmentArchive(str(tmp_path))
+    segments = [[v7_event(1_000_000 * s + i, i) for i in range(5)] for s in range(1, 4)]
+    names = [writer.write_segment(events)["segment"] for events in segments]
+    legacy = writer.write_segment([_event(7)])["segment"]  # UUIDv4 IDs: no ID range
+    assert [("minIdMs" in e) for e in writer.segments()] == [True, True, True, False]
+
+    reader = SegmentArchive(str(tmp_path), index_cache_segments=2)
+    wanted = segments[1][3]
+    assert reader.lookup(wanted["eventId"]) == wanted
+    assert list(reader._index_cache) == [names[1]]  # only the segment whose ID range covers it
+    assert reader.lookup(_event(7)["eventId"]) == _event(7)
+    assert list(reader._index_cache) == [names[1], legacy]  # v7 segments are never opened for a v4 ID
+    assert reader.lookup(str(UUID(int=(5 << 80) | (0x7 << 76) | (0b10 << 62)))) is None
+
+    for events in segments:
+        assert reader.lookup(events[0]["eventId"]) == events[0]
+    assert len(reader._index_cache) == 2
+    assert reader.lookup("not-a-uuid") is None
+
+def test_lookup_opens_only_segments_whose_bloom_filter_matches(tmp_path):
+    writer = SegmentArchive(str(tmp_path))
+    names = [writer.write_segment([_event(s * 100 + i) for i in range(20)])["segment"] for s in range(4)]
+    assert all("bloom" not in e for e in writer.segments())  # kept out of the listed entries
+
+    reader = SegmentArchive(str(tmp_path))
+    assert reader.lookup(_event(213)["eventId"]) == _event(213)
+    assert list(reader._index_cache) == [names[2]]
+    assert reader.lookup("00000000-0000-4000-8000-999999999999") is None
+    assert list(reader._index_cache) == [names[2]]
+
+def test_archive_requires_a_directory():
+    with pytest.raises(ValueError):
+        SegmentArchive("")
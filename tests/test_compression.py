@@ -0,0 +1,79 @@
+# tests/test_compression.py
+import zlib
+from uuid import uuid4
+import pytest
+
+from app.middleware.compression import CompressionMiddleware, negotiate
+
+def _payload(account_id: str) -> dict:
+    return {
+        "logType": "Login",
+        "reportingService": str(uuid4()),
+        "logLevel": "informational",
+        "activityType": "UserLogin",
+        "identityType": "User",
+        "user": {"identityUuid": "u-gzip"},
+        "action": "Access",
+        "message": "compression test",
+        "account": {"accountId": account_id, "accountName": "Gzip Tenant"},
+    }
+
+def test_negotiate_honours_q_values():
+    supported = ["zstd", "gzip"]
+    assert negotiate("gzip, zstd", supported) == "zstd"  # tie -> server preference
+    assert negotiate("gzip;q=1.0, zstd;q=0.5", supported) == "gzip"
+    assert negotiate("zstd;q=0, *", supported) == "gzip"
+    assert negotiate("identity", supported) is None
+    assert negotiate("", supported) is None
+    assert negotiate("zstd", ["gzip"]) is None
+
+def test_list_is_gzipped_and_small_event_is_not(client):
+    account = f"acct-{uuid4()}"
+    created = [client.post("/events", json=_payload(account)).json() for _ in range(10)]
+
+    res = client.get("/events", params={"accountId": account, "limit": 10}, headers={"Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip" and "Accept-Encoding" in res.headers["Vary"]
+    assert res.headers["ETag"].endswith('-gzip"')
+    assert [e["eventId"] for e in res.json()] == [e["eventId"] for e in created]
+
+    again = client.get(
+        "/events", params={"accountId": account, "limit": 10},
+        headers={"Accept-Encoding": "gzip", "If-None-Match": res.headers["ETag"]},
+    )
+    assert again.status_code == 304 and again.headers["ETag"] == res.headers["ETag"]
+
+    single = client.get(f"/events/{created[0]['eventId']}", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in single.headers and "Accept-Encoding" in single.headers["Vary"]
+
+    plain = client.get("/events", params={"accountId": account}, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+
+def _decoder(encoding: str):
+    if encoding == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(31)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+async def test_streaming_chunks_are_flushed_per_batch(encoding):
+    batches = [b'{"n":%d,"message":"streamed event"}\n' % i for i in range(5)]
+    decoder = _decoder(encoding)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/x-ndjson")]})
+        for batch in batches:
+            await send({"type": "http.response.body", "body": batch, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent = []
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "headers": [(b"accept-encoding", encoding.encode())]}
+    await CompressionMiddleware(app, min_size=1024)(scope, None, send)
+
+    assert (b"content-encoding", encoding.encode()) in sent[0]["headers"]
+    for batch, message in zip(batches, sent[1:]):
+        assert decoder.decompress(message["body"]) == batch  # decodable as soon as it arrives
+    assert sent[-1]["more_body"] is False
@@ -0,0 +1,125 @@
+# tests/test_dimensions.py
+import json
+from uuid import UUID, uuid4
+from sqlalchemy import text
+
+from app.database import engine
+from app.services.cache_factory import get_cache
+from app.services.dimension_backfill import backfill_batch
+from app.services.dimensions import DimensionCache
+
+def _payload(account_id: str) -> dict:
+    return {
+        "logType": "Login",
+        "reportingService": str(uuid4()),
+        "logLevel": "informational",
+        "activityType": "user-login",
+        "identityType": "User",
+        "user": {"identityUuid": "u-dim"},
+        "action": "Access",
+        "message": "dimension test",
+        "account": {"accountId": account_id, "accountName": "Dim Tenant"},
+    }
+
+def test_ingest_stores_keys_and_reads_back_identical_json(client):
+    created = client.post("/events", json=_payload(f"acct-{uuid4()}")).json()
+    with engine.begin() as conn:
+        row = conn.execute(
+            text("SELECT account, reporting_service, account_key, reporting_service_key FROM audit_events WHERE event_id = :e"),
+            {"e": created["eventId"]},
+        ).one()
+    assert row[0] is None and row[1] is None
+    assert row[2] is not None and row[3] is not None
+
+    get_cache().delete(f"event:{created['eventId']}")  # force the DB read path
+    assert client.get(f"/events/{created['eventId']}").json() == created
+
+def test_dimension_cache_hits_after_first_resolve():
+    cache = DimensionCache()
+    account_id = f"acct-{uuid4()}"
+    first = cache.account_key(account_id, "Name A")
+    assert cache.account_key(account_id, "Name A") == first
+    assert cache.account_key(account_id, "Name B") != first  # renamed tenant -> new dimension row
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # Another process (fresh cache) resolves to the same committed row
+    assert DimensionCache().account_key(account_id, "Name A") == first
+
+def test_dimension_cache_evicts_the_least_recently_used_key():
+    cache = DimensionCache(capacity=2)
+    account_id = f"acct-{uuid4()}"
+    cache.account_key(account_id, "A")
+    cache.account_key(account_id, "B")
+    cache.account_key(account_id, "A")  # hit: A is now the most recently used
+    cache.account_key(account_id, "C")  # evicts B, not A
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    cache.account_key(account_id, "A")
+    assert (cache.hits, cache.misses) == (2, 3)
+    cache.account_key(account_id, "B")
+    assert (cache.hits, cache.misses) == (2, 4)
+
+def test_backfill_moves_legacy_rows_without_changing_output(client):
+    event_id, service = uuid4(), uuid4()
+    account = {"accountId": f"acct-{uuid4()}", "accountName": "Legacy Tenant"}
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO audit_events (event_id, ingested_at, log_type, reporting_service, log_level,
+                    activity_type, identity_type, "user", action, message, account)
+                VALUES (:e, NOW() AT TIME ZONE 'UTC', 'Login', :s, 'informational', 'legacy', 'User',
+                    CAST(:u AS json), 'Access', 'legacy row', CAST(:a AS json))
+                """
+            ),
+            {"e": event_id, "s": service, "u": json.dumps({"identityUuid": "u-legacy"}), "a": json.dumps(account)},
+        )
+
+    before = client.get(f"/events/{event_id}").json()
+    assert before["account"] == account and before["reportingService"] == str(service)
+
+    # Process only our row: start the keyset just before it
+    processed = backfill_batch(after=UUID(int=event_id.int - 1), batch_size=1)
+    assert processed == [event_id]
+    with engine.begin() as conn:
+        row = conn.execute(
+            text("SELECT account, reporting_service, account_key, reporting_service_key FROM audit_events WHERE event_id = :e"),
+            {"e": event_id},
+        ).one()
+    assert row[0] is None and row[1] is None and row[2] is not None and row[3] is not None
+
+    get_cache().delete(f"event:{event_id}")
+    assert client.get(f"/events/{event_id}").json() == before
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM audit_events WHERE event_id = :e"), {"e": event_id})
+
+def test_tenant_list_merges_every_account_key_and_legacy_rows_in_order(client):
+    account_id = f"acct-{uuid4()}"
+    first = client.post("/events", json=_payload(account_id)).json()["eventId"]
+    legacy = uuid4()
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO audit_events (event_id, ingested_at, log_type, reporting_service, log_level,
+                    activity_type, identity_type, "user", action, message, account)
+                VALUES (:e, NOW() AT TIME ZONE 'UTC', 'Login', :s, 'informational', 'legacy', 'User',
+                    CAST(:u AS json), 'Access', 'legacy row', CAST(:a AS json))
+                """
+            ),
+            {"e": legacy, "s": uuid4(), "u": json.dumps({"identityUuid": "u-legacy"}),
+             "a": json.dumps({"accountId": account_id, "accountName": "Dim Tenant"})},
+        )
+    renamed = {**_payload(account_id), "account": {"accountId": account_id, "accountName": "Renamed"}}
+    last = client.post("/events", json=renamed).json()["eventId"]
+
+    # Two account keys (renamed tenant) plus the legacy row: three ordered branches
+    listed = client.get("/events", params={"accountId": account_id}).json()
+    assert [e["eventId"] for e in listed] == [first, str(legacy), last]
+    page = client.get("/events", params={"accountId": account_id, "limit": 2})
+    assert [e["eventId"] for e in page.json()] == [first, str(legacy)]
+    assert client.get("/events", params={"accountId": f"acct-{uuid4()}"}).json() == []
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM audit_events WHERE event_id = :e"), {"e": legacy})
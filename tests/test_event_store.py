@@ -0,0 +1,157 @@
+# tests/test_event_store.py
+# One conformance suite for every event store engine (app/services/event_store.py).
+# Postgres runs in a session that is rolled back afterwards; events are placed in 1975 so the
+# time-window scans and delete_older_than only ever see this test's rows.
+import random
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.database import SessionLocal, engine
+from app.services import event_store as event_store_module
+from app.services.event_store import InMemoryEventStore, PostgresEventStore, stored_event
+
+@pytest.fixture(params=["memory", "postgres"])
+def store(request):
+    if request.param == "memory":
+        yield InMemoryEventStore()
+        return
+    db = SessionLocal()
+    try:
+        yield PostgresEventStore(db)
+    finally:
+        db.rollback()
+        db.close()
+
+@pytest.fixture
+def base():
+    # A private one-day window per test
+    return datetime(1975, 1, 1) + timedelta(days=random.randrange(365))
+
+def _event(ingested_at: datetime, account_id: str = "acct-store", event_id: UUID = None, **fields) -> dict:
+    event = {
+        "eventId": str(event_id or uuid4()),
+        "ingestedAt": ingested_at.isoformat(timespec="microseconds") + "Z",
+        "logType": "Login",
+        "reportingService": "11111111-1111-1111-1111-111111111111",
+        "logLevel": "informational",
+        "activityType": "user-login",
+        "identityType": "User",
+        "user": {"identityUuid": "u-store", "userEmail": "u@example.com"},
+        "action": "Access",
+        "message": "store conformance",
+        "account": {"accountId": account_id, "accountName": "Store Tenant"},
+    }
+    event.update(fields)
+    return event
+
+def test_insert_get_returns_the_read_path_shape(store, base):
+    event = _event(
+        base,
+        time="2025-08-10T14:00:00.120+02:00",
+        ipAddress="2001:DB8:0:0:0:0:0:1",
+        user={"identityUuid": "u-1", "userEmail": None, "userFullName": "User One"},
+        metadata={"browser": "Firefox", "gone": None, "nested": {"keep": 1, "drop": None}, "list": [None, 2]},
+        extraField="not part of the stored event",
+    )
+    store.insert(event)
+
+    got = store.get(UUID(event["eventId"]))
+    assert got == stored_event(event)
+    assert got["time"] == "2025-08-10T12:00:00.12"  # naive UTC, trailing zeros trimmed
+    assert got["ipAddress"] == "2001:db8::1"
+    assert got["user"] == {"identityUuid": "u-1", "userFullName": "User One"}
+    assert got["metadata"] == {"browser": "Firefox", "nested": {"keep": 1}, "list": [None, 2]}
+    assert "extraField" not in got and "errorCode" not in got
+
+def test_get_many_returns_only_existing(store, base):
+    events = [_event(base + timedelta(seconds=i)) for i in range(3)]
+    store.insert_many(events)
+    ids = [UUID(e["eventId"]) for e in events]
+    missing = uuid4()
+
+    assert store.get(missing) is None
+    found = store.get_many(ids[:2] + [missing])
+    assert set(found) == set(ids[:2])
+    assert found[ids[0]] == stored_event(events[0])
+
+def test_scan_orders_by_ingested_at_then_event_id_and_pages_with_keyset(store, base):
+    # Two events share each timestamp: the event ID breaks the tie
+    events = [_event(base + timedelta(seconds=i // 2)) for i in range(9)]
+    store.insert_many(random.sample(events, len(events)))
+    expected = sorted(events, key=lambda e: (e["ingestedAt"], UUID(e["eventId"])))
+    window = dict(since=base, until=base + timedelta(hours=1))
+
+    assert [e["eventId"] for e in store.scan(**window)] == [e["eventId"] for e in expected]
+
+    pages, after = [], None
+    while True:
+        page = store.scan(**window, after=after, limit=4)
+        pages.append(page)
+        if len(page) < 4:
+            break
+        after = (datetime.fromisoformat(page[-1]["ingestedAt"][:-1]), UUID(page[-1]["eventId"]))
+    assert [len(p) for p in pages] == [4, 4, 1]
+    assert [e["eventId"] for p in pages for e in p] == [e["eventId"] for e in expected]
+
+    # since inclusive, until exclusive
+    bounded = store.scan(since=base + timedelta(seconds=1), until=base + timedelta(seconds=3))
+    assert [e["eventId"] for e in bounded] == [e["eventId"] for e in expected[2:6]]
+
+def test_scan_by_account(store, base):
+    busy, quiet = f"acct-{uuid4()}", f"acct-{uuid4()}"
+    events = [_event(base + timedelta(seconds=i), busy if i % 3 else quiet) for i in range(9)]
+    store.insert_many(events)
+
+    assert [e["eventId"] for e in store.scan(account_id=quiet)] == [e["eventId"] for e in events[::3]]
+    assert len(store.scan(account_id=busy, limit=4)) == 4
+    assert store.scan(account_id=f"acct-{uuid4()}") == []
+
+def test_delete_older_than_respects_cutoff_and_limit(store, base):
+    old = [_event(base + timedelta(seconds=i), f"acct-{i % 2}") for i in range(5)]
+    recent = _event(base + timedelta(hours=2))
+    store.insert_many(old + [recent])
+    cutoff = base + timedelta(hours=1)
+
+    first = store.delete_older_than(cutoff, limit=3)
+    rest = store.delete_older_than(cutoff, limit=3)
+    assert len(first) == 3 and len(rest) == 2
+    assert set(first) | set(rest) == {UUID(e["eventId"]) for e in old}
+    assert store.delete_older_than(cutoff, limit=3) == []
+
+    assert store.get(UUID(old[0]["eventId"])) is None
+    assert store.scan(account_id="acct-0", since=base, until=cutoff) == []
+    assert store.get(UUID(recent["eventId"])) is not None
+
+def test_delete_older_than_hands_victims_over_first(store, base):
+    old = [_event(base + timedelta(seconds=i)) for i in range(3)]
+    store.insert_many(old)
+    cutoff = base + timedelta(hours=1)
+
+    def fail(events):
+        raise RuntimeError("archive unavailable")
+
+    with pytest.raises(RuntimeError):
+        store.delete_older_than(cutoff, limit=10, before_delete=fail)
+    assert len(store.get_many([UUID(e["eventId"]) for e in old])) == 3
+
+    handed = []
+    deleted = store.delete_older_than(cutoff, limit=10, before_delete=handed.extend)
+    assert sorted(e["eventId"] for e in handed) == sorted(str(i) for i in deleted)
+    assert sorted(handed, key=lambda e: e["eventId"]) == sorted(map(stored_event, old), key=lambda e: e["eventId"])
+
+def test_memory_backend_serves_the_api_without_touching_the_database(client, monkeypatch):
+    monkeypatch.setattr(event_store_module, "EVENT_STORE_BACKEND", "memory")
+    monkeypatch.setattr(event_store_module, "_memory_store", None)
+    account_id = f"acct-{uuid4()}"
+    payload = {k: v for k, v in _event(datetime.utcnow(), account_id).items() if k not in ("eventId", "ingestedAt")}
+
+    created = client.post("/events", json=payload).json()
+    listed = client.get("/events", params={"accountId": account_id}).json()
+    assert [e["eventId"] for e in listed] == [created["eventId"]]
+    assert len(event_store_module._memory_store) == 1
+    with engine.connect() as conn:
+        in_db = conn.execute(text("SELECT count(*) FROM audit_events WHERE event_id = :e"), {"e": created["eventId"]})
+        assert in_db.scalar_one() == 0
@@ -42,6 +42,19 @@ def test_get_event_by_id_404_when_not_exists():
     assert res.status_code == 404
 
 def test_get_event_by_id_422_when_invalid_uuid():
-    # Not a valid UUID v4 should return 422 (Pydantic validation)
+    # Not a valid UUID should return 422 (Pydantic validation)
     res = client.get("/events/not-a-uuid")
     assert res.status_code == 422
+
+
+def test_get_event_by_id_accepts_uuid7_ids(monkeypatch):
+    # EVENT_ID_MODE=uuid7: IDs are time-ordered v7 UUIDs and must round-trip through GET
+    from app.routers import events as events_router
+    from app.services.ids import uuid7
+    monkeypatch.setattr(events_router, "new_event_id", uuid7)
+
+    created = client.post("/events", json=_new_payload()).json()
+    assert created["eventId"][14] == "7"  # version nibble
+    get_res = client.get(f"/events/{created['eventId']}")
+    assert get_res.status_code == 200
+    assert get_res.json() == created
@@ -23,6 +23,38 @@ def _new_payload(idx: int):
         "account": {"accountId": "acme-1", "accountName": "Acme"}
     }
 
+
+def test_get_events_keyset_pages_for_one_account():
+    account = f"acct-{uuid4()}"
+    created = []
+    for i in range(5):
+        payload = {**_new_payload(i), "account": {"accountId": account, "accountName": "Paged"}}
+        created.append(client.post("/events", json=payload).json()["eventId"])
+
+    pages, cursor = [], None
+    while True:
+        params = {"accountId": account, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        res = client.get("/events", params=params)
+        assert res.status_code == 200
+        pages.append([e["eventId"] for e in res.json()])
+        cursor = res.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [eid for page in pages for eid in page] == created
+
+
+def test_get_events_since_filter_and_invalid_cursor():
+    first = client.post("/events", json=_new_payload(0)).json()
+    res = client.get("/events", params={"since": first["ingestedAt"], "limit": 1})
+    assert res.status_code == 200
+    assert res.json()[0]["eventId"] == first["eventId"]
+
+    assert client.get("/events", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/events", params={"limit": 0}).status_code == 422
+
+
 def test_get_events_in_ingestion_order_and_time_format():
     # Arrange: seed a few events to ensure deterministic ingestion order
     created = []
@@ -0,0 +1,57 @@
+# tests/test_http_caching.py
+from uuid import uuid4
+
+from app.routers import events as events_router
+
+def _payload(account_id: str) -> dict:
+    return {
+        "logType": "Login",
+        "reportingService": str(uuid4()),
+        "logLevel": "informational",
+        "activityType": "UserLogin",
+        "identityType": "User",
+        "user": {"identityUuid": "u-etag"},
+        "action": "Access",
+        "message": "etag test",
+        "account": {"accountId": account_id, "accountName": "Etag Tenant"},
+    }
+
+def test_single_event_is_immutable_and_revalidates_without_lookup(client, monkeypatch):
+    created = client.post("/events", json=_payload("acct-etag")).json()
+    res = client.get(f"/events/{created['eventId']}")
+    etag = res.headers["ETag"]
+    assert created["eventId"] in etag and not etag.startswith("W/")
+    assert "immutable" in res.headers["Cache-Control"]
+
+    def no_lookup(*args, **kwargs):
+        raise AssertionError("304 must not read the cache or DB")
+    monkeypatch.setattr(events_router, "svc_get_event_by_id", no_lookup)
+    res = client.get(f"/events/{created['eventId']}", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert res.status_code == 304 and res.content == b""
+    assert res.headers["ETag"] == etag and "immutable" in res.headers["Cache-Control"]
+
+def test_not_found_is_not_cacheable(client):
+    res = client.get(f"/events/{uuid4()}")
+    assert res.status_code == 404 and "ETag" not in res.headers
+
+def test_list_pages_get_cursor_etags(client):
+    account = f"acct-{uuid4()}"
+    for _ in range(3):
+        client.post("/events", json=_payload(account))
+
+    first = client.get("/events", params={"accountId": account, "limit": 2})
+    assert first.headers["Cache-Control"].startswith("public, max-age=")
+    etag = first.headers["ETag"]
+    again = client.get("/events", params={"accountId": account, "limit": 2}, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+    # Last page may still grow: revalidate every time, and its ETag changes once it does
+    last = client.get("/events", params={"accountId": account, "limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert last.headers["Cache-Control"] == "no-cache" and len(last.json()) == 1
+    client.post("/events", json=_payload(account))
+    grown = client.get(
+        "/events",
+        params={"accountId": account, "limit": 2, "cursor": first.headers["X-Next-Cursor"]},
+        headers={"If-None-Match": last.headers["ETag"]},
+    )
+    assert grown.status_code == 200 and len(grown.json()) == 2 and grown.headers["ETag"] != last.headers["ETag"]
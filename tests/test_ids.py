@@ -0,0 +1,23 @@
+# tests/test_ids.py
+import time
+import pytest
+
+from app.services.ids import get_id_generator, uuid7, uuid7_timestamp_ms
+
+def test_uuid7_layout_and_timestamp():
+    before = time.time_ns() // 1_000_000
+    value = uuid7()
+    after = time.time_ns() // 1_000_000
+    assert value.version == 7
+    assert value.variant == "specified in RFC 4122"
+    assert before <= uuid7_timestamp_ms(value) <= after + 1
+
+def test_uuid7_is_monotonic_within_a_process():
+    ids = [uuid7() for _ in range(10_000)]
+    assert ids == sorted(ids)
+    assert str(ids[0]) < str(ids[-1])  # text order matches too (what the PK index sees)
+    assert len(set(ids)) == len(ids)
+
+def test_unknown_mode_fails_fast():
+    with pytest.raises(ValueError):
+        get_id_generator("uuid1")
@@ -0,0 +1,36 @@
+# tests/test_json_codec.py
+import json
+from uuid import uuid4
+import pytest
+
+from app.services import json_codec
+
+EVENT = {
+    "eventId": str(uuid4()),
+    "ingestedAt": "2026-01-01T00:00:00.000001Z",
+    "message": "Grüße – ünïcödé stays unescaped",
+    "metadata": {"attempts": 3, "ratio": 0.25, "ok": True, "missing": None, "tags": ["a", "b"]},
+}
+
+def test_output_matches_the_previous_stdlib_encoding():
+    assert json_codec.dumps(EVENT) == json.dumps(EVENT, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    assert json_codec.loads(json_codec.dumps(EVENT)) == EVENT
+    assert json_codec.dumps_str(EVENT) == json_codec.dumps(EVENT).decode("utf-8")
+
+def test_inputs_orjson_rejects_fall_back_to_stdlib():
+    big = {"metadata": {"id": 2**70}, 1: "non-str key"}
+    assert json_codec.loads(json_codec.dumps(big)) == {"metadata": {"id": 2**70}, "1": "non-str key"}
+    with pytest.raises(ValueError):
+        json_codec.loads(b"{not json")
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        json_codec._select("simdjson")
+    assert json_codec._select("stdlib")[0] == "stdlib"
+
+def test_api_round_trips_big_integers_in_metadata(client):
+    payload = json.loads(open("valid_event.json", encoding="utf-8").read())
+    payload["metadata"] = {"traceId": 2**70}
+    created = client.post("/events", json=payload).json()
+    assert created["metadata"] == {"traceId": 2**70}
+    assert client.get(f"/events/{created['eventId']}").json()["metadata"] == {"traceId": 2**70}
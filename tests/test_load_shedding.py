@@ -0,0 +1,122 @@
+# tests/test_load_shedding.py
+import asyncio
+import time
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+from app import main as main_module
+from app.database import engine
+from app.main import app
+from app.middleware.load_shedding import LoadSheddingMiddleware
+from app.services.load_shedding import BULK, CRITICAL, INGEST, READ, AdmissionController, classify
+from app.services.metrics import DB_POOL_WAIT_SECONDS
+
+def _event() -> dict:
+    return {
+        "logType": "Login",
+        "reportingService": str(uuid4()),
+        "logLevel": "informational",
+        "activityType": "UserLogin",
+        "identityType": "User",
+        "user": {"identityUuid": str(uuid4()), "userEmail": "shed@example.com"},
+        "action": "Access",
+        "message": "protected ingest",
+        "account": {"accountId": f"acct-{uuid4()}", "accountName": "Shed Tenant"},
+    }
+
+def test_classify_by_priority():
+    assert classify("GET", "/health") == CRITICAL
+    assert classify("GET", "/ready") == CRITICAL
+    assert classify("GET", "/__queries__") == CRITICAL
+    assert classify("POST", "/events") == INGEST
+    assert classify("GET", "/events") == BULK  # full list / export
+    assert classify("GET", "/events", b"accountId=a&limit=100000") == BULK
+    assert classify("GET", "/events", b"accountId=a&limit=50") == READ
+    assert classify("GET", f"/events/{uuid4()}") == READ
+    assert classify("POST", "/events/lookup") == READ
+
+def test_bulk_is_shed_first_and_ingest_never():
+    controller = AdmissionController(pool_wait_threshold=0, loop_lag_threshold=0, max_in_flight=10, read_factor=2)
+    assert all(controller.admit(p) for p in (CRITICAL, INGEST, READ, BULK))
+
+    controller.in_flight = 10  # pressure 1.0
+    assert controller.level() == 1
+    assert not controller.admit(BULK)
+    assert controller.admit(READ) and controller.admit(INGEST)
+
+    controller.in_flight = 25  # pressure 2.5
+    assert controller.level() == 2
+    assert not controller.admit(READ) and not controller.admit(BULK)
+    assert controller.admit(INGEST) and controller.admit(CRITICAL)
+    assert controller.decisions[(BULK, "shed")] == 2
+    assert controller.decisions[(READ, "shed")] == 1
+    assert controller.decisions[(INGEST, "shed")] == 0
+
+def test_pool_wait_is_the_smoothed_mean_of_new_checkouts():
+    controller = AdmissionController(pool_wait_threshold=0.1, loop_lag_threshold=0, max_in_flight=0)
+    for _ in range(4):
+        DB_POOL_WAIT_SECONDS.labels("load-shed-test").observe(0.5)
+    controller.sample(loop_lag=0.0)
+    assert controller.pool_wait == pytest.approx(0.15)
+    assert controller.level() == 1
+
+    for _ in range(20):
+        controller.sample(loop_lag=0.0)  # no slow checkouts since: the average decays
+    assert controller.level() == 0
+
+def test_middleware_sheds_with_503_and_keeps_ingest_and_health():
+    controller = AdmissionController(pool_wait_threshold=0, loop_lag_threshold=0.1, max_in_flight=0, read_factor=2)
+    client = TestClient(LoadSheddingMiddleware(app, controller))
+    controller.loop_lag = 0.15  # between 1x and 2x: only bulk reads go
+
+    shed = client.get("/events")
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "5"
+    assert client.get("/events", params={"limit": 5}).status_code == 200
+
+    controller.loop_lag = 1.0
+    assert client.get("/events", params={"limit": 5}).status_code == 503
+    assert client.post("/events", json=_event()).status_code == 200
+    assert client.get("/health").status_code == 200
+    assert controller.in_flight == 0
+
+def test_probes_do_not_wait_on_an_exhausted_request_pool():
+    client = TestClient(app)
+    held = [engine.connect() for _ in range(engine.pool.size() + engine.pool._max_overflow)]
+    try:
+        started = time.monotonic()
+        assert client.get("/health").json() == {"status": "ok"}
+        assert client.get("/ready").json() == {"status": "ok", "db": "connected"}
+        assert time.monotonic() - started < 2  # a request checkout would block for pool_timeout (30s)
+    finally:
+        for conn in held:
+            conn.close()
+
+def test_ready_is_503_when_the_database_is_unreachable(monkeypatch):
+    def unreachable():
+        raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(main_module, "_probe_db", unreachable)
+    client = TestClient(app)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "error"
+    assert client.get("/health").status_code == 200
+
+@pytest.mark.asyncio
+async def test_monitor_measures_event_loop_lag():
+    controller = AdmissionController(pool_wait_threshold=0, loop_lag_threshold=0.05, max_in_flight=0, interval=0.01)
+    await controller.start()
+    peak = 0.0
+    try:
+        await asyncio.sleep(0.02)
+        time.sleep(0.5)  # block the loop
+        for _ in range(5):  # the overdue tick runs first, later ticks decay the average again
+            await asyncio.sleep(0.005)
+            peak = max(peak, controller.loop_lag)
+    finally:
+        await controller.stop()
+    assert peak > 0.1  # one tick ~0.5 s late, smoothed
@@ -0,0 +1,51 @@
+# tests/test_lookup_events.py
+from uuid import uuid4
+
+from app.services.cache_factory import get_cache
+from app.services.queries import get_query_registry
+
+def _payload(i: int) -> dict:
+    return {
+        "logType": "Login",
+        "reportingService": str(uuid4()),
+        "logLevel": "informational",
+        "activityType": "UserLogin",
+        "identityType": "User",
+        "user": {"identityUuid": f"u-{i}"},
+        "action": "Access",
+        "message": f"lookup {i}",
+        "account": {"accountId": "acme-lookup", "accountName": "Acme"},
+    }
+
+def _db_calls() -> int:
+    return get_query_registry().stats().get("events_by_ids", {}).get("calls", 0)
+
+def test_lookup_returns_requested_order_with_not_found_markers(client):
+    created = [client.post("/events", json=_payload(i)).json() for i in range(3)]
+    missing = str(uuid4())
+    ids = [created[2]["eventId"], missing, created[0]["eventId"], created[2]["eventId"]]
+
+    res = client.post("/events/lookup", json={"eventIds": ids})
+    assert res.status_code == 200
+    assert res.json() == [created[2], {"eventId": missing, "notFound": True}, created[0], created[2]]
+
+def test_lookup_reads_cache_first_and_queries_misses_once(client):
+    created = [client.post("/events", json=_payload(i)).json() for i in range(4)]
+    ids = [e["eventId"] for e in created]
+
+    before = _db_calls()
+    assert client.post("/events/lookup", json={"eventIds": ids}).json() == created
+    assert _db_calls() == before  # all cached by POST
+
+    for eid in ids[:2]:
+        get_cache().delete(f"event:{eid}")
+    assert client.post("/events/lookup", json={"eventIds": ids}).json() == created
+    assert _db_calls() == before + 1  # one ANY() query for both misses
+
+    assert client.post("/events/lookup", json={"eventIds": ids}).json() == created
+    assert _db_calls() == before + 1  # misses were written back to the cache
+
+def test_lookup_rejects_bad_requests(client):
+    assert client.post("/events/lookup", json={"eventIds": []}).status_code == 422
+    assert client.post("/events/lookup", json={"eventIds": ["not-a-uuid"]}).status_code == 422
+    assert client.post("/events/lookup", json={}).status_code == 422
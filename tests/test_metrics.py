@@ -0,0 +1,71 @@
+# tests/test_metrics.py
+import json
+import re
+
+from app.services import stream_manager as stream_manager_module
+from app.services.lru_cache import LRUCacheImpl
+from app.services.metrics import REGISTRY, MetricsRegistry
+from app.services.stream_manager import StreamConnectionManager
+
+def _sample(text: str, name: str, **labels) -> float:
+    label_re = ",".join(f'{k}="{re.escape(v)}"' for k, v in labels.items())
+    pattern = rf"^{re.escape(name)}\{{{label_re}\}} (\S+)$" if labels else rf"^{re.escape(name)} (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    assert match, f"{name} {labels} not exported"
+    return float(match.group(1))
+
+def test_histogram_and_counter_exposition():
+    registry = MetricsRegistry()
+    h = registry.histogram("t_seconds", "Test latency.", ("op",), buckets=(0.1, 1.0))
+    c = registry.counter("t_total", "Test count.")
+    for v in (0.05, 0.5, 5.0):
+        h.labels("a").observe(v)
+    c.inc(2)
+    text = registry.render()
+
+    assert "# TYPE t_seconds histogram" in text and "# TYPE t_total counter" in text
+    assert _sample(text, "t_seconds_bucket", op="a", le="0.1") == 1
+    assert _sample(text, "t_seconds_bucket", op="a", le="1") == 2
+    assert _sample(text, "t_seconds_bucket", op="a", le="+Inf") == 3
+    assert _sample(text, "t_seconds_count", op="a") == 3
+    assert _sample(text, "t_seconds_sum", op="a") == 5.55
+    assert _sample(text, "t_total") == 2
+
+def test_metrics_endpoint_covers_routes_db_cache_and_pool(client):
+    payload = json.load(open("valid_event.json", encoding="utf-8"))
+    created = client.post("/events", json=payload).json()
+    client.get(f"/events/{created['eventId']}")
+    client.get("/events", params={"limit": 1})
+
+    res = client.get("/metrics")
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = res.text
+    assert _sample(text, "audit_http_request_duration_seconds_count", method="GET", route="/events/{event_id}", status="200") >= 1
+    assert _sample(text, "audit_db_query_duration_seconds_count", statement="list_events:limit") >= 1
+    assert _sample(text, "audit_db_query_duration_seconds_count", statement="INSERT") >= 1
+    assert _sample(text, "audit_db_pool_checkout_wait_seconds_count", pool="primary") >= 1
+    assert _sample(text, "audit_cache_operations_total", cache="events", outcome="hits") >= 1
+    assert "audit_bus_publish_duration_seconds_count" in text
+    assert _sample(text, "audit_stream_connections") >= 0
+
+def test_cache_set_many_counts_only_real_evictions():
+    cache = LRUCacheImpl(capacity=3)
+    cache.set_many({"a": {}, "b": {}})
+    cache.set_many({"a": {}, "c": {}})  # overwrite + insert, still within capacity
+    assert cache.stats()["evictions"] == 0
+    cache.set_many({"d": {}, "e": {}})
+    assert cache.stats()["evictions"] == 2 and cache.stats()["entries"] == 3
+
+def test_stream_queue_gauges_are_aggregated_over_clients(monkeypatch):
+    manager = StreamConnectionManager(max_streams=10, max_per_tenant=0)
+    monkeypatch.setattr(stream_manager_module, "get_stream_manager", lambda: manager)
+    for depth in (1, 3):
+        client = manager.admit(None)
+        for _ in range(depth):
+            client.put(b"{}\n")
+
+    text = REGISTRY.render()
+    assert _sample(text, "audit_stream_queue_depth", stat="max") == 3
+    assert _sample(text, "audit_stream_queue_depth", stat="sum") == 4
+    assert _sample(text, "audit_stream_queue_bytes", stat="sum") == 12
+    assert 'client="' not in text  # no per-connection series
@@ -0,0 +1,141 @@
+# tests/test_outbox_relay.py
+import json
+import pytest
+from uuid import uuid4
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.main import app
+from app.database import engine
+from app.routers import events as events_router
+from app.services import outbox_relay as relay_module
+from app.services.metrics import OUTBOX_DROPPED, OUTBOX_OLDEST_PENDING_SECONDS, OUTBOX_PENDING_ROWS
+from app.services.outbox_relay import OutboxRelay
+from app.services.stream_bus import InMemoryBus
+
+client = TestClient(app)
+
+def _payload(i: int):
+    return {
+        "time": datetime.now(timezone.utc).isoformat(),
+        "logType": "Login",
+        "reportingService": str(uuid4()),
+        "logLevel": "informational",
+        "activityType": f"UserLogin_{i}",
+        "identityType": "User",
+        "user": {"identityUuid": f"u-{i}"},
+        "action": "Access",
+        "message": f"M{i}",
+        "account": {"accountId": "acme-1", "accountName": "Acme"}
+    }
+
+@pytest.fixture
+def outbox_enabled(monkeypatch):
+    """Route POST /events through the outbox and relay into an in-memory bus."""
+    bus = InMemoryBus(maxsize=100)
+    monkeypatch.setattr(events_router, "STREAM_OUTBOX_ENABLED", True)
+    monkeypatch.setattr(relay_module, "get_stream_bus", lambda: bus)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM stream_outbox"))
+    yield bus
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM stream_outbox"))
+
+@pytest.mark.asyncio
+async def test_post_writes_outbox_and_relay_publishes_in_order(outbox_enabled):
+    bus = outbox_enabled
+    sub = await bus.open_subscriber()
+
+    created = []
+    for i in range(3):
+        res = client.post("/events", json=_payload(i))
+        assert res.status_code == 200
+        created.append(res.json())
+
+    with engine.begin() as conn:
+        pending = conn.execute(text("SELECT COUNT(*) FROM stream_outbox WHERE sent_at IS NULL")).scalar_one()
+    assert pending == 3
+
+    relay = OutboxRelay(batch_size=2)
+    try:
+        assert await relay.relay_once() == 2
+        assert await relay.relay_once() == 1
+        assert await relay.relay_once() == 0
+    finally:
+        relay.leader.release()
+
+    received = [json.loads(sub.queue.get_nowait()) for _ in range(3)]
+    assert [e["eventId"] for e in received] == [e["eventId"] for e in created]
+    assert received == created
+
+    with engine.begin() as conn:
+        pending = conn.execute(text("SELECT COUNT(*) FROM stream_outbox WHERE sent_at IS NULL")).scalar_one()
+    assert pending == 0
+
+@pytest.mark.asyncio
+async def test_only_one_relay_publishes_at_a_time(outbox_enabled):
+    res = client.post("/events", json=_payload(0))
+    assert res.status_code == 200
+
+    first, second = OutboxRelay(), OutboxRelay()
+    try:
+        assert await first.relay_once() == 1
+
+        res = client.post("/events", json=_payload(1))
+        assert res.status_code == 200
+        # Lock is held by the first relay; the second stands by without publishing.
+        assert await second.relay_once() == 0
+        assert await first.relay_once() == 1
+        assert first.leader.is_leader and not second.leader.is_leader
+    finally:
+        first.leader.release()
+        second.leader.release()
+
+def test_purge_removes_relayed_rows_past_retention(outbox_enabled, monkeypatch):
+    monkeypatch.setattr(relay_module, "OUTBOX_SENT_RETENTION_SECONDS", 0)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO stream_outbox (event_id, payload, created_at, sent_at)
+            VALUES (:eid, '{}', NOW() AT TIME ZONE 'UTC', (NOW() AT TIME ZONE 'UTC') - INTERVAL '1 minute')
+        """), {"eid": str(uuid4())})
+    assert OutboxRelay().purge() == 1
+
+def test_purge_keeps_undelivered_rows_and_reports_the_backlog(outbox_enabled, monkeypatch):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO stream_outbox (event_id, payload, created_at)
+            VALUES (:eid, '{}', (NOW() AT TIME ZONE 'UTC') - INTERVAL '2 days')
+        """), {"eid": str(uuid4())})
+    assert OutboxRelay().purge() == 0  # dropping undelivered rows is opt-in
+    assert OUTBOX_PENDING_ROWS.labels().value == 1
+    assert OUTBOX_OLDEST_PENDING_SECONDS.labels().value > 2 * 86400 - 60
+
+    monkeypatch.setattr(relay_module, "OUTBOX_MAX_PENDING_AGE_SECONDS", 86400)
+    dropped = OUTBOX_DROPPED.labels().value
+    assert OutboxRelay().purge() == 1
+    assert OUTBOX_DROPPED.labels().value == dropped + 1
+    assert OUTBOX_PENDING_ROWS.labels().value == 0
+
+@pytest.mark.asyncio
+async def test_relay_waits_for_the_commit_watermark(outbox_enabled):
+    bus = outbox_enabled
+    sub = await bus.open_subscriber()
+    insert = text("INSERT INTO stream_outbox (event_id, payload, created_at) VALUES (:eid, :p, NOW() AT TIME ZONE 'UTC')")
+
+    relay = OutboxRelay()
+    first, second = engine.connect(), engine.connect()
+    try:
+        # The first transaction takes the lower id but commits last
+        first.begin()
+        first.execute(insert, {"eid": str(uuid4()), "p": '"first"'})
+        with second.begin():
+            second.execute(insert, {"eid": str(uuid4()), "p": '"second"'})
+        assert await relay.relay_once() == 0  # "second" must not overtake the open transaction
+        first.commit()
+        assert await relay.relay_once() == 2
+    finally:
+        first.close()
+        second.close()
+        relay.leader.release()
+    assert [sub.queue.get_nowait() for _ in range(2)] == [b'"first"', b'"second"']
@@ -0,0 +1,51 @@
+# tests/test_pg_notify_bus.py
+import asyncio
+import json
+from contextlib import suppress
+import pytest
+
+from app.database import SessionLocal
+from app.services.stream_bus import PG_NOTIFY_MAX_PAYLOAD_BYTES, InMemoryBus, PgNotifyBus, TransactionalBus
+
+def _event(message: str = "M") -> dict:
+    return {"eventId": "6f1c1b2e-0000-4000-8000-000000000001", "message": message}
+
+def test_payload_falls_back_to_event_id_above_notify_limit():
+    bus = PgNotifyBus(channel="audit-events-test", payload_mode="json")
+    small = bus.encode_payload(_event())
+    assert json.loads(small) == _event()
+
+    big = bus.encode_payload(_event("x" * (PG_NOTIFY_MAX_PAYLOAD_BYTES + 1)))
+    assert big == _event()["eventId"]
+
+    id_only = PgNotifyBus(channel="audit-events-test", payload_mode="id")
+    assert id_only.encode_payload(_event()) == _event()["eventId"]
+
+def test_only_transactional_buses_can_stage():
+    assert isinstance(PgNotifyBus(channel="audit-events-test"), TransactionalBus)
+    assert not isinstance(InMemoryBus(), TransactionalBus)
+    assert not hasattr(InMemoryBus(), "stage")
+
+@pytest.mark.asyncio
+async def test_notify_is_delivered_on_commit_only():
+    bus = PgNotifyBus(channel="audit-events-test", payload_mode="json")
+    sub = await bus.open_subscriber()
+    try:
+        # Rolled back transaction -> nothing delivered
+        with SessionLocal() as db:
+            bus.stage(db, {**_event(), "message": "rolled-back"})
+            db.rollback()
+
+        # Committed transaction -> delivered to the local subscriber
+        with SessionLocal() as db:
+            bus.stage(db, {**_event(), "message": "committed"})
+            db.commit()
+
+        msg = await bus.get_message(sub, timeout=5)
+        assert msg == {**_event(), "message": "committed"}
+        assert await bus.get_message(sub, timeout=0.2) is None
+    finally:
+        await bus.close_subscriber(sub)
+        bus._listener.cancel()
+        with suppress(asyncio.CancelledError):
+            await bus._listener
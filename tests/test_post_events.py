@@ -5,6 +5,8 @@ from fastapi.testclient import TestClient
 from app.main import app
 from uuid import uuid4
 from datetime import datetime, timezone
+from sqlalchemy import text
+from app.database import engine
 
 client = TestClient(app)
 
@@ -56,3 +58,14 @@ def test_post_event_invalid_ip():
     response = client.post("/events", json=broken_event)
     assert response.status_code == 400
     assert "validationErrors" in response.json()
+
+def test_post_event_lowercase_rfc3339_time():
+    # RFC 3339 allows a lowercase "t" / "z"; the stored time comes from the validated datetime
+    event = dict(valid_event, time="2024-01-01t00:00:00z")
+    response = client.post("/events", json=event)
+    assert response.status_code == 200
+    with engine.connect() as conn:
+        stored = conn.execute(
+            text("SELECT time FROM audit_events WHERE event_id = :e"), {"e": response.json()["eventId"]}
+        ).scalar_one()
+    assert stored == datetime(2024, 1, 1)
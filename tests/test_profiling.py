@@ -0,0 +1,55 @@
+# tests/test_profiling.py
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.middleware.profiling import PROFILE_FILE_HEADER, ProfilingMiddleware
+from app.services.profiling import StackSampler
+
+def _folded(path):
+    lines = path.read_text(encoding="utf-8").splitlines()
+    parsed = [line.rsplit(" ", 1) for line in lines]
+    assert parsed and all(weight.isdigit() for _, weight in parsed)
+    return {stack: int(weight) for stack, weight in parsed}
+
+def test_profiling_is_not_installed_by_default():
+    assert not any(m.cls is ProfilingMiddleware for m in main.app.user_middleware)
+
+def test_header_profiles_one_request_to_a_folded_file(tmp_path):
+    payload = json.load(open("valid_event.json", encoding="utf-8"))
+    with TestClient(ProfilingMiddleware(main.app, token="s3cret", sample_rate=0, directory=str(tmp_path))) as client:
+        res = client.post("/events", json=payload, headers={"X-Profile": "s3cret"})
+        assert res.status_code == 200
+        name = res.headers[PROFILE_FILE_HEADER]
+
+        # Wrong or missing token: served normally, nothing written
+        assert PROFILE_FILE_HEADER not in client.post("/events", json=payload, headers={"X-Profile": "nope"}).headers
+        assert PROFILE_FILE_HEADER not in client.post("/events", json=payload).headers
+
+    assert [p.name for p in tmp_path.iterdir()] == [name]
+    stacks = _folded(tmp_path / name)
+    handler = [s for s in stacks if "create_event (app/routers/events.py" in s]
+    assert handler and all(s.split(";")[0] == "request" for s in stacks)
+    # The ingestion stages show up under the handler
+    assert any("iter_errors" in s for s in handler)
+    assert any("run_in_threadpool" in s for s in handler)  # the save itself runs on a worker thread
+
+def test_sampler_endpoints(tmp_path, monkeypatch, client):
+    assert client.post("/__profiler__/start").status_code == 404  # profiling not configured
+
+    monkeypatch.setattr(main, "PROFILING_TOKEN", "s3cret")
+    monkeypatch.setattr(main, "get_sampler", lambda sampler=StackSampler(directory=str(tmp_path)): sampler)
+    assert client.post("/__profiler__/start", headers={"X-Profile": "bad"}).status_code == 403
+
+    started = client.post("/__profiler__/start", params={"interval": 0.001}, headers={"X-Profile": "s3cret"})
+    assert started.status_code == 200 and started.json()["running"] is True
+    assert client.post("/__profiler__/start", headers={"X-Profile": "s3cret"}).status_code == 409
+    time.sleep(0.05)
+    stopped = client.post("/__profiler__/stop", headers={"X-Profile": "s3cret"})
+    assert stopped.status_code == 200 and stopped.json()["samples"] > 0
+
+    stacks = _folded(tmp_path / stopped.json()["file"])
+    assert all(s.split(";")[0].startswith("thread:") for s in stacks)
+    assert client.post("/__profiler__/stop", headers={"X-Profile": "s3cret"}).status_code == 409
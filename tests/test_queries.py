@@ -0,0 +1,34 @@
+# tests/test_queries.py
+from uuid import uuid4
+import pytest
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.services.dimensions import get_dimension_cache
+from app.services.events_service import EVENT_BY_ID, get_event_by_id, list_events
+from app.services.queries import QueryRegistry, get_query_registry
+
+def test_by_id_is_prepared_on_first_use_and_counted():
+    registry = get_query_registry()
+    before = registry.stats()["event_by_id"]["calls"]
+    with SessionLocal() as db:
+        assert get_event_by_id(db, uuid4()) is None
+        prepared = db.execute(text("SELECT statement FROM pg_prepared_statements")).scalars().all()
+    assert any("WHERE ae.event_id = $1" in s for s in prepared)
+    assert registry.stats()["event_by_id"]["calls"] == before + 1
+
+def test_list_variants_are_registered_per_filter_combination():
+    account_id = f"acct-{uuid4()}"
+    get_dimension_cache().account_key(account_id, "Variant Tenant")
+    with SessionLocal() as db:
+        list_events(db, account_id=account_id, limit=5)
+    stats = get_query_registry().stats()
+    assert stats["list_events:account1:limit"]["calls"] >= 1  # one account key, no legacy rows
+
+def test_register_rejects_conflicting_sql():
+    registry = QueryRegistry()
+    q = registry.register("q", "SELECT :x")
+    assert registry.register("q", "SELECT :x") is q
+    with pytest.raises(ValueError):
+        registry.register("q", "SELECT :y")
+    assert EVENT_BY_ID.driver_sql.count("%(id)s") == 1
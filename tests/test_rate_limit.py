@@ -0,0 +1,151 @@
+# tests/test_rate_limit.py
+import asyncio
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import rate_limit as rate_limit_module
+from app.services.rate_limit import (
+    ACCOUNT, SERVICE, FairScheduler, InProcessRateLimiter, RateLimitExceeded, RedisRateLimiter, rate_limit_keys,
+)
+
+client = TestClient(app)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def _event(account_id: str, service: str) -> dict:
+    return {
+        "logType": "Login",
+        "reportingService": service,
+        "logLevel": "informational",
+        "activityType": "UserLogin",
+        "identityType": "User",
+        "user": {"identityUuid": str(uuid4()), "userEmail": "rl@example.com"},
+        "action": "Access",
+        "message": "rate limited?",
+        "account": {"accountId": account_id, "accountName": "Rate Limit Tenant"},
+    }
+
+def test_rate_limit_keys_tolerate_unvalidated_bodies():
+    assert rate_limit_keys({"account": {"accountId": "a"}, "reportingService": "ABC"}) == ("a", "abc")
+    assert rate_limit_keys({"account": "a", "reportingService": 5}) == (None, None)
+    assert rate_limit_keys([1, 2]) == (None, None)
+
+def test_bucket_allows_burst_then_refills_at_rate():
+    clock = FakeClock()
+    limiter = InProcessRateLimiter(account_rate=2, account_burst=3, service_rate=0, service_burst=0, clock=clock)
+    for _ in range(3):
+        limiter.check_now("acct", "svc")
+    with pytest.raises(RateLimitExceeded) as ex:
+        limiter.check_now("acct", "svc")
+    assert ex.value.dimension == ACCOUNT
+    assert ex.value.retry_after == pytest.approx(0.5)
+
+    limiter.check_now("other", "svc")  # buckets are per account
+    clock.now += 0.5
+    limiter.check_now("acct", "svc")
+    clock.now += 100  # refill is capped at the burst
+    for _ in range(3):
+        limiter.check_now("acct", "svc")
+    with pytest.raises(RateLimitExceeded):
+        limiter.check_now("acct", "svc")
+    assert limiter.snapshot()["limited"] == {ACCOUNT: 2, SERVICE: 0}
+
+def test_rejected_request_takes_no_tokens():
+    clock = FakeClock()
+    limiter = InProcessRateLimiter(account_rate=1, account_burst=2, service_rate=1, service_burst=1, clock=clock)
+    limiter.check_now("acct", "svc")
+    with pytest.raises(RateLimitExceeded) as ex:
+        limiter.check_now("acct", "svc")
+    assert ex.value.dimension == SERVICE
+    # The account still has the token the service rejection did not take
+    limiter.check_now("acct", "other-svc")
+    with pytest.raises(RateLimitExceeded) as ex:
+        limiter.check_now("acct", "third-svc")
+    assert ex.value.dimension == ACCOUNT
+
+def test_bucket_table_is_bounded():
+    limiter = InProcessRateLimiter(account_rate=1, account_burst=1, service_rate=1, service_burst=1, max_keys=10)
+    for i in range(100):
+        limiter.check_now(f"acct-{i}", f"svc-{i}")
+    assert len(limiter) == 20
+
+@pytest.mark.asyncio
+async def test_redis_limiter_fails_open():
+    limiter = RedisRateLimiter(url="redis://127.0.0.1:1/0", account_rate=1, account_burst=1, service_rate=0, service_burst=0)
+    for _ in range(3):
+        await limiter.check("acct", "svc")
+    assert limiter.snapshot()["admitted"] == 3
+    assert limiter.errors == 3
+
+def test_post_over_limit_gets_429_before_schema_validation(monkeypatch):
+    limiter = InProcessRateLimiter(account_rate=0.01, account_burst=1, service_rate=0, service_burst=0)
+    monkeypatch.setattr(rate_limit_module, "_limiter", limiter)
+    monkeypatch.setattr(rate_limit_module, "_limiter_ready", True)
+    account_id = f"acct-{uuid4()}"
+
+    assert client.post("/events", json=_event(account_id, str(uuid4()))).status_code == 200
+    over = client.post("/events", json=_event(account_id, str(uuid4())))
+    assert over.status_code == 429
+    assert int(over.headers["Retry-After"]) >= 1
+    # Rejected without paying for validation: an invalid body from the same tenant is also a 429
+    invalid = {**_event(account_id, str(uuid4())), "logLevel": "not-a-level"}
+    assert client.post("/events", json=invalid).status_code == 429
+    assert client.post("/events", json=_event(f"acct-{uuid4()}", str(uuid4()))).status_code == 200
+
+@pytest.mark.asyncio
+async def test_fair_scheduler_serves_tenants_round_robin():
+    scheduler = FairScheduler(slots=1)
+    await scheduler.acquire("busy")  # the only slot is taken
+    order = []
+
+    async def write(tenant, n):
+        await scheduler.acquire(tenant)
+        order.append(f"{tenant}-{n}")
+        scheduler.release()
+
+    tasks = [asyncio.create_task(write("busy", n)) for n in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(write("quiet", 0)))
+    await asyncio.sleep(0)
+    assert scheduler.snapshot()["waiting"] == 4
+
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    assert order == ["busy-0", "quiet-0", "busy-1", "busy-2"]
+    assert scheduler.snapshot()["busy"] == 0
+
+@pytest.mark.asyncio
+async def test_fair_scheduler_bounds_queue_per_tenant_and_skips_cancelled():
+    scheduler = FairScheduler(slots=1, max_queued_per_tenant=2)
+    await scheduler.acquire("a")
+    first = asyncio.create_task(scheduler.acquire("a"))
+    second = asyncio.create_task(scheduler.acquire("a"))
+    await asyncio.sleep(0)
+    with pytest.raises(RateLimitExceeded):
+        await scheduler.acquire("a")
+    assert scheduler.snapshot()["rejected"] == 1
+
+    first.cancel()
+    await asyncio.sleep(0)
+    scheduler.release()  # skips the cancelled waiter
+    await second
+    scheduler.release()
+    assert scheduler.snapshot()["busy"] == 0
+
+def test_post_with_write_scheduler_inserts_off_the_loop(monkeypatch):
+    scheduler = FairScheduler(slots=2)
+    monkeypatch.setattr(rate_limit_module, "_scheduler", scheduler)
+    monkeypatch.setattr(rate_limit_module, "_scheduler_ready", True)
+
+    created = client.post("/events", json=_event(f"acct-{uuid4()}", str(uuid4())))
+    assert created.status_code == 200
+    assert client.get(f"/events/{created.json()['eventId']}").status_code == 200
+    assert scheduler.snapshot()["granted"] == 1 and scheduler.snapshot()["busy"] == 0
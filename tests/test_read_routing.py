@@ -0,0 +1,87 @@
+# tests/test_read_routing.py
+import time
+import pytest
+
+from app.database import SessionLocal, get_read_db
+from app.main import app
+from app.routers import events as events_router
+from app.services.read_routing import ReadRouter
+
+class FakeTracker:
+    def __init__(self, lag):
+        self.lag = lag
+
+    def lag_seconds(self):
+        return self.lag
+
+def _payload() -> dict:
+    return {
+        "logType": "Login",
+        "reportingService": "11111111-1111-1111-1111-111111111111",
+        "logLevel": "informational",
+        "activityType": "user-login",
+        "identityType": "User",
+        "user": {"identityUuid": "u-replica"},
+        "action": "Access",
+        "message": "replica routing",
+        "account": {"accountId": "acct-replica", "accountName": "Replica Tenant"},
+    }
+
+def test_routing_rules_and_counters():
+    router = ReadRouter(FakeTracker(0.5))
+    now_ms = int(time.time() * 1000)
+    assert router.use_replica() is True
+    assert router.use_replica(consistency="strong") is False
+    assert router.use_replica(read_after=str(now_ms)) is False          # own write newer than lag + margin
+    assert router.use_replica(read_after=str(now_ms - 60_000)) is True   # old write: replica has it
+    assert router.use_replica(read_after="garbage") is True
+
+    router.tracker.lag = 30.0
+    assert router.use_replica() is False
+    router.tracker.lag = None
+    assert router.use_replica() is False
+
+    assert ReadRouter(None).use_replica() is False
+    assert router.stats()["decisions"] == {
+        "replica": 3, "strong": 1, "read_your_writes": 1, "lag": 1, "replica_unhealthy": 1,
+    }
+
+@pytest.fixture
+def replica(client, monkeypatch):
+    """Use a second session on the same DB as the 'replica' and record which session served each read."""
+    session = SessionLocal()
+    router = ReadRouter(FakeTracker(0.0))
+    served = []
+    original = events_router.svc_get_event_by_id
+
+    def tracking_get(db, event_id):
+        if db is session:
+            served.append("replica")
+            return None  # simulate an event that has not replicated yet
+        served.append("primary")
+        return original(db, event_id)
+
+    app.dependency_overrides[get_read_db] = lambda: session
+    monkeypatch.setattr(events_router, "get_read_router", lambda: router)
+    monkeypatch.setattr(events_router, "svc_get_event_by_id", tracking_get)
+    try:
+        yield router, served
+    finally:
+        app.dependency_overrides.pop(get_read_db, None)
+        session.close()
+
+def test_replica_miss_falls_back_to_primary(client, replica):
+    router, served = replica
+    created = client.post("/events", json=_payload())
+    event_id = created.json()["eventId"]
+    assert created.headers["X-Read-After"].isdigit()
+
+    res = client.get(f"/events/{event_id}")
+    assert res.status_code == 200 and res.json()["eventId"] == event_id
+    assert served == ["replica", "primary"]
+    assert router.stats()["decisions"]["miss_fallback"] == 1
+
+    served.clear()
+    assert client.get(f"/events/{event_id}", headers={"X-Read-After": created.headers["X-Read-After"]}).status_code == 200
+    assert client.get(f"/events/{event_id}", headers={"X-Consistency": "strong"}).status_code == 200
+    assert served == ["primary", "primary"]
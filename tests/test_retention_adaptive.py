@@ -0,0 +1,63 @@
+# tests/test_retention_adaptive.py
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import retention as retention_module
+from app.database import engine
+from app.retention import RetentionService
+from app.services.lru_cache import LRUCacheImpl
+
+def test_batch_size_steers_toward_target_duration(monkeypatch):
+    monkeypatch.setattr(retention_module, "RETENTION_TARGET_BATCH_SECONDS", 0.5)
+    monkeypatch.setattr(retention_module, "RETENTION_MIN_BATCH", 100)
+    monkeypatch.setattr(retention_module, "RETENTION_MAX_BATCH", 10_000)
+
+    # Fast batch -> grow, but at most x2 per step
+    assert RetentionService._next_batch_size(1000, 0.1) == 2000
+    # Slow batch -> shrink proportionally
+    assert RetentionService._next_batch_size(1000, 2.0) == 250
+    # Bounds are respected
+    assert RetentionService._next_batch_size(8000, 0.01) == 10_000
+    assert RetentionService._next_batch_size(150, 10.0) == 100
+
+def test_pause_grows_when_batches_run_slower_than_target(monkeypatch):
+    monkeypatch.setattr(retention_module, "RETENTION_TARGET_BATCH_SECONDS", 0.5)
+    monkeypatch.setattr(retention_module, "RETENTION_PAUSE_FACTOR", 1.0)
+    monkeypatch.setattr(retention_module, "RETENTION_MAX_PAUSE_SECONDS", 5.0)
+
+    assert RetentionService._pause_after(0.25) == pytest.approx(0.25)
+    assert RetentionService._pause_after(1.0) == pytest.approx(2.0)  # 1.0 * (1.0 / 0.5)
+    assert RetentionService._pause_after(10.0) == 5.0  # capped
+
+@pytest.mark.asyncio
+async def test_cycle_stops_at_time_budget_and_reports_progress(monkeypatch):
+    monkeypatch.setattr(retention_module, "RETENTION_CYCLE_BUDGET_SECONDS", 0.05)
+    monkeypatch.setattr(retention_module, "RETENTION_PAUSE_FACTOR", 0.0)
+
+    svc = RetentionService(interval_seconds=3600)
+    # Simulate an endless backlog: every batch is full.
+    monkeypatch.setattr(svc, "_delete_one_batch", lambda limit: limit)
+
+    deleted = await svc._retention_cycle()
+    p = svc.progress
+    assert p.budget_exhausted and p.finished
+    assert p.deleted == deleted > 0
+    assert p.batches >= 1
+
+def test_lru_delete_many_evicts_in_bulk():
+    lru = LRUCacheImpl(capacity=10)
+    for i in range(5):
+        lru.set(f"event:{i}", {"i": i})
+    lru.delete_many(["event:0", "event:2", "event:missing"])
+    assert lru.get("event:0") is None and lru.get("event:2") is None
+    assert lru.get("event:1") == {"i": 1}
+
+def test_database_cutoff_uses_the_database_clock():
+    with Session(engine) as db:
+        db_now = db.execute(text("SELECT NOW() AT TIME ZONE 'UTC'")).scalar_one()
+        cutoff = retention_module.database_retention_cutoff(db)
+    assert cutoff == retention_module.retention_cutoff(db_now)
+    assert abs(cutoff - retention_module.retention_cutoff()) < timedelta(minutes=5)
@@ -0,0 +1,56 @@
+# tests/test_retention_leader.py
+import asyncio
+import pytest
+
+from app.retention import RetentionService
+from app.services.leader_election import AdvisoryLockLeader
+
+# Separate lock name so the app's own retention worker (started by other tests) does not interfere.
+LOCK_NAME = "audit-events:retention:test"
+
+def _workers(n: int) -> list[RetentionService]:
+    """Simulate n worker processes: each has its own service and its own lock session."""
+    return [
+        RetentionService(interval_seconds=3600, leader=AdvisoryLockLeader(LOCK_NAME), leader_poll_seconds=0.05)
+        for _ in range(n)
+    ]
+
+@pytest.mark.asyncio
+async def test_exactly_one_worker_is_elected_and_failover_happens():
+    workers = _workers(4)
+    try:
+        elected = [await w._ensure_leader() for w in workers]
+        assert elected.count(True) == 1
+
+        # Re-checking keeps the same leader (no flapping)
+        leader_idx = elected.index(True)
+        assert [await w._ensure_leader() for w in workers] == elected
+
+        # Leader goes away -> another worker takes over on its next poll
+        workers[leader_idx].leader.release()
+        survivors = [w for i, w in enumerate(workers) if i != leader_idx]
+        assert [await w._ensure_leader() for w in survivors].count(True) == 1
+    finally:
+        for w in workers:
+            w.leader.release()
+
+@pytest.mark.asyncio
+async def test_only_the_leader_runs_retention_cycles(monkeypatch):
+    workers = _workers(3)
+    cycles = {id(w): 0 for w in workers}
+
+    for w in workers:
+        async def fake_cycle(w=w):
+            cycles[id(w)] += 1
+            return 0
+        monkeypatch.setattr(w, "_retention_cycle", fake_cycle)
+
+    for w in workers:
+        await w.start()
+    await asyncio.sleep(0.3)
+    for w in workers:
+        await w.stop()
+
+    # One cycle on the leader (then it waits for the long interval); followers never ran one.
+    assert sorted(cycles.values()) == [0, 0, 1]
+    assert not any(w.leader.is_leader for w in workers)
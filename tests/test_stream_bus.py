@@ -0,0 +1,43 @@
+# tests/test_stream_bus.py
+import pytest
+
+from app.services.stream_bus import InMemoryBus
+
+@pytest.mark.asyncio
+async def test_memory_bus_fans_out_same_payload_to_all_subscribers():
+    bus = InMemoryBus(maxsize=10)
+    s1 = await bus.open_subscriber()
+    s2 = await bus.open_subscriber()
+    assert bus.subscriber_count() == 2
+
+    await bus.publish({"eventId": "e-1", "message": "héllo"})
+
+    p1 = await s1.queue.get()
+    p2 = await s2.queue.get()
+    # Encoded once and shared by every subscriber
+    assert p1 is p2
+    assert p1 == '{"eventId":"e-1","message":"héllo"}'.encode("utf-8")
+
+@pytest.mark.asyncio
+async def test_memory_bus_get_message_decodes_and_times_out():
+    bus = InMemoryBus(maxsize=10)
+    sub = await bus.open_subscriber()
+    assert await bus.get_message(sub, timeout=0.01) is None
+
+    await bus.publish({"eventId": "e-2"})
+    assert await bus.get_message(sub, timeout=1) == {"eventId": "e-2"}
+
+@pytest.mark.asyncio
+async def test_memory_bus_drops_oldest_and_stops_after_close():
+    bus = InMemoryBus(maxsize=2)
+    sub = await bus.open_subscriber()
+    for i in range(3):
+        await bus.publish({"i": i})
+    assert sub.dropped == 1
+    assert await bus.get_message(sub, timeout=1) == {"i": 1}
+
+    await bus.close_subscriber(sub)
+    assert bus.subscriber_count() == 0
+    await bus.publish({"i": 99})
+    assert await bus.get_message(sub, timeout=1) == {"i": 2}
+    assert await bus.get_message(sub, timeout=0.01) is None
@@ -0,0 +1,80 @@
+# tests/test_stream_client.py
+import asyncio
+import pytest
+
+from app.routers.stream import _ndjson_line
+from app.services.stream_client import StreamClientQueue
+
+def _line(i: int) -> bytes:
+    return f'{{"eventId":"e-{i}"}}\n'.encode("utf-8")
+
+def test_drain_coalesces_queued_lines_up_to_budget():
+    q = StreamClientQueue(maxsize=100, policy="drop_oldest")
+    for i in range(10):
+        q.put(_line(i))
+
+    # Budget fits 3 lines -> first write has 3, the rest come in the next write.
+    budget = len(_line(0)) * 3
+    first = q.drain(budget)
+    assert first == b"".join(_line(i) for i in range(3))
+    rest = q.drain(10_000)
+    assert rest == b"".join(_line(i) for i in range(3, 10))
+    assert q.depth == 0
+    assert q.stats()["writes"] == 2
+    assert q.stats()["delivered"] == 10
+
+def test_drain_returns_oversized_line_alone():
+    q = StreamClientQueue(maxsize=10)
+    big = b"x" * 100 + b"\n"
+    q.put(big)
+    q.put(_line(1))
+    assert q.drain(10) == big
+    assert q.drain(10) == _line(1)
+
+def test_drop_oldest_policy_counts_drops():
+    q = StreamClientQueue(maxsize=3, policy="drop_oldest")
+    for i in range(5):
+        q.put(_line(i))
+    assert q.depth == 3
+    assert q.dropped == 2
+    assert not q.overflowed
+    # Oldest two were evicted
+    assert q.drain(10_000) == b"".join(_line(i) for i in range(2, 5))
+
+def test_disconnect_policy_marks_overflow():
+    q = StreamClientQueue(maxsize=2, policy="disconnect")
+    for i in range(3):
+        q.put(_line(i))
+    assert q.overflowed
+    assert q.dropped == 1
+    assert q.depth == 2
+
+def test_spill_policy_buffers_until_byte_budget():
+    line_len = len(_line(0))
+    q = StreamClientQueue(maxsize=2, policy="spill", spill_max_bytes=line_len * 4)
+    for i in range(4):
+        q.put(_line(i))
+    assert not q.overflowed
+    assert q.spilled == 2
+    assert q.depth == 4
+
+    # Fifth line exceeds the spill budget -> disconnect
+    q.put(_line(4))
+    assert q.overflowed
+
+@pytest.mark.asyncio
+async def test_wait_wakes_on_put_and_times_out_when_idle():
+    q = StreamClientQueue(maxsize=10)
+    assert await q.wait(timeout=0.01) is False
+
+    asyncio.get_running_loop().call_later(0.01, q.put, _line(1))
+    assert await q.wait(timeout=1) is True
+    q.drain()
+    assert await q.wait(timeout=0.01) is False
+
+def test_invalid_bus_payloads_are_skipped_before_queueing():
+    assert _ndjson_line(b'{"eventId":"e1"}') == b'{"eventId":"e1"}\n'
+    assert _ndjson_line('{"eventId":"e2"}') == b'{"eventId":"e2"}\n'
+    assert _ndjson_line(b'{\n  "eventId": "e3"\n}') == b'{"eventId":"e3"}\n'  # one line per event
+    for invalid in (b"", b"not json", b'{"eventId":', b"[1, 2]", b"42"):
+        assert _ndjson_line(invalid) is None
@@ -0,0 +1,96 @@
+# tests/test_stream_manager.py
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import stream as stream_router
+from app.services.stream_bus import InMemoryBus
+from app.services.stream_manager import StreamAdmissionError, StreamConnectionManager
+
+client = TestClient(app)
+
+def test_admission_enforces_worker_and_tenant_limits():
+    m = StreamConnectionManager(max_streams=3, max_per_tenant=2)
+    a1 = m.admit("tenant-a")
+    m.admit("tenant-a")
+    with pytest.raises(StreamAdmissionError):
+        m.admit("tenant-a")  # tenant budget exhausted
+
+    m.admit("tenant-b")
+    with pytest.raises(StreamAdmissionError):
+        m.admit("tenant-c")  # worker budget exhausted
+
+    # Releasing frees both the worker and the tenant slot
+    m.release(a1, reason="reaped")
+    m.admit("tenant-a")
+
+    snap = m.snapshot()
+    assert snap["active"] == 3
+    assert snap["perTenant"] == {"tenant-a": 2, "tenant-b": 1}
+    assert snap["rejected"] == 2
+    assert snap["reaped"] == 1
+
+def test_release_is_idempotent():
+    m = StreamConnectionManager(max_streams=10, max_per_tenant=0)
+    c = m.admit(None)
+    m.release(c)
+    m.release(c)
+    assert m.snapshot()["active"] == 0
+    assert m.snapshot()["perTenant"] == {}
+
+def test_stream_is_shed_with_503_and_probe_reports_counts(monkeypatch):
+    m = StreamConnectionManager(max_streams=1, max_per_tenant=1)
+    m.admit("acme-1")  # occupy the only slot
+    monkeypatch.setattr(stream_router, "get_stream_manager", lambda: m)
+
+    res = client.get("/stream", headers={"X-Account-Id": "acme-1"})
+    assert res.status_code == 503
+    assert res.headers.get("Retry-After")
+
+    probe = client.get("/__stream_probe__").json()
+    assert probe["streams"]["active"] == 1
+    assert probe["streams"]["rejected"] == 1
+    assert len(probe["clients"]) == 1
+
+def test_worker_limit_cannot_be_disabled():
+    with pytest.raises(ValueError):
+        StreamConnectionManager(max_streams=0, max_per_tenant=0)
+
+class _DisconnectedRequest:
+    headers = {"X-Account-Id": "acme-1"}
+
+    async def is_disconnected(self):
+        return True
+
+@pytest.fixture
+def stream_setup(monkeypatch):
+    bus, m = InMemoryBus(), StreamConnectionManager(max_streams=5, max_per_tenant=5)
+    monkeypatch.setattr(stream_router, "get_stream_bus", lambda: bus)
+    monkeypatch.setattr(stream_router, "get_stream_manager", lambda: m)
+    monkeypatch.setattr(stream_router, "STREAM_DISCONNECT_CHECK_SECONDS", 0.01)
+    return bus, m
+
+@pytest.mark.asyncio
+async def test_idle_stream_of_a_gone_client_is_reaped(stream_setup):
+    bus, m = stream_setup
+    response = await stream_router.stream_ndjson(_DisconnectedRequest())
+    assert m.active == 1 and bus.subscriber_count() == 1
+
+    assert [chunk async for chunk in response.body_iterator] == []  # idle wakeup notices the disconnect
+    assert m.snapshot()["reaped"] == 1
+    assert m.active == 0 and bus.subscriber_count() == 0
+
+@pytest.mark.asyncio
+async def test_response_that_never_starts_still_releases(stream_setup):
+    bus, m = stream_setup
+    response = await stream_router.stream_ndjson(_DisconnectedRequest())
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise OSError("client went away")  # fails on http.response.start: the body never starts
+
+    with pytest.raises(Exception):
+        await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+    assert m.active == 0 and bus.subscriber_count() == 0